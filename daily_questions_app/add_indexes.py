@@ -0,0 +1,67 @@
+import pyodbc
+
+# (nombre, tabla, definición). Se crean solo si no existen, el script puede ejecutarse varias veces.
+INDEXES = [
+    (
+        'IX_response_question_date', 'response',
+        'CREATE INDEX IX_response_question_date ON response (question_id, date)'
+    ),
+    (
+        'IX_response_date', 'response',
+        'CREATE INDEX IX_response_date ON response (date) INCLUDE (question_id)'
+    ),
+    (
+        'IX_question_assigned_user', 'question',
+        'CREATE INDEX IX_question_assigned_user ON question (assigned_user_id) '
+        'INCLUDE (text, type, options, active, created_at, descripcion, is_required, categoria, version)'
+    ),
+]
+
+def add_indexes():
+    conn_str = (
+        "DRIVER={SQL Server};"
+        "SERVER=DESKTOP-PIDFCJG;"
+        "DATABASE=DailyQuestions;"
+        "Trusted_Connection=yes;"
+    )
+
+    try:
+        conn = pyodbc.connect(conn_str)
+        cursor = conn.cursor()
+
+        for name, table, definition in INDEXES:
+            # El índice único de add_response_unique_constraint.py ya cubre (question_id, date)
+            if name == 'IX_response_question_date':
+                cursor.execute('''
+                    SELECT COUNT(*) FROM sys.indexes
+                    WHERE name = 'UX_response_question_date' AND object_id = OBJECT_ID('response')
+                ''')
+                if cursor.fetchone()[0]:
+                    print(f"Omitiendo {name}: ya existe UX_response_question_date con las mismas columnas")
+                    continue
+
+            cursor.execute(
+                'SELECT COUNT(*) FROM sys.indexes WHERE name = ? AND object_id = OBJECT_ID(?)',
+                (name, table)
+            )
+            if cursor.fetchone()[0]:
+                print(f"El índice {name} ya existe en {table}")
+                continue
+
+            print(f"Creando índice {name} en {table}...")
+            cursor.execute(definition)
+
+        conn.commit()
+        print("Índices creados/verificados exitosamente!")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        if 'conn' in locals() and conn:
+            conn.rollback()
+    finally:
+        if 'conn' in locals() and conn:
+            conn.close()
+
+if __name__ == "__main__":
+    print("Creando índices para response y question...")
+    add_indexes()
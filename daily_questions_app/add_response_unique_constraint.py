@@ -0,0 +1,47 @@
+import pyodbc
+
+def add_response_unique_constraint():
+    conn_str = (
+        "DRIVER={SQL Server};"
+        "SERVER=DESKTOP-PIDFCJG;"
+        "DATABASE=DailyQuestions;"
+        "Trusted_Connection=yes;"
+    )
+
+    try:
+        conn = pyodbc.connect(conn_str)
+        cursor = conn.cursor()
+
+        print("Eliminando respuestas duplicadas por pregunta y fecha (se conserva la más reciente)...")
+        cursor.execute('''
+            WITH ranked AS (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY question_id, date ORDER BY id DESC) AS rn
+                FROM response
+            )
+            DELETE FROM ranked WHERE rn > 1
+        ''')
+        print(f"Respuestas duplicadas eliminadas: {max(cursor.rowcount, 0)}")
+
+        print("Creando la restricción única sobre response(question_id, date)...")
+        cursor.execute('''
+            IF NOT EXISTS (SELECT * FROM sys.indexes
+                           WHERE name = 'UX_response_question_date' AND object_id = OBJECT_ID('response'))
+            BEGIN
+                CREATE UNIQUE INDEX UX_response_question_date ON response (question_id, date);
+            END
+        ''')
+
+        conn.commit()
+        print("Restricción única creada o ya existente. /submit_responses puede usar el modo 'upsert'.")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        if 'conn' in locals() and conn:
+            conn.rollback()
+    finally:
+        if 'conn' in locals() and conn:
+            conn.close()
+
+if __name__ == "__main__":
+    print("Agregando restricción única a la tabla response...")
+    add_response_unique_constraint()
@@ -1,14 +1,31 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, make_response, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, make_response, session, g, has_request_context
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import os
-from flask_session import Session
-import pyodbc
+try:
+    import pyodbc
+except ImportError:  # Solo es necesario con DB_BACKEND=sqlserver
+    pyodbc = None
 from dotenv import load_dotenv
+from storage import QUESTION_COLUMNS, SQLServerStorage, SQLiteStorage
+from cache import TTLCache, VersionedCache, LocalVersionStore, SQLiteVersionStore
+from session_store import init_session
+from assets import init_assets
+from template_cache import init_template_cache
+from db_instrumentation import init_db_instrumentation, current_stats, bound, bound_iter, record_acquire
+from metrics import init_metrics
+import question_options
 import logging
 import sys
 import traceback
+import json
+import base64
+import hashlib
+import time
 
 load_dotenv()
 
@@ -28,88 +45,265 @@ werkzeug_logger.setLevel(logging.ERROR)  # Reducir el nivel de registro de werkz
 
 app = Flask(__name__)
 # Configuración de la sesión
-app.secret_key = os.urandom(24)  # Clave secreta aleatoria
+# La clave debe venir de la configuración para que las sesiones sobrevivan reinicios
+# y sean válidas en todos los workers
+app.secret_key = os.getenv('SECRET_KEY')
+if not app.secret_key:
+    app.logger.warning("SECRET_KEY no está definida; se usa una clave aleatoria (solo para desarrollo)")
+    app.secret_key = os.urandom(24)
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=1)
-app.config['SESSION_TYPE'] = 'filesystem'
+# 'sqlite' (sesiones en el servidor), 'cookie' (sesión firmada) o 'filesystem' (Flask-Session)
+app.config['SESSION_BACKEND'] = os.getenv('SESSION_BACKEND', 'sqlite')
+app.config['SESSION_SQLITE_PATH'] = os.getenv(
+    'SESSION_SQLITE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sessions.sqlite3')
+)
+app.config['SESSION_SWEEP_INTERVAL'] = int(os.getenv('SESSION_SWEEP_INTERVAL', '300'))
 app.config['SESSION_FILE_DIR'] = os.path.join(os.getcwd(), 'flask_session')
+# Versiones de las cachés: 'sqlite' las comparte entre workers, 'local' solo sirve con un proceso
+app.config['SHARED_STATE_BACKEND'] = os.getenv('SHARED_STATE_BACKEND', 'sqlite')
+app.config['SHARED_STATE_PATH'] = os.getenv(
+    'SHARED_STATE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shared_state.sqlite3')
+)
+# 'upsert' escribe solo las respuestas nuevas o modificadas; 'replace' borra y reinserta el día
+app.config['RESPONSE_WRITE_MODE'] = os.getenv('RESPONSE_WRITE_MODE', 'upsert')
+# Consultas del panel de administración en paralelo, cada una con su conexión del pool
+app.config['ADMIN_FANOUT'] = os.getenv('ADMIN_FANOUT', '1') == '1'
+app.config['ADMIN_QUERY_TIMEOUT'] = int(os.getenv('ADMIN_QUERY_TIMEOUT', '5'))
 
-# Asegurarse de que el directorio de sesiones exista
-try:
-    os.makedirs(app.config['SESSION_FILE_DIR'], exist_ok=True)
-except Exception as e:
-    print(f"Error al crear el directorio de sesiones: {e}")
+# Inicializar el almacén de sesiones
+init_session(app)
+
+# Archivos estáticos minificados y con hash en el nombre (static/dist)
+app.config['ASSET_BUILD_ON_STARTUP'] = os.getenv('ASSET_BUILD_ON_STARTUP', '1') == '1'
+init_assets(app)
 
-# Inicializar la extensión de sesión
-Session(app)
+# Plantillas: bytecode compilado en disco y fragmentos renderizados en memoria ({% cache %})
+app.config['JINJA_BYTECODE_CACHE_DIR'] = os.getenv(
+    'JINJA_BYTECODE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.jinja_cache')
+)
+app.config['FRAGMENT_CACHE_SIZE'] = int(os.getenv('FRAGMENT_CACHE_SIZE', '2048'))
+app.config['FRAGMENT_CACHE_TTL'] = int(os.getenv('FRAGMENT_CACHE_TTL', '600'))
+fragment_cache = init_template_cache(app)
 
 # Configuración de la base de datos
-# La cadena de conexión ahora se maneja dentro de get_db_connection
+# 'sqlserver' (pyodbc) o 'sqlite' (archivo local en modo WAL, sin servidor)
+app.config['DB_BACKEND'] = os.getenv('DB_BACKEND', 'sqlserver')
+app.config['SQLITE_DB_PATH'] = os.getenv(
+    'SQLITE_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'daily_questions.sqlite3')
+)
+
+# El controlador ODBC se resuelve una sola vez y las conexiones se reutilizan desde el pool
+CONNECTION_STRING_TEMPLATE = (
+    "DRIVER={{{driver}}};"
+    "SERVER=localhost;"
+    "DATABASE=DailyQuestions;"
+    "Trusted_Connection=yes;"
+    "TrustServerCertificate=yes;"
+    "Connection Timeout=30;"
+    "charset=UTF-8;"
+    "encoding=UTF-8;"
+    "MARS_Connection=yes;"
+    "ApplicationIntent=ReadWrite;"
+)
+
+# Medición de consultas por petición: encabezado Server-Timing y registro de consultas lentas
+app.config['DB_INSTRUMENTATION'] = os.getenv('DB_INSTRUMENTATION', '1') == '1'
+# Server-Timing revela tiempos y número de consultas; fuera de app.debug solo si se pide
+app.config['SERVER_TIMING'] = os.getenv('SERVER_TIMING', '0') == '1'
+app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', '200'))  # 0 desactiva el registro
+app.config['SLOW_QUERY_LOG'] = os.getenv('SLOW_QUERY_LOG')  # Archivo; por defecto stderr
+# Modo de desarrollo: sentencias por petición y aviso de formas repetidas (posibles N+1).
+# Se activa también con app.debug o app.testing.
+app.config['QUERY_DEBUG'] = os.getenv('QUERY_DEBUG', '0') == '1'
+app.config['N_PLUS_ONE_THRESHOLD'] = int(os.getenv('N_PLUS_ONE_THRESHOLD', '3'))
+db_instrumentation = init_db_instrumentation(app)
+
+# Métricas en formato Prometheus en /metrics (peticiones, consultas y conexiones)
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', '0') == '1'
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')  # /metrics exige 'Bearer <token>' fuera del modo debug
+app_metrics = init_metrics(app)
+if app_metrics and db_instrumentation:
+    db_instrumentation.listeners.append(app_metrics.record_query)
+
+# Las sentencias SQL de cada motor están en storage.py
+if app.config['DB_BACKEND'] == 'sqlite':
+    storage = SQLiteStorage(app.config['SQLITE_DB_PATH'])
+elif app.config['DB_BACKEND'] == 'sqlserver':
+    if pyodbc is not None:
+        # El pool propio reemplaza al pooling del administrador de controladores ODBC
+        pyodbc.pooling = False
+    storage = SQLServerStorage(CONNECTION_STRING_TEMPLATE)
+else:
+    raise ValueError(f"DB_BACKEND no válido: {app.config['DB_BACKEND']}")
+
+db_pool = storage.create_pool(
+    min_size=int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+    max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+    max_lifetime=int(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+    health_check_idle=int(os.getenv('DB_POOL_HEALTH_CHECK_IDLE', '30')),
+    checkout_timeout=int(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', '30')),
+    wrap_connection=db_instrumentation.wrap if db_instrumentation else None,
+    on_connect=app_metrics.record_connection if app_metrics else None
+)
+if app_metrics:
+    app_metrics.watch_pool(db_pool)
+
+def init_db_pool():
+    """Resuelve el controlador (ODBC o sqlite3) y precalienta el pool al iniciar la aplicación"""
+    try:
+        db_pool.prewarm()
+    except Exception as e:
+        logger.error(f"No se pudo precalentar el pool de conexiones: {str(e)}")
+
+def acquire_connection():
+    """Toma una conexión del pool registrando la espera en las métricas de la petición"""
+    start = time.perf_counter()
+    pooled = db_pool.acquire()
+    record_acquire(time.perf_counter() - start)
+    return pooled
+
+def get_request_connection():
+    """Devuelve la conexión compartida por todas las consultas de la petición actual"""
+    if 'db_conn' not in g:
+        g.db_conn = acquire_connection()
+    return g.db_conn.conn
+
+def on_commit(callback):
+    """Ejecuta callback cuando se confirme la unidad de trabajo de la petición.
+
+    Se usa para invalidar cachés sin que otra petición vuelva a cargar datos
+    anteriores al commit. Fuera de una petición se ejecuta de inmediato.
+    """
+    if has_request_context():
+        g.setdefault('db_on_commit', []).append(callback)
+    else:
+        callback()
+
+@app.after_request
+def commit_request_connection(response):
+    """Confirma la unidad de trabajo de la petición antes de enviar la respuesta"""
+    pooled = g.get('db_conn')
+    callbacks = g.pop('db_on_commit', [])
+    if pooled is not None and not g.get('db_rollback'):
+        try:
+            pooled.conn.commit()
+        except Exception as e:
+            logger.error(f"Error al confirmar la transacción de la petición: {str(e)}")
+            g.db_conn_broken = True
+            response = jsonify({'status': 'error', 'message': 'Error al guardar los cambios'})
+            response.status_code = 500
+            return response
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error en callback posterior al commit: {str(e)}")
+    return response
+
+@app.teardown_request
+def release_request_connection(exc):
+    """Devuelve la conexión de la petición al pool, deshaciendo lo no confirmado"""
+    pooled = g.pop('db_conn', None)
+    if pooled is None:
+        return
+    discard = g.pop('db_conn_broken', False)
+    try:
+        # Si after_request ya confirmó, el rollback no tiene efecto
+        pooled.conn.rollback()
+    except Exception as e:
+        logger.error(f"Error al deshacer la transacción de la petición: {str(e)}")
+        discard = True
+    db_pool.release(pooled, discard=discard)
 
 # Función para obtener la conexión a la base de datos
 def get_db_connection():
-    """Obtiene una conexión a la base de datos con manejo de contexto"""
+    """Obtiene una conexión con manejo de contexto.
+
+    Dentro de una petición HTTP se usa la conexión compartida de la petición y
+    la transacción se confirma una sola vez al final; fuera de una petición se
+    toma una conexión del pool que se confirma al salir del bloque.
+    """
     class ConnectionContext:
         def __init__(self):
+            self.pooled = None
             self.conn = None
+            self.shared = False
             
         def __enter__(self):
-            # Intentar con ODBC 18 primero, luego 17, luego el genérico
-            drivers = [
-                "ODBC Driver 18 for SQL Server",
-                "ODBC Driver 17 for SQL Server",
-                "SQL Server"  # Último recurso
-            ]
-            
-            last_error = None
-            
-            for driver in drivers:
-                try:
-                    conn_str = (
-                        f"DRIVER={{{driver}}};"
-                        "SERVER=localhost;"
-                        "DATABASE=DailyQuestions;"
-                        "Trusted_Connection=yes;"
-                        "TrustServerCertificate=yes;"
-                        "Connection Timeout=30;"
-                        "charset=UTF-8;"
-                        "encoding=UTF-8;"
-                        "MARS_Connection=yes;"
-                        "ApplicationIntent=ReadWrite;"
-                    )
-                    self.conn = pyodbc.connect(conn_str, autocommit=False)
-                    
-                    # Configurar el cursor para mejor manejo de errores
-                    cursor = self.conn.cursor()
-                    cursor.execute("SET ARITHABORT ON")
-                    cursor.execute("SET ANSI_WARNINGS ON")
-                    cursor.execute("SET ANSI_PADDING ON")
-                    cursor.execute("SET ANSI_NULLS ON")
-                    cursor.execute("SET CONCAT_NULL_YIELDS_NULL ON")
-                    cursor.execute("SET QUOTED_IDENTIFIER ON")
-                    cursor.execute("SET NOCOUNT ON")
-                    return self.conn
-                except Exception as e:
-                    last_error = e
-                    logger.error(f"No se pudo conectar con {driver}: {str(e)}")
-            
-            # Si llegamos aquí, todas las conexiones fallaron
-            error_msg = "No se pudo establecer conexión con ningún controlador ODBC disponible"
-            logger.error(error_msg)
-            if last_error:
-                logger.error(f"Último error: {str(last_error)}")
-            raise Exception(error_msg)
+            if has_request_context():
+                self.shared = True
+                self.conn = get_request_connection()
+                return self.conn
+            self.pooled = acquire_connection()
+            self.conn = self.pooled.conn
+            return self.conn
                 
         def __exit__(self, exc_type, exc_val, exc_tb):
-            if self.conn:
-                if exc_type is not None:  # Si hubo un error
+            if self.shared:
+                if exc_type is not None:  # Si hubo un error se descarta la unidad de trabajo
                     logger.error(f"Error en la conexión: {str(exc_val)}")
-                    self.conn.rollback()
-                else:
-                    self.conn.commit()
-                self.conn.close()
+                    try:
+                        self.conn.rollback()
+                    except Exception as e:
+                        logger.error(f"Error al deshacer la transacción: {str(e)}")
+                        g.db_conn_broken = True
+                self.conn = None
+                return
+            if self.pooled:
+                discard = False
+                try:
+                    if exc_type is not None:  # Si hubo un error
+                        logger.error(f"Error en la conexión: {str(exc_val)}")
+                        self.conn.rollback()
+                    else:
+                        self.conn.commit()
+                except Exception as e:
+                    # La conexión quedó en mal estado, no se devuelve al pool
+                    logger.error(f"Error al finalizar la transacción: {str(e)}")
+                    discard = True
+                db_pool.release(self.pooled, discard=discard)
+                self.pooled = None
+                self.conn = None
     
     return ConnectionContext()
 
+# Caché de usuarios para el user_loader de Flask-Login. make_admin.py la invalida
+# en todos los procesos tocando USER_CACHE_STAMP.
+USER_CACHE_STAMP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_cache.stamp')
+user_cache = TTLCache(
+    maxsize=int(os.getenv('USER_CACHE_SIZE', '1024')),
+    ttl=int(os.getenv('USER_CACHE_TTL', '300')),
+    stamp_path=USER_CACHE_STAMP
+)
+
+# Contadores de versión de las cachés, compartidos entre workers
+if app.config['SHARED_STATE_BACKEND'] == 'sqlite':
+    version_store = SQLiteVersionStore(app.config['SHARED_STATE_PATH'])
+else:
+    version_store = LocalVersionStore()
+
+# Opciones decodificadas por (question_id, version): los listados no vuelven a procesar el texto
+options_cache = TTLCache(
+    maxsize=int(os.getenv('OPTIONS_CACHE_SIZE', '10000')),
+    ttl=int(os.getenv('OPTIONS_CACHE_TTL', '3600'))
+)
+
+def forget_question_options(question_id):
+    """Descarta las opciones en caché de una pregunta eliminada, en todas sus versiones"""
+    options_cache.invalidate_matching(lambda key: key[0] == question_id)
+
+# Catálogo de preguntas por usuario (lista completa e ids para validar), con versión por usuario
+catalog_cache = VersionedCache(
+    maxsize=int(os.getenv('QUESTION_CATALOG_CACHE_SIZE', '1024')),
+    ttl=int(os.getenv('QUESTION_CATALOG_CACHE_TTL', '600')),
+    store=version_store,
+    namespace='catalog'
+)
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -128,7 +322,9 @@ def unauthorized():
     # Para peticiones normales de navegador, redirigir al login
     try:
         # Guardar la URL actual para redirigir después del login
-        if request.endpoint != 'login' and not request.path.startswith(('/static/', '/favicon.ico')):
+        # Solo se escribe si cambia, para no reescribir la sesión en cada redirección
+        if (request.endpoint != 'login' and not request.path.startswith(('/static/', '/favicon.ico'))
+                and session.get('next_url') != request.url):
             session['next_url'] = request.url
     except Exception as e:
         print(f"Error al guardar la URL de redirección: {e}")
@@ -136,6 +332,15 @@ def unauthorized():
     # Redirigir a la página de login
     return redirect(url_for('login'))
 
+def day_bounds(start_day, end_day=None):
+    """Devuelve el intervalo semiabierto [inicio, fin) que cubre los días indicados.
+
+    Filtrar con r.date >= inicio AND r.date < fin permite usar los índices
+    sobre la columna, a diferencia de CONVERT(DATE, r.date) = ?.
+    """
+    end_day = end_day or start_day
+    return start_day, end_day + timedelta(days=1)
+
 # Modelos
 class User(UserMixin):
     def __init__(self, id, username, password):
@@ -146,9 +351,7 @@ class User(UserMixin):
     @classmethod
     def get(cls, user_id):
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT id, username, password FROM [user] WHERE id = ?', (user_id,))
-            user = cursor.fetchone()
+            user = storage.get_user(conn.cursor(), user_id)
             if user:
                 return cls(user[0], user[1], user[2])
         return None
@@ -156,15 +359,13 @@ class User(UserMixin):
     @classmethod
     def get_by_username(cls, username):
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT id, username, password FROM [user] WHERE username = ?', (username,))
-            user_data = cursor.fetchone()
+            user_data = storage.get_user_by_username(conn.cursor(), username)
             if user_data:
                 return cls(user_data[0], user_data[1], user_data[2])
         return None
 
 class Question:
-    def __init__(self, id, text, type, options, active, created_at, assigned_user_id=None, descripcion=None, is_required=0, categoria='General'):
+    def __init__(self, id, text, type, options, active, created_at, assigned_user_id=None, descripcion=None, is_required=0, categoria='General', version=1):
         self.id = id
         self.text = text
         self.type = type
@@ -175,47 +376,160 @@ class Question:
         self.descripcion = descripcion
         self.is_required = is_required
         self.categoria = categoria
+        self.version = version
+
+    COLUMNS = QUESTION_COLUMNS
+    TYPES = ('text', 'select', 'checkbox', 'radio')
 
     @classmethod
     def get_all(cls):
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT id, text, type, options, active, created_at, assigned_user_id, descripcion, is_required, categoria FROM question')
-            questions = [cls(*row) for row in cursor.fetchall()]
-            return questions
+            return [cls.from_row(row) for row in storage.all_questions(conn.cursor())]
 
     @classmethod
-    def get_by_user(cls, user_id):
+    def get_by_user(cls, user_id, cursor=None):
+        if cursor is not None:
+            return [cls.from_row(row) for row in storage.questions_by_user(cursor, user_id)]
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'SELECT id, text, type, options, active, created_at, assigned_user_id, descripcion, is_required, categoria '
-                'FROM question WHERE assigned_user_id = ?',
-                (user_id,)
-            )
-            rows = cursor.fetchall()
-            questions = [cls(*row) for row in rows]
-            return questions
+            return cls.get_by_user(user_id, conn.cursor())
+
+    @staticmethod
+    def parse_options(question_id, version, options):
+        """Devuelve las opciones decodificadas, usando la caché por (id, version) de la pregunta"""
+        key = (question_id, version)
+        parsed = options_cache.get(key)
+        if parsed is None:
+            # Tupla para que el valor compartido entre peticiones no se pueda modificar
+            parsed = tuple(question_options.parse_stored(options))
+            options_cache.set(key, parsed)
+        return parsed
+
+    @classmethod
+    def from_row(cls, row):
+        """Crea la pregunta a partir de una fila con las columnas de COLUMNS, con opciones ya procesadas"""
+        version = row[10] if len(row) > 10 else 1
+        return cls(
+            id=row[0],
+            text=row[1],
+            type=row[2],
+            options=cls.parse_options(row[0], version, row[3]),
+            active=row[4],
+            created_at=row[5],
+            assigned_user_id=row[6],
+            descripcion=row[7],
+            is_required=row[8] if len(row) > 8 else 0,
+            categoria=row[9] if len(row) > 9 else 'General',
+            version=version
+        )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'text': self.text,
+            'type': self.type,
+            'options': list(self.options or []),
+            'active': bool(self.active),
+            'created_at': self.created_at.isoformat() if hasattr(self.created_at, 'isoformat') else self.created_at,
+            'descripcion': self.descripcion,
+            'is_required': self.is_required,
+            'categoria': self.categoria
+        }
 
     @classmethod
     def create(cls, text, type, options=None, assigned_user_id=None, descripcion=None, is_required=0, categoria='General', active=1):
         try:
             logger.info(f"Creando pregunta: text={text}, type={type}, options={options}")
             with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    'INSERT INTO question (text, type, options, assigned_user_id, descripcion, is_required, categoria, active, created_at) OUTPUT INSERTED.id VALUES (?, ?, ?, ?, ?, ?, ?, ?, GETDATE())',
-                    (text, type, options, assigned_user_id, descripcion, is_required, categoria, active)
+                question_id = storage.create_question(
+                    conn.cursor(), text, type, options, assigned_user_id,
+                    descripcion, is_required, categoria, active
                 )
-                # Obtener el ID de la pregunta insertada
-                question_id = cursor.fetchone()[0]
-                conn.commit()
+                if assigned_user_id:
+                    invalidate_question_catalog(assigned_user_id)
                 logger.info(f"Pregunta creada con ID: {question_id}")
                 return question_id
         except Exception as e:
             logger.error(f"Error al crear pregunta: {str(e)}")
             raise
 
+class QuestionCatalog:
+    """Preguntas de un usuario ya cargadas: la lista completa ordenada por id y los ids para validar"""
+
+    def __init__(self, questions):
+        self.questions = tuple(sorted(questions, key=lambda q: q.id))
+        self.ids = frozenset(q.id for q in self.questions)
+        self.required_ids = frozenset(q.id for q in self.questions if q.is_required and q.active)
+        # Preguntas por categoría; se recalcula con el catálogo en cada escritura
+        self.categories = Counter(q.categoria for q in self.questions if q.categoria)
+
+    def category_names(self):
+        """Categorías para filtros y formularios: 'Todas', luego 'General' y el resto en orden alfabético"""
+        categories = sorted(cat for cat in self.categories if cat not in ('Todas', 'General'))
+        # 'General' se muestra si tiene preguntas o si no hay otras categorías
+        if 'General' in self.categories or not categories:
+            categories.insert(0, 'General')
+        categories.insert(0, 'Todas')
+        return categories
+
+    @staticmethod
+    def _matches(question, filters):
+        if filters.get('categoria') and question.categoria != filters['categoria']:
+            return False
+        if filters.get('active') is not None and bool(question.active) != filters['active']:
+            return False
+        if filters.get('type') and question.type != filters['type']:
+            return False
+        return True
+
+    def counts(self, filters=None):
+        """Totales del usuario: total, activas y las que cumplen los filtros"""
+        filters = filters or {}
+        return {
+            'total': len(self.questions),
+            'activas': sum(1 for q in self.questions if q.active),
+            'filtradas': sum(1 for q in self.questions if self._matches(q, filters))
+        }
+
+    def page(self, filters=None, limit=50, after_id=None):
+        """Página de preguntas de la más reciente a la más antigua.
+
+        Devuelve (preguntas, id_para_la_siguiente_pagina), con el mismo cursor
+        por id que usaba la paginación en SQL.
+        """
+        filters = filters or {}
+        questions = []
+        for question in reversed(self.questions):
+            if after_id is not None and question.id >= after_id:
+                continue
+            if self._matches(question, filters):
+                questions.append(question)
+                if len(questions) > limit:
+                    break
+        next_id = questions[limit - 1].id if len(questions) > limit else None
+        return questions[:limit], next_id
+
+def get_question_catalog(user_id, cursor=None):
+    """Catálogo de preguntas del usuario, desde la caché o cargado de la base de datos"""
+    user_id = int(user_id)
+    return catalog_cache.get_or_load(user_id, lambda: QuestionCatalog(Question.get_by_user(user_id, cursor)))
+
+def invalidate_question_catalog(user_id):
+    """Avanza la versión del catálogo del usuario y repite el cambio al confirmar la transacción"""
+    user_id = int(user_id)
+    catalog_cache.bump(user_id)
+    # Una lectura concurrente antes del commit vería las filas anteriores
+    on_commit(lambda: catalog_cache.bump(user_id))
+    record_user_write(user_id)
+
+def user_write_version(user_id):
+    """(versión, momento) de la última escritura del usuario: respuestas o cambios en sus preguntas"""
+    return version_store.info(f"writes:{int(user_id)}")
+
+def record_user_write(user_id):
+    """Avanza la versión de escritura del usuario cuando se confirme la transacción"""
+    user_id = int(user_id)
+    on_commit(lambda: version_store.incr(f"writes:{user_id}"))
+
 class Response:
     def __init__(self, id, question_id, response, date, created_at):
         self.id = id
@@ -227,22 +541,236 @@ class Response:
     @classmethod
     def create(cls, question_id, response_text, date):
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'INSERT INTO response (question_id, response, date) VALUES (?, ?, ?)',
-                (question_id, response_text, date)
-            )
-            conn.commit()
+            storage.insert_response(conn.cursor(), question_id, response_text, date)
+
+    @staticmethod
+    def bulk_insert(cursor, rows):
+        """Inserta varias respuestas (question_id, response, date) en un solo viaje al servidor"""
+        return storage.bulk_insert_responses(cursor, rows)
+
+    @staticmethod
+    def upsert_day(cursor, user_id, date_obj, answers):
+        """Sincroniza las respuestas de un usuario en una fecha.
+
+        answers es un dict {question_id: respuesta}. Solo se insertan las
+        respuestas nuevas, se actualizan las que cambiaron y se eliminan las que
+        ya no se enviaron (MERGE en SQL Server). Devuelve un dict con los
+        conteos de cada operación.
+        """
+        day_start, next_day = day_bounds(date_obj)
+        return storage.upsert_day(cursor, user_id, day_start, next_day, date_obj, answers)
+
+class DailySummary:
+    """Proyección por usuario y día mantenida por submit_responses (tabla user_daily_summary)"""
+
+    @staticmethod
+    def record_day(cursor, user_id, date_obj, answered_count, required_answered, required_total):
+        """Actualiza el resumen del día en la transacción en curso; sin respuestas se elimina la fila"""
+        is_complete = 1 if answered_count > 0 and required_answered >= required_total else 0
+        storage.record_day(cursor, user_id, date_obj, answered_count, required_answered, required_total, is_complete)
+
+    @staticmethod
+    def get_totals(cursor, user_id):
+        """Devuelve (dias_respondidos, total_respuestas, total_preguntas) leyendo solo el resumen"""
+        return storage.summary_totals(cursor, user_id)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.get(int(user_id))
+    user_id = int(user_id)
+    user = user_cache.get(user_id)
+    if user is None:
+        user = User.get(user_id)
+        if user:
+            user_cache.set(user_id, user)
+    return user
+
+# Filas leídas por lote al transmitir resultados grandes
+STREAM_FETCH_BATCH = 500
+
+def parse_date_arg(name, default=None):
+    """Lee un parámetro de fecha YYYY-MM-DD de la URL; lanza ValueError si el formato es inválido"""
+    value = request.args.get(name, '').strip()
+    if not value:
+        return default
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def format_date(value):
+    return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else value
+
+def encode_cursor(position):
+    """Codifica la posición de la última fila entregada como un token opaco para la URL"""
+    payload = json.dumps(position, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Devuelve el dict de posición codificado en el token; lanza ValueError si no es válido"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Cursor de paginación inválido')
+    if not isinstance(position, dict):
+        raise ValueError('Cursor de paginación inválido')
+    return position
+
+def stream_query(query, row_to_item, fmt='json'):
+    """Ejecuta la consulta y transmite el resultado como arreglo JSON o NDJSON.
+
+    query(cursor) ejecuta la consulta (un método de storage) y devuelve el
+    cursor. Las filas se leen con fetchmany y se serializan por lotes, así la
+    memoria no crece con el tamaño del rango consultado. Usa una conexión
+    propia del pool porque la respuesta se genera después de que termina la vista.
+    La conexión se toma recién al empezar a leer el cuerpo: si el cuerpo nunca
+    se itera (HEAD, 304 o una respuesta reemplazada) no queda ninguna tomada.
+    Las consultas del cuerpo se suman a las estadísticas de la petición con
+    bound_iter, aunque se ejecutan después de que Server-Timing se envió.
+    """
+    def generate():
+        pooled = None
+        try:
+            pooled = acquire_connection()
+            cursor = query(pooled.conn.cursor())
+            if fmt == 'json':
+                yield '['
+            first = True
+            while True:
+                rows = cursor.fetchmany(STREAM_FETCH_BATCH)
+                if not rows:
+                    break
+                chunk = []
+                for row in rows:
+                    item = json.dumps(row_to_item(row), ensure_ascii=False, default=str)
+                    if fmt == 'ndjson':
+                        chunk.append(item + '\n')
+                    else:
+                        chunk.append(item if first else ',' + item)
+                    first = False
+                yield ''.join(chunk)
+            if fmt == 'json':
+                yield ']'
+        except Exception as e:
+            logger.error(f"Error al transmitir resultados: {str(e)}")
+            # En JSON el arreglo queda sin cerrar para que el cliente detecte el error
+            if fmt == 'ndjson':
+                yield json.dumps({'error': 'Error al leer los resultados'}) + '\n'
+        finally:
+            if pooled is not None:
+                try:
+                    pooled.conn.rollback()
+                    db_pool.release(pooled)
+                except Exception as e:
+                    logger.error(f"Error al liberar la conexión del stream: {str(e)}")
+                    db_pool.release(pooled, discard=True)
+
+    stats = current_stats()
+    if stats is not None:
+        stats.streamed = True
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return app.response_class(bound_iter(stats, generate()), mimetype=mimetype)
+
+# Tipo MIME con el que el cliente puede pedir el formato columnar sin ?format=
+COLUMNAR_MIMETYPE = 'application/vnd.dailyquestions.columnar+json'
+
+def requested_format(allowed, default='json'):
+    """Formato pedido con ?format= o, si no se indica, con el encabezado Accept.
+
+    Devuelve None si el formato no está entre los permitidos.
+    """
+    fmt = request.args.get('format')
+    if fmt is None:
+        # Solo si el cliente lo nombra explícitamente; */* no selecciona el formato columnar
+        explicit = any(mimetype == COLUMNAR_MIMETYPE and quality > 0 for mimetype, quality in request.accept_mimetypes)
+        fmt = 'columnar' if explicit and 'columnar' in allowed else default
+    return fmt if fmt in allowed else None
+
+def columnar_query(query, dates=None):
+    """Ejecuta la consulta y devuelve el resultado en formato columnar.
+
+    query(cursor) ejecuta la consulta y devuelve el cursor; debe devolver (question_id, text, type, response_id, response, date).
+    El texto y el tipo de cada pregunta se envían una sola vez, las fechas se
+    internan en una lista y cada respuesta es una posición en arreglos paralelos
+    de índices. Las filas sin respuesta (LEFT JOIN) solo agregan la pregunta.
+    """
+    questions = {'id': [], 'text': [], 'type': []}
+    responses = {'id': [], 'question': [], 'date': [], 'value': []}
+    question_index = {}
+    date_list = [format_date(day) for day in dates or []]
+    date_index = {day: i for i, day in enumerate(date_list)}
+
+    with get_db_connection() as conn:
+        cursor = query(conn.cursor())
+        while True:
+            rows = cursor.fetchmany(STREAM_FETCH_BATCH)
+            if not rows:
+                break
+            for question_id, text, type, response_id, response, date in rows:
+                qi = question_index.get(question_id)
+                if qi is None:
+                    qi = question_index[question_id] = len(questions['id'])
+                    questions['id'].append(question_id)
+                    questions['text'].append(text)
+                    questions['type'].append(type)
+                if response_id is None:
+                    continue
+                day = format_date(date.date() if isinstance(date, datetime) else date)
+                di = date_index.get(day)
+                if di is None:
+                    di = date_index[day] = len(date_list)
+                    date_list.append(day)
+                responses['id'].append(response_id)
+                responses['question'].append(qi)
+                responses['date'].append(di)
+                responses['value'].append(response)
+
+    return jsonify({
+        'format': 'columnar',
+        'questions': questions,
+        'dates': date_list,
+        'responses': responses
+    })
+
+def conditional_get(view):
+    """GET condicional con ETag/Last-Modified a partir de la versión de escritura del usuario.
+
+    Si el cliente ya tiene la versión actual responde 304 sin ejecutar la
+    vista ni consultar la base de datos. La fecha de hoy forma parte de la
+    versión porque el contenido de estas vistas cambia al empezar el día.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version, updated_at = user_write_version(current_user.id)
+        today = datetime.now().date()
+        last_modified = max(updated_at, datetime.combine(today, datetime.min.time()).timestamp())
+        # La URL y el Accept distinguen las representaciones del mismo recurso
+        etag = hashlib.sha1(
+            f"{request.endpoint}|{current_user.id}|{version}|{updated_at}|{today}|"
+            f"{request.full_path}|{request.headers.get('Accept', '')}".encode('utf-8')
+        ).hexdigest()[:20]
+        last_modified = datetime.fromtimestamp(int(last_modified), timezone.utc)
+
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)
+        else:
+            not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+        if not_modified:
+            response = app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_modified
+        # Revalidar siempre: la respuesta es privada y depende de la sesión
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.update(('Cookie', 'Accept'))
+        return response
+    return wrapper
 
 # Rutas
 @app.route('/')
 @login_required
 def index():
-    questions = Question.get_by_user(current_user.id)
+    questions = get_question_catalog(current_user.id).questions
     return render_template('index.html', questions=questions, date=datetime.now())
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -252,7 +780,8 @@ def login():
         return redirect(url_for('index'))
     
     # Obtener la URL de redirección de los parámetros de la solicitud o de la sesión
-    next_url = request.args.get('next') or session.pop('next_url', None)
+    # pop() marca la sesión como modificada aunque la clave no exista
+    next_url = request.args.get('next') or (session.pop('next_url') if 'next_url' in session else None)
     
     if request.method == 'POST':
         username = request.form.get('username', '').strip()
@@ -267,9 +796,7 @@ def login():
         try:
             # Obtener el usuario
             with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT id, username, password FROM [user] WHERE username = ?', (username,))
-                db_user = cursor.fetchone()
+                db_user = storage.get_user_by_username(conn.cursor(), username)
             
             if db_user:
                 user_id, db_username, db_password = db_user
@@ -309,18 +836,13 @@ def register():
                 cursor = conn.cursor()
                 
                 # Verificar si el usuario ya existe
-                cursor.execute('SELECT id FROM [user] WHERE username = ?', (username,))
-                if cursor.fetchone():
+                if storage.username_exists(cursor, username):
                     flash('El nombre de usuario ya existe')
                     return redirect(url_for('register'))
                 
                 # Crear nuevo usuario
                 hashed_password = generate_password_hash(password)
-                cursor.execute(
-                    'INSERT INTO [user] (username, password) VALUES (?, ?)',
-                    (username, hashed_password)
-                )
-                conn.commit()
+                storage.create_user(cursor, username, hashed_password)
             
             flash('¡Registro exitoso! Por favor inicia sesión.')
             return redirect(url_for('login'))
@@ -337,6 +859,144 @@ def logout():
     logout_user()
     return redirect(url_for('login'))
 
+# Tamaño de página del listado de preguntas del panel de administración
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 200
+
+def question_filters_from_args():
+    """Lee los filtros del listado de preguntas (categoria, active, type) de la URL"""
+    categoria = request.args.get('categoria', '').strip()
+    active = request.args.get('active', '').strip().lower()
+    type = request.args.get('type', '').strip()
+    return {
+        'categoria': categoria if categoria and categoria != 'Todas' else None,
+        'active': {'1': True, 'true': True, '0': False, 'false': False}.get(active),
+        'type': type if type in Question.TYPES else None
+    }
+
+# Conexiones extra que una carga del panel puede tomar del pool, además de la de la petición
+ADMIN_FANOUT_CONNECTIONS = max(1, db_pool.max_size // 4)
+
+# Hilos para las lecturas del panel que van en conexiones propias. Cada tarea lleva su conexión
+# ya tomada del pool, así que con un hilo por conexión posible ninguna espera en la cola
+admin_executor = ThreadPoolExecutor(max_workers=db_pool.max_size, thread_name_prefix='admin-query')
+
+def run_with_timeout(conn, query, timeout):
+    """Ejecuta query(cursor) en conn con un tiempo máximo por consulta"""
+    conn.timeout = timeout
+    try:
+        return query(conn.cursor())
+    finally:
+        conn.timeout = 0
+
+def run_isolated(pooled, query, timeout):
+    """Ejecuta query en una conexión ya tomada del pool y la devuelve al terminar"""
+    discard = False
+    try:
+        return run_with_timeout(pooled.conn, query, timeout)
+    finally:
+        try:
+            # Solo lecturas: se cierra la transacción antes de devolver la conexión
+            pooled.conn.rollback()
+        except Exception as e:
+            logger.error(f"Error al finalizar la transacción: {str(e)}")
+            discard = True
+        db_pool.release(pooled, discard=discard)
+
+def try_acquire_connections(count):
+    """Toma hasta count conexiones del pool sin esperar; si está ocupado devuelve menos"""
+    taken = []
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            pooled = db_pool.acquire(block=False)
+        except Exception as e:
+            logger.error(f"Error al abrir una conexión para el panel: {str(e)}")
+            break
+        finally:
+            record_acquire(time.perf_counter() - start)
+        if pooled is None:
+            break
+        taken.append(pooled)
+    return taken
+
+def fan_out(queries, timeout):
+    """Ejecuta en paralelo consultas independientes (nombre -> función(cursor)).
+
+    Las conexiones extra se toman del pool sin esperar, como máximo
+    ADMIN_FANOUT_CONNECTIONS; las consultas que no reciben una se ejecutan
+    una tras otra en la conexión de la petición, así un pool ocupado reduce
+    el paralelismo en lugar de provocar esperas. Devuelve nombre -> resultado;
+    si una consulta falla o no termina dentro de timeout segundos, su valor
+    es la excepción y las demás no se ven afectadas.
+    """
+    deadline = time.monotonic() + timeout
+    names = list(queries)
+    results = {}
+    futures = {}
+    if not names:
+        return results
+    # La conexión de la petición se toma primero; las extra solo si quedan libres
+    with get_db_connection() as conn:
+        # Al menos una consulta queda para la conexión de la petición
+        connections = try_acquire_connections(min(len(names) - 1, ADMIN_FANOUT_CONNECTIONS))
+        # Las consultas de los hilos se suman a las métricas de la petición que las lanzó
+        task = bound(current_stats(), run_isolated)
+        for pooled in connections:
+            name = names.pop()
+            futures[name] = (admin_executor.submit(task, pooled, queries[name], timeout), pooled)
+        for name in names:
+            try:
+                results[name] = run_with_timeout(conn, queries[name], timeout)
+            except Exception as e:
+                results[name] = e
+    for name, (future, pooled) in futures.items():
+        try:
+            results[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except Exception as e:
+            if future.cancel():
+                # No llegó a ejecutarse: la conexión sigue en manos de esta petición
+                db_pool.release(pooled)
+            results[name] = e
+    return results
+
+def admin_dashboard_queries(user_id):
+    """Lecturas del panel de administración: usuario, catálogo, lista de usuarios y respuestas de hoy"""
+    day_start, day_end = day_bounds(datetime.now().date())
+
+    def user_list(cursor):
+        return [{'id': row[0], 'username': row[1]} for row in storage.list_users(cursor)]
+
+    queries = {
+        'user': lambda cursor: storage.get_user(cursor, user_id),
+        'catalog': lambda cursor: get_question_catalog(user_id, cursor),
+        'users': user_list,
+        'respuestas_hoy': lambda cursor: storage.count_responses(cursor, day_start, day_end)
+    }
+    # Lo que ya está en caché no necesita conexión
+    results = {}
+    cached_user = user_cache.get(int(user_id))
+    if cached_user is not None:
+        results['user'] = cached_user
+    cached_catalog = catalog_cache.peek(int(user_id))
+    if cached_catalog is not None:
+        results['catalog'] = cached_catalog
+    queries = {name: query for name, query in queries.items() if name not in results}
+
+    if app.config['ADMIN_FANOUT']:
+        results.update(fan_out(queries, app.config['ADMIN_QUERY_TIMEOUT']))
+        return results
+
+    # Modo secuencial: todas las consultas en la conexión de la petición
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for name, query in queries.items():
+            try:
+                results[name] = query(cursor)
+            except Exception as e:
+                results[name] = e
+    return results
+
 @app.route('/admin')
 @login_required
 def admin():
@@ -349,191 +1009,60 @@ def admin():
     
     questions = []
     users = []
+    next_cursor = None
     
+    catalog_version = None
     try:
-        connection_context = get_db_connection()
+        # La versión se lee antes de cargar el catálogo; es la clave de los fragmentos en caché
+        loaded_version = catalog_cache.version(current_user.id)
+        results = admin_dashboard_queries(current_user.id)
         
-        with connection_context as conn:
-            cursor = conn.cursor()
-            
-            # Verificar si el usuario existe
-            try:
-                user_query = 'SELECT id, username FROM [user] WHERE id = ?'
-                cursor.execute(user_query, (current_user.id,))
-                user_data = cursor.fetchone()
-                
-                if not user_data:
-                    logger.error(f"Usuario {current_user.id} no encontrado en la base de datos")
-                    flash('Error: Usuario no encontrado', 'error')
-                    return redirect(url_for('index'))
-                    
-                user_id, username = user_data
-                    
-            except Exception as e:
-                logger.error(f"Error en verificación de usuario: {str(e)}", exc_info=True)
-                flash('Error al verificar permisos de usuario', 'error')
-                return redirect(url_for('index'))
-            
-            # Verificar si hay datos en la tabla
-            try:
-                cursor.execute("SELECT COUNT(*) FROM question")
-                count_result = cursor.fetchone()
-                record_count = count_result[0] if count_result else 0
-                
-                if record_count > 0:
-                    # Consulta completa para obtener preguntas
-                    basic_query = """
-                        SELECT 
-                            [id], 
-                            [text], 
-                            [type], 
-                            [options], 
-                            [active], 
-                            [created_at],
-                            [assigned_user_id],
-                            [descripcion],
-                            [is_required],
-                            [categoria]
-                        FROM [question] q
-                        ORDER BY q.[created_at] DESC
-                    """
-                        
-                    # Ejecutar la consulta básica
-                    cursor.execute(basic_query)
-                    
-                    # Procesar resultados
-                    questions_data = cursor.fetchall()
-                    
-                    # Mapear los resultados a objetos Question
-                    questions = []
-                    for row in questions_data:
-                        try:
-                            # Procesar opciones
-                            options = row[3]  # Índice 3 es donde está options en la consulta
-                            if options and isinstance(options, str):
-                                # Si las opciones están en formato de lista de Python, limpiarlas
-                                if options.startswith('[') and options.endswith(']'):
-                                    try:
-                                        # Intentar evaluar como lista de Python
-                                        options_list = eval(options)
-                                        if isinstance(options_list, list):
-                                            options = [str(opt).strip() for opt in options_list if opt]
-                                        else:
-                                            options = []
-                                    except:
-                                        # Si falla, tratar como cadena simple
-                                        options = [opt.strip() for opt in options.split(',') if opt.strip()]
-                                else:
-                                    # Si es una cadena simple, dividir por comas
-                                    options = [opt.strip() for opt in options.split(',') if opt.strip()]
-                            else:
-                                options = []
-                            
-                            question = Question(
-                                id=row[0],
-                                text=row[1],
-                                type=row[2],
-                                options=options,  # Ahora es una lista limpia
-                                active=row[4],
-                                created_at=row[5],
-                                assigned_user_id=row[6],
-                                descripcion=row[7],
-                                is_required=row[8] if len(row) > 8 else 0,
-                                categoria=row[9] if len(row) > 9 else 'General'
-                            )
-                            questions.append(question)
-                        except Exception as e:
-                            logger.error(f"Error al procesar pregunta {row[0] if row else 'N/A'}: {str(e)}", exc_info=True)
-                            continue
-                    
-                    # Actualizar estadísticas
-                    stats['total_preguntas'] = len(questions)
-                    stats['preguntas_activas'] = sum(1 for q in questions if q.active)
-                    
-            except Exception as e:
-                logger.error(f"Error al ejecutar consulta básica: {str(e)}", exc_info=True)
-                # Si falla, intentar con una consulta más simple
-                try:
-                    cursor.execute("SELECT id, text, active FROM question")
-                    simple_questions = cursor.fetchall()
-                    questions = []
-                    for q in simple_questions:
-                        questions.append({
-                            'id': q[0],
-                            'text': q[1],
-                            'active': q[2]
-                        })
-                    stats['total_preguntas'] = len(questions)
-                    stats['preguntas_activas'] = sum(1 for q in questions if q['active'])
-                except Exception as simple_e:
-                    logger.error(f"Error en consulta simple: {str(simple_e)}")
-                    questions = []
-                    stats['total_preguntas'] = 0
-                    stats['preguntas_activas'] = 0
-                    questions = [] # Asegurarse de que questions esté definido en caso de error
-                    
-            # 4. Obtener lista de usuarios
-            logger.info("=== OBTENIENDO LISTA DE USUARIOS ===")
-            try:
-                cursor.execute('SELECT id, username FROM [user] ORDER BY username')
-                users = [{'id': row[0], 'username': row[1]} for row in cursor.fetchall()]
-            except Exception as e:
-                logger.error(f"Error obteniendo usuarios: {str(e)}")
-                users = []
-
-            # 5. Obtener lista de categorías únicas
-            logger.info("=== OBTENIENDO LISTA DE CATEGORIAS ===")
-            try:
-                # Usar parámetros para evitar problemas de inyección SQL
-                cursor.execute("SELECT DISTINCT categoria FROM question WHERE categoria IS NOT NULL AND categoria <> '' ORDER BY categoria")
-                categories_from_db = [row[0] for row in cursor.fetchall() if row[0]]  # Filtrar valores None o vacíos
-                
-                # Depuración
-                logger.info(f"Categorías encontradas en BD: {categories_from_db}")
-                
-                # Asegurarse de que 'General' esté siempre si no hay otras y ordenarlas
-                categories = [cat for cat in categories_from_db if cat and cat != 'Todas' and cat != 'General']
-                categories = list(set(categories))  # Eliminar duplicados por si acaso
-                categories.sort()  # Ordenar alfabéticamente las categorías
-                
-                # Asegurarse de que 'General' esté presente
-                if 'General' in categories_from_db or not categories:
-                    if 'General' not in categories:
-                        categories.insert(0, 'General')
-                
-                # Asegurarse de que 'Todas' esté al inicio
-                if 'Todas' not in categories:
-                    categories.insert(0, 'Todas')
-                
-                logger.info(f"Categorías finales: {categories}")
-                
-            except Exception as e:
-                logger.error(f"Error obteniendo categorías: {str(e)}", exc_info=True)
-                categories = ['Todas', 'General']  # Default en caso de error o tabla vacía
-
-            # 6. Contar respuestas de hoy (simplificado)
-            logger.info("=== CONTEO DE RESPUESTAS HOY ===")
-            try:
-                today_str = datetime.now().strftime('%Y-%m-%d')
-                
-                cursor.execute('SELECT COUNT(*) FROM response WHERE CONVERT(date, date) = ?', (today_str,))
-                count_result = cursor.fetchone()
-                
-                if count_result and count_result[0] is not None:
-                    stats['respuestas_hoy'] = int(count_result[0])
-                else:
-                    stats['respuestas_hoy'] = 0
-                                    
-            except Exception as e:
-                logger.error(f"Error en conteo de respuestas: {str(e)}")
-                stats['respuestas_hoy'] = 0
-            
+        # Verificar si el usuario existe
+        user_data = results['user']
+        if isinstance(user_data, Exception):
+            # Flask-Login ya cargó al usuario de la sesión; el panel se muestra sin esta verificación
+            logger.error(f"Error en verificación de usuario: {str(user_data)}")
+        elif not user_data:
+            logger.error(f"Usuario {current_user.id} no encontrado en la base de datos")
+            flash('Error: Usuario no encontrado', 'error')
+            return redirect(url_for('index'))
+        
+        # Primera página de preguntas del usuario; las siguientes se piden a /api/admin/questions
+        catalog = results['catalog']
+        if isinstance(catalog, Exception):
+            logger.error(f"Error al obtener preguntas: {str(catalog)}")
+            categories = ['Todas', 'General']  # Default en caso de error o tabla vacía
+        else:
+            catalog_version = loaded_version
+            filters = question_filters_from_args()
+            counts = catalog.counts(filters)
+            questions, next_id = catalog.page(filters, ADMIN_PAGE_SIZE)
+            if next_id is not None:
+                next_cursor = encode_cursor({'i': next_id})
             
-            return render_template('admin.html', 
-                                stats=stats, 
-                                questions=questions,
-                                users=users,
-                                categories=categories) # Pasar la lista de categorías
+            # Actualizar estadísticas
+            stats['total_preguntas'] = counts['total']
+            stats['preguntas_activas'] = counts['activas']
+            stats['preguntas_filtradas'] = counts['filtradas']
+            categories = catalog.category_names()
+        
+        if isinstance(results['users'], Exception):
+            logger.error(f"Error obteniendo usuarios: {str(results['users'])}")
+        else:
+            users = results['users']
+        
+        if isinstance(results['respuestas_hoy'], Exception):
+            logger.error(f"Error en conteo de respuestas: {str(results['respuestas_hoy'])}")
+        else:
+            stats['respuestas_hoy'] = results['respuestas_hoy']
+        
+        return render_template('admin.html', 
+                            stats=stats, 
+                            questions=questions,
+                            next_cursor=next_cursor,
+                            users=users,
+                            categories=categories, # Pasar la lista de categorías
+                            catalog_version=catalog_version)
             
     except Exception as e:
         logger.error("\n=== ERROR GENERAL EN LA RUTA ADMIN ===")
@@ -577,6 +1106,49 @@ def admin():
     finally:
         logger.info("=== FIN DE LA RUTA ADMIN ===\n")
 
+@app.route('/api/admin/questions')
+@login_required
+def get_admin_questions():
+    """Listado paginado y filtrado de las preguntas del usuario para el panel de administración"""
+    limit = request.args.get('limit', ADMIN_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, ADMIN_MAX_PAGE_SIZE))
+    
+    after_id = None
+    cursor_token = request.args.get('cursor', '').strip()
+    if cursor_token:
+        try:
+            after_id = int(decode_cursor(cursor_token)['i'])
+        except (ValueError, KeyError, TypeError):
+            return jsonify({'status': 'error', 'message': 'Cursor de paginación inválido'}), 400
+    
+    filters = question_filters_from_args()
+    try:
+        catalog = get_question_catalog(current_user.id)
+        # Los totales solo se calculan en la primera página
+        counts = catalog.counts(filters) if after_id is None else None
+        questions, next_id = catalog.page(filters, limit, after_id)
+    except Exception as e:
+        logger.error(f"Error al obtener el listado de preguntas: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': 'Error al obtener las preguntas'}), 500
+    
+    return jsonify({
+        'status': 'success',
+        'questions': [question.to_dict() for question in questions],
+        'counts': counts,
+        'next_cursor': encode_cursor({'i': next_id}) if next_id is not None else None
+    })
+
+@app.route('/api/categories')
+@login_required
+def get_categories():
+    """Categorías del usuario con el número de preguntas de cada una"""
+    catalog = get_question_catalog(current_user.id)
+    return jsonify({
+        'status': 'success',
+        'categories': catalog.category_names(),
+        'counts': dict(catalog.categories)
+    })
+
 @app.route('/add_question', methods=['POST'])
 @login_required
 def add_question():
@@ -668,19 +1240,12 @@ def add_question():
             if type in ['checkbox', 'radio', 'multiple_choice'] and options:
                 logger.info(f"Procesando opciones: {options}")
                 # Dividir por líneas, eliminar espacios en blanco y filtrar líneas vacías
-                options_list = []
-                for opt in options.split('\n'):
-                    opt = opt.strip()
-                    if opt:
-                        # Eliminar guión inicial si existe
-                        if opt.startswith('-'):
-                            opt = opt[1:].strip()
-                        options_list.append(opt)
+                options_list = question_options.parse_input(options)
                 
                 logger.info(f"Opciones después de procesar: {options_list}")
                 
-                # Unir con comas para guardar en la base de datos
-                processed_options = ','.join(options_list)
+                # Guardar en la forma canónica (arreglo JSON)
+                processed_options = question_options.to_storage(options_list)
                 logger.info(f"Opciones procesadas: {processed_options}")
                 
                 # Si no hay opciones válidas, establecer el tipo a 'text'
@@ -757,32 +1322,64 @@ def submit_responses():
         
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
-                # Primero eliminamos cualquier respuesta existente para este día
-                try:
-                    # Primero obtenemos los IDs de las preguntas asignadas al usuario
-                    cursor.execute(
-                        'SELECT id FROM question WHERE assigned_user_id = ?',
-                        (current_user.id,)
-                    )
-                    question_ids = [row[0] for row in cursor.fetchall()]  # Mantener como enteros
+                # IDs de las preguntas asignadas al usuario, desde el catálogo en caché
+                catalog = get_question_catalog(current_user.id)
+                question_ids = catalog.ids
+                required_ids = catalog.required_ids
+                
+                # Validar todas las respuestas antes de escribir nada
+                answers = {}
+                for question_id_str, response_text in responses.items():
+                    try:
+                        question_id = int(question_id_str)  # Asegurar que el ID sea entero
+                    except ValueError:
+                        return jsonify({
+                            'status': 'error',
+                            'message': f'ID de pregunta inválido: {question_id_str}'
+                        }), 400
+                    
+                    # Verificar si la pregunta está asignada al usuario
+                    if question_id not in question_ids:
+                        print(f"Advertencia: La pregunta {question_id} no está asignada al usuario {current_user.id}")
+                        continue
+                    
+                    answers[question_id] = str(response_text) if response_text is not None else ""
+                
+                write_mode = app.config['RESPONSE_WRITE_MODE']
+                max_rows = storage.UPSERT_MAX_ROWS
+                if write_mode == 'upsert' and (max_rows is None or len(answers) <= max_rows):
+                    # Escribir solo las diferencias con lo ya guardado para este día
+                    try:
+                        counts = Response.upsert_day(cursor, current_user.id, date_obj, answers)
+                        DailySummary.record_day(
+                            cursor, current_user.id, date_obj, len(answers),
+                            len(required_ids.intersection(answers)), len(required_ids)
+                        )
+                    except Exception as e:
+                        print(f"Error al sincronizar respuestas: {str(e)}")
+                        conn.rollback()
+                        return jsonify({
+                            'status': 'error',
+                            'message': f'Error al guardar las respuestas: {str(e)}'
+                        }), 500
                     
+                    # Invalida los ETag de las estadísticas del usuario al confirmar, solo si algo cambió
+                    if counts['inserted'] or counts['updated'] or counts['deleted']:
+                        record_user_write(current_user.id)
+                    
+                    # Si todo salió bien, la transacción se confirma al finalizar la petición
+                    return jsonify({
+                        'status': 'success',
+                        'message': 'Respuestas guardadas correctamente',
+                        'counts': counts
+                    })
+                
+                # Eliminamos cualquier respuesta existente para este día
+                try:
                     if question_ids:  # Solo si hay preguntas asignadas
-                        # Convertir la fecha a string en formato YYYY-MM-DD
                         date_str = date_obj.strftime('%Y-%m-%d')
-                        
-                        # Crear una lista de cadenas con los IDs de pregunta
-                        question_ids_str = [str(qid) for qid in question_ids]
-                        
-                        # Construir la consulta SQL directamente (sin usar parámetros para la lista IN)
-                        delete_sql = """
-                            DELETE r
-                            FROM response r
-                            INNER JOIN question q ON r.question_id = q.id
-                            WHERE CONVERT(DATE, r.date) = ?
-                            AND q.assigned_user_id = ?
-                        """
-                        
-                        cursor.execute(delete_sql, (date_str, current_user.id))
+                        day_start, day_end = day_bounds(date_obj)
+                        storage.delete_day(cursor, current_user.id, day_start, day_end)
                         print(f"Respuestas anteriores eliminadas para el usuario {current_user.id} en la fecha {date_str}")
                     else:
                         print("No hay preguntas asignadas a este usuario")
@@ -794,44 +1391,25 @@ def submit_responses():
                         'message': f'Error al limpiar respuestas anteriores: {str(e)}'
                     }), 500
                 
-                # Luego insertamos las nuevas respuestas
-                for question_id_str, response_text in responses.items():
-                    try:
-                        question_id = int(question_id_str)  # Asegurar que el ID sea entero
-                        response_text = str(response_text) if response_text is not None else ""
-                        
-                        print(f"Procesando pregunta {question_id}: {response_text[:50]}...")
-                        
-                        # Verificar si la pregunta está asignada al usuario
-                        if question_id not in question_ids:
-                            print(f"Advertencia: La pregunta {question_id} no está asignada al usuario {current_user.id}")
-                            continue
-                        
-                        # Insertar la respuesta con parámetros explícitos
-                        cursor.execute(
-                            """
-                            INSERT INTO response (question_id, response, date)
-                            VALUES (?, ?, ?)
-                            """,
-                            (question_id, response_text, date_obj)
-                        )
-                    except ValueError as ve:
-                        conn.rollback()
-                        return jsonify({
-                            'status': 'error',
-                            'message': f'ID de pregunta inválido: {question_id}'
-                        }), 400
-                        
-                    except Exception as e:
-                        conn.rollback()
-                        return jsonify({
-                            'status': 'error',
-                            'message': f'Error al guardar la respuesta: {str(e)}',
-                            'question_id': question_id
-                        }), 500
+                # Luego insertamos todas las respuestas nuevas en un solo lote
+                try:
+                    rows = [(question_id, response_text, date_obj) for question_id, response_text in answers.items()]
+                    Response.bulk_insert(cursor, rows)
+                    DailySummary.record_day(
+                        cursor, current_user.id, date_obj, len(answers),
+                        len(required_ids.intersection(answers)), len(required_ids)
+                    )
+                except Exception as e:
+                    conn.rollback()
+                    return jsonify({
+                        'status': 'error',
+                        'message': f'Error al guardar las respuestas: {str(e)}'
+                    }), 500
+                
+                # Invalida los ETag de las estadísticas del usuario al confirmar
+                record_user_write(current_user.id)
                 
-                # Si todo salió bien, hacemos commit
-                conn.commit()
+                # Si todo salió bien, la transacción se confirma al finalizar la petición
                 return jsonify({
                     'status': 'success',
                     'message': 'Respuestas guardadas correctamente'
@@ -851,56 +1429,42 @@ def submit_responses():
 
 @app.route('/stats')
 @login_required
+@conditional_get
 def stats():
     try:
         # Obtener la fecha actual en formato YYYY-MM-DD
         today = datetime.now().strftime('%Y-%m-%d')
+        day_start, day_end = day_bounds(datetime.now().date())
+        # Clave de los fragmentos en caché; se lee antes de consultar los datos
+        write_version = user_write_version(current_user.id)[0]
         
         # Obtener las preguntas del usuario con sus respuestas de hoy
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
-                # Obtener preguntas con respuestas de hoy
-                cursor.execute('''
-                    SELECT 
-                        q.id,
-                        q.text as pregunta,
-                        q.type as tipo,
-                        r.response as respuesta,
-                        r.date as fecha_respuesta
-                    FROM question q
-                    LEFT JOIN response r ON q.id = r.question_id 
-                        AND CONVERT(DATE, r.date) = ?
-                    WHERE q.assigned_user_id = ?
-                    ORDER BY q.id
-                ''', (today, current_user.id))
+                # Las preguntas salen del catálogo; solo se consultan las respuestas de hoy
+                respuestas_hoy = {
+                    row[0]: (row[1], row[2])
+                    for row in storage.responses_between(cursor, current_user.id, day_start, day_end)
+                }
                 
                 preguntas = []
-                for row in cursor.fetchall():
+                for question in get_question_catalog(current_user.id).questions:
+                    respuesta, fecha_respuesta = respuestas_hoy.get(question.id, (None, None))
                     preguntas.append({
-                        'id': row.id,
-                        'texto': row.pregunta,
-                        'tipo': row.tipo,
-                        'respuesta': row.respuesta if row.respuesta else 'Sin responder',
-                        'fecha': row.fecha_respuesta.strftime('%Y-%m-%d %H:%M') if row.fecha_respuesta else 'No respondida'
+                        'id': question.id,
+                        'texto': question.text,
+                        'tipo': question.type,
+                        'respuesta': respuesta if respuesta else 'Sin responder',
+                        'fecha': fecha_respuesta.strftime('%Y-%m-%d %H:%M') if fecha_respuesta else 'No respondida'
                     })
                 
-                # Obtener estadísticas generales
-                cursor.execute('''
-                    SELECT 
-                        COUNT(DISTINCT CONVERT(DATE, r.date)) as dias_respondidos,
-                        COUNT(r.id) as total_respuestas,
-                        (SELECT COUNT(*) FROM question WHERE assigned_user_id = ?) as total_preguntas
-                    FROM response r
-                    JOIN question q ON r.question_id = q.id
-                    WHERE q.assigned_user_id = ?
-                ''', (current_user.id, current_user.id))
-                
-                stats = cursor.fetchone()
+                # Obtener estadísticas generales desde el resumen diario
+                dias_respondidos, total_respuestas, total_preguntas = DailySummary.get_totals(cursor, current_user.id)
                 
                 estadisticas = {
-                    'dias_respondidos': stats.dias_respondidos if stats and stats.dias_respondidos else 0,
-                    'total_respuestas': stats.total_respuestas if stats and stats.total_respuestas else 0,
-                    'total_preguntas': stats.total_preguntas if stats and stats.total_preguntas else 0,
+                    'dias_respondidos': dias_respondidos,
+                    'total_respuestas': total_respuestas,
+                    'total_preguntas': total_preguntas,
                     'fecha_actual': today
                 }
                 
@@ -908,7 +1472,8 @@ def stats():
                     'stats.html',
                     preguntas=preguntas,
                     estadisticas=estadisticas,
-                    fecha_actual=today
+                    fecha_actual=today,
+                    write_version=write_version
                 )
                 
     except Exception as e:
@@ -918,120 +1483,163 @@ def stats():
 
 @app.route('/api/stats/weekly_responses')
 @login_required
+@conditional_get
 def get_weekly_responses():
-    conn = None
+    fmt = requested_format(('json', 'columnar'))
+    if fmt is None:
+        return jsonify({'status': 'error', 'message': 'Formato no soportado. Use json o columnar'}), 400
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Obtener los últimos 7 días
-        today = datetime.now()
-        days = [today - timedelta(days=i) for i in range(6, -1, -1)]
+        today = datetime.now().date()
+        week_start = today - timedelta(days=6)
+        start_date, end_date = day_bounds(week_start, today)
+        user_id = current_user.id
         
-        # Formatear fechas para la consulta SQL
-        start_date = days[0].strftime('%Y-%m-%d')
-        end_date = days[-1].strftime('%Y-%m-%d')
+        def query(cursor):
+            return storage.weekly_responses(cursor, user_id, start_date, end_date)
         
-        # Obtener todas las respuestas de la semana
-        cursor.execute('''
-            SELECT q.id, q.text, q.type, r.response, r.date
-            FROM question q
-            LEFT JOIN response r ON q.id = r.question_id 
-                AND CONVERT(date, r.date) BETWEEN ? AND ?
-            WHERE q.assigned_user_id = ?
-            ORDER BY q.id, r.date
-        ''', (start_date, end_date, current_user.id))
-        
-        responses = []
-        for row in cursor.fetchall():
-            try:
-                # Manejo seguro de la fecha
-                date_value = row[4] if len(row) > 4 else None
-                if date_value:
-                    if hasattr(date_value, 'strftime'):
-                        date_str = date_value.strftime('%Y-%m-%d')
-                    else:
-                        try:
-                            date_obj = datetime.strptime(str(date_value), '%Y-%m-%d')
-                            date_str = date_obj.strftime('%Y-%m-%d')
-                        except (ValueError, TypeError):
-                            date_str = str(date_value)
-                else:
-                    date_str = None
-                
-                responses.append({
-                    'question_id': row[0],
-                    'text': row[1],
-                    'type': row[2],
-                    'response': row[3],
-                    'date': date_str
-                })
-                
-            except Exception as e:
-                continue
+        if fmt == 'columnar':
+            # Los siete días van en orden aunque alguno no tenga respuestas
+            return columnar_query(query, [week_start + timedelta(days=i) for i in range(7)])
         
-        return jsonify(responses)
+        # Las respuestas de la semana se transmiten por lotes
+        return stream_query(query, lambda row: {
+            'question_id': row[0],
+            'text': row[1],
+            'type': row[2],
+            'response': row[4],
+            'date': format_date(row[5]) if row[5] else None
+        })
         
     except Exception as e:
         return jsonify({'error': 'Error al obtener las respuestas semanales'}), 500
-        
-    finally:
-        if conn:
-            try:
-                conn.close()
-            except:
-                pass
+
+@app.route('/api/history')
+@login_required
+def get_history():
+    """Historial de respuestas en un rango arbitrario (from/to), transmitido como JSON o NDJSON, o en formato columnar"""
+    try:
+        today = datetime.now().date()
+        date_to = parse_date_arg('to', today)
+        date_from = parse_date_arg('from', date_to - timedelta(days=6))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Formato de fecha inválido. Use YYYY-MM-DD'}), 400
+    if date_from > date_to:
+        return jsonify({'status': 'error', 'message': 'La fecha inicial es posterior a la final'}), 400
+    
+    question_id = request.args.get('question_id', type=int)
+    fmt = requested_format(('json', 'ndjson', 'columnar'))
+    if fmt is None:
+        return jsonify({'status': 'error', 'message': 'Formato no soportado. Use json, ndjson o columnar'}), 400
+    
+    start_date, end_date = day_bounds(date_from, date_to)
+    user_id = current_user.id
+    
+    def query(cursor):
+        return storage.history(cursor, user_id, start_date, end_date, question_id)
+    
+    try:
+        if fmt == 'columnar':
+            return columnar_query(query)
+        return stream_query(query, lambda row: {
+            'id': row[3],
+            'question_id': row[0],
+            'text': row[1],
+            'type': row[2],
+            'response': row[4],
+            'date': format_date(row[5])
+        }, fmt)
+    except Exception as e:
+        logger.error(f"Error al obtener el historial: {str(e)}")
+        return jsonify({'status': 'error', 'message': 'Error al obtener el historial'}), 500
+
+# Tamaño de página del historial paginado
+RESPONSES_PAGE_SIZE = 50
+RESPONSES_MAX_PAGE_SIZE = 200
+
+@app.route('/api/responses')
+@login_required
+def get_responses_page():
+    """Historial de respuestas paginado por conjunto de claves (date, id), de la más reciente a la más antigua"""
+    limit = request.args.get('limit', RESPONSES_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, RESPONSES_MAX_PAGE_SIZE))
+    question_id = request.args.get('question_id', type=int)
+    categoria = request.args.get('categoria', '').strip()
+    
+    after = None
+    cursor_token = request.args.get('cursor', '').strip()
+    if cursor_token:
+        try:
+            position = decode_cursor(cursor_token)
+            after = (datetime.fromisoformat(position['d']), int(position['i']))
+        except (ValueError, KeyError, TypeError):
+            return jsonify({'status': 'error', 'message': 'Cursor de paginación inválido'}), 400
+    
+    try:
+        with get_db_connection() as conn:
+            # Se pide una fila extra para saber si existe una página siguiente
+            rows = storage.responses_page(
+                conn.cursor(), current_user.id, limit + 1, question_id, categoria or None, after
+            )
+    except Exception as e:
+        logger.error(f"Error al obtener el historial paginado: {str(e)}")
+        return jsonify({'status': 'error', 'message': 'Error al obtener las respuestas'}), 500
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor({'d': rows[-1][6].isoformat(), 'i': rows[-1][0]})
+    
+    return jsonify({
+        'status': 'success',
+        'responses': [{
+            'id': row[0],
+            'question_id': row[1],
+            'text': row[2],
+            'type': row[3],
+            'categoria': row[4],
+            'response': row[5],
+            'date': format_date(row[6])
+        } for row in rows],
+        'next_cursor': next_cursor
+    })
 
 @app.route('/api/stats')
 @login_required
+@conditional_get
 def get_stats():
     try:
         # Obtener la fecha actual en formato YYYY-MM-DD
         today = datetime.now().strftime('%Y-%m-%d')
+        day_start, day_end = day_bounds(datetime.now().date())
         
         with get_db_connection() as conn:
             with conn.cursor() as cursor:
                 # Obtener las respuestas del día actual para el usuario
-                cursor.execute('''
-                    SELECT q.text as pregunta, r.response as respuesta, r.date
-                    FROM response r
-                    JOIN question q ON r.question_id = q.id
-                    WHERE CONVERT(DATE, r.date) = ?
-                    AND q.assigned_user_id = ?
-                    ORDER BY q.id
-                ''', (today, current_user.id))
-                
                 respuestas = []
-                for row in cursor.fetchall():
+                for pregunta, respuesta, date_value in storage.responses_with_text(
+                        cursor, current_user.id, day_start, day_end):
                     # Verificar si la fecha es un objeto datetime antes de formatear
-                    date_value = row.date
                     date_str = date_value.strftime('%Y-%m-%d') if hasattr(date_value, 'strftime') else date_value
                     
                     respuestas.append({
-                        'pregunta': row.pregunta,
-                        'respuesta': row.respuesta,
+                        'pregunta': pregunta,
+                        'respuesta': respuesta,
                         'fecha': date_str
                     })
                 
-                # Obtener estadísticas generales
-                cursor.execute('''
-                    SELECT 
-                        COUNT(DISTINCT CONVERT(DATE, r.date)) as dias_respondidos,
-                        COUNT(r.id) as total_respuestas
-                    FROM response r
-                    JOIN question q ON r.question_id = q.id
-                    WHERE q.assigned_user_id = ?
-                ''', (current_user.id,))
-                
-                stats = cursor.fetchone()
+                # Obtener estadísticas generales desde el resumen diario
+                dias_respondidos, total_respuestas, _ = DailySummary.get_totals(cursor, current_user.id)
                 
                 return jsonify({
                     'status': 'success',
                     'fecha': today,
                     'respuestas': respuestas,
                     'estadisticas': {
-                        'dias_respondidos': stats.dias_respondidos if stats else 0,
-                        'total_respuestas': stats.total_respuestas if stats else 0
+                        'dias_respondidos': dias_respondidos,
+                        'total_respuestas': total_respuestas
                     }
                 })
                 
@@ -1049,8 +1657,7 @@ def update_question(question_id):
         with get_db_connection() as conn:
             cursor = conn.cursor()
             # Verificar que la pregunta exista y pertenezca al usuario actual o sea global
-            cursor.execute('SELECT assigned_user_id FROM question WHERE id = ?', (question_id,))
-            question = cursor.fetchone()
+            question = storage.question_owner(cursor, question_id)
             if not question or (question[0] not in (None, 0, current_user.id)):
                 return jsonify({'status': 'error', 'message': 'No autorizado'}), 403
             
@@ -1060,17 +1667,8 @@ def update_question(question_id):
                 # Procesar las opciones del formulario
                 options_text = data['options'].strip()
                 if options_text:
-                    # Dividir por líneas, limpiar y eliminar guiones iniciales
-                    options_list = []
-                    for opt in options_text.split('\n'):
-                        opt = opt.strip()
-                        if opt.startswith('-'):
-                            opt = opt[1:].strip()
-                        if opt:  # Solo agregar si no está vacío
-                            options_list.append(opt)
-                    
-                    # Unir las opciones con comas para almacenar en la base de datos
-                    options = ','.join(options_list)
+                    # Dividir por líneas, limpiar y eliminar guiones iniciales; guardar como arreglo JSON
+                    options = question_options.to_storage(question_options.parse_input(options_text))
             
             # Procesar categoría para edición
             categoria = data.get('categoria_existente', '').strip() if 'categoria_existente' in data else data.get('categoria', '').strip()
@@ -1080,21 +1678,19 @@ def update_question(question_id):
             elif not categoria:
                 categoria = 'Sin Categoría'
             
-            # Actualizar campos (sin modificar 'active')
-            cursor.execute(
-                'UPDATE question SET text = ?, descripcion = ?, type = ?, categoria = ?, is_required = ?' + 
-                (', options = ?' if options is not None else '') + ' WHERE id = ?',
-                (
-                    data.get('text', ''),
-                    data.get('descripcion', ''),
-                    data.get('type', 'text'),
-                    categoria,
-                    1 if data.get('is_required') in ['on', '1', 1, True, 'true'] else 0,
-                    *([options] if options is not None else []),  # Agregar options solo si existe
-                    question_id
-                )
+            # Actualizar campos (sin modificar 'active'); options solo si existe
+            storage.update_question(
+                cursor,
+                question_id,
+                data.get('text', ''),
+                data.get('descripcion', ''),
+                data.get('type', 'text'),
+                categoria,
+                1 if data.get('is_required') in ['on', '1', 1, True, 'true'] else 0,
+                options
             )
-            conn.commit()
+            if question[0]:
+                invalidate_question_catalog(question[0])
         return jsonify({'status': 'success'})
     except Exception as e:
         print(f"Error al actualizar pregunta: {str(e)}")
@@ -1108,17 +1704,15 @@ def toggle_question_status(question_id):
             cursor = conn.cursor()
             
             # Verificar que la pregunta pertenezca al usuario actual
-            cursor.execute('SELECT active FROM question WHERE id = ? AND assigned_user_id = ?', 
-                         (question_id, current_user.id))
-            question = cursor.fetchone()
+            question = storage.question_status(cursor, question_id, current_user.id)
             
             if not question:
                 return jsonify({'status': 'error', 'message': 'Pregunta no encontrada o no autorizada'}), 404
             
             # Alternar el estado
             new_status = 0 if question[0] else 1
-            cursor.execute('UPDATE question SET active = ? WHERE id = ? AND assigned_user_id = ?',
-                         (new_status, question_id, current_user.id))
+            storage.set_question_active(cursor, question_id, current_user.id, new_status)
+            invalidate_question_catalog(current_user.id)
             
             return jsonify({'status': 'success', 'active': bool(new_status)})
             
@@ -1133,14 +1727,15 @@ def delete_question(question_id):
         with get_db_connection() as conn:
             cursor = conn.cursor()
             # Verificar que la pregunta exista y pertenezca al usuario actual o sea global
-            cursor.execute('SELECT assigned_user_id FROM question WHERE id = ?', (question_id,))
-            question = cursor.fetchone()
+            question = storage.question_owner(cursor, question_id)
             if not question or (question[0] not in (None, 0, current_user.id)):
                 response = jsonify({'status': 'error', 'message': 'No autorizado'})
                 response.status_code = 403
                 return response
-            cursor.execute('DELETE FROM question WHERE id = ?', (question_id,))
-            conn.commit()
+            storage.delete_question(cursor, question_id)
+            on_commit(lambda: forget_question_options(question_id))
+            if question[0]:
+                invalidate_question_catalog(question[0])
         return jsonify({'status': 'success'})
     except Exception as e:
         print(f"Error al eliminar pregunta: {str(e)}")
@@ -1148,6 +1743,21 @@ def delete_question(question_id):
         response.status_code = 500
         return response
 
+@app.route('/api/db/pool')
+@login_required
+def get_pool_stats():
+    return jsonify({'status': 'success', 'pool': db_pool.stats()})
+
+@app.route('/api/cache/stats')
+@login_required
+def get_cache_stats():
+    return jsonify({'status': 'success', 'caches': {
+        'users': user_cache.stats(),
+        'question_options': options_cache.stats(),
+        'question_catalog': catalog_cache.stats(),
+        'template_fragments': fragment_cache.stats() if fragment_cache is not None else None
+    }})
+
 # Manejadores de error globales
 @app.errorhandler(404)
 def page_not_found(e):
@@ -1158,6 +1768,7 @@ def page_not_found(e):
 @app.errorhandler(500)
 def internal_server_error(e):
     logger.error(f'500 Error: {str(e)}')
+    g.db_rollback = True  # No confirmar la unidad de trabajo de una petición fallida
     # Si no existe la plantilla 500.html, devolver un mensaje simple
     try:
         return render_template('500.html'), 500
@@ -1167,6 +1778,7 @@ def internal_server_error(e):
 @app.errorhandler(Exception)
 def handle_exception(e):
     logger.error(f'Excepción no manejada: {str(e)}', exc_info=True)
+    g.db_rollback = True  # No confirmar la unidad de trabajo de una petición fallida
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return jsonify({
             'status': 'error',
@@ -1177,4 +1789,5 @@ def handle_exception(e):
 
 # Configuración de la aplicación
 if __name__ == '__main__':
+    init_db_pool()
     app.run(host='0.0.0.0', port=5000, debug=True)
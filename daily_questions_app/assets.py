@@ -0,0 +1,212 @@
+"""Compilación de los archivos estáticos: minificado, nombres con hash y variantes comprimidas.
+
+Los archivos de ASSETS se minifican y se copian a static/dist con el hash de
+su contenido en el nombre (css/style.3f2a9c1b7e.css), junto con sus variantes
+.gz y .br, y un manifest.json que relaciona el nombre original con el
+generado. Como el nombre cambia con el contenido, el navegador puede guardarlos
+indefinidamente (Cache-Control: immutable).
+
+Uso:
+    python daily_questions_app/assets.py            # compilar
+    python daily_questions_app/assets.py --vendor   # volver a descargar Chart.js a static/vendor y compilar
+
+Chart.js (licencia MIT) está en el repositorio, en static/vendor, para que
+las páginas no dependan de un CDN; --vendor solo hace falta al cambiar
+CHARTJS_VERSION.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import tempfile
+
+from flask import request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # Está en requirements.txt; sin él solo se generan las variantes .gz
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Archivos que se publican con nombre versionado (rutas relativas a static/)
+ASSETS = [
+    'css/style.css',
+    'js/main.js',
+    'vendor/chart.umd.min.js',
+]
+
+# Versión de static/vendor/chart.umd.min.js
+CHARTJS_VERSION = '4.4.5'
+CHARTJS_URL = f'https://cdn.jsdelivr.net/npm/chart.js@{CHARTJS_VERSION}/dist/chart.umd.min.js'
+
+# Un año; el contenido de un nombre con hash nunca cambia
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_manifest = {}
+
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """Minificado conservador: quita sangrías, líneas vacías y comentarios de línea completa.
+
+    No toca el interior de las plantillas con comillas invertidas, que pueden
+    contener HTML con espacios significativos.
+    """
+    lines = []
+    in_template = False
+    for line in source.splitlines():
+        stripped = line if in_template else line.strip()
+        if not in_template and (not stripped or stripped.startswith('//')):
+            continue
+        lines.append(stripped)
+        # Comillas invertidas sin escapar: un número impar abre o cierra una plantilla
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+def minify(name, source):
+    if name.endswith('.min.js') or name.endswith('.min.css'):
+        return source
+    if name.endswith('.css'):
+        return minify_css(source)
+    if name.endswith('.js'):
+        return minify_js(source)
+    return source
+
+
+def _write_atomic(path, data):
+    # Varios procesos pueden compilar a la vez: escribir a un temporal y renombrar
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def build_assets(static_dir=STATIC_DIR):
+    """Genera static/dist y devuelve el manifiesto {nombre_original: nombre_con_hash}"""
+    manifest = {}
+    for name in ASSETS:
+        source_path = os.path.join(static_dir, name)
+        if not os.path.exists(source_path):
+            continue
+        with open(source_path, 'r', encoding='utf-8') as f:
+            data = minify(name, f.read()).encode('utf-8')
+
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        base, ext = os.path.splitext(name)
+        if base.endswith('.min'):
+            base = base[:-4]
+        hashed_name = f"{base}.{digest}{ext}"
+        target = os.path.join(static_dir, DIST_DIR, hashed_name)
+
+        if not os.path.exists(target):
+            _write_atomic(target, data)
+            _write_atomic(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_atomic(target + '.br', brotli.compress(data))
+        manifest[name] = hashed_name
+
+    _write_atomic(
+        os.path.join(static_dir, DIST_DIR, MANIFEST_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+    )
+    return manifest
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(filename):
+    """URL del archivo estático con hash; si no está compilado, la original"""
+    hashed_name = _manifest.get(filename)
+    if hashed_name:
+        return url_for('dist_asset', filename=hashed_name)
+    return url_for('static', filename=filename)
+
+
+def send_dist_asset(filename):
+    """Sirve un archivo de static/dist, usando la variante .br o .gz si el cliente la acepta"""
+    dist_dir = os.path.join(STATIC_DIR, DIST_DIR)
+    accepted = request.accept_encodings
+    encoding = None
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[candidate] and os.path.exists(os.path.join(dist_dir, filename + suffix)):
+            encoding = candidate
+            break
+
+    if encoding:
+        suffix = '.br' if encoding == 'br' else '.gz'
+        # El tipo es el del archivo original, no el de la variante comprimida
+        response = send_from_directory(
+            dist_dir, filename + suffix, max_age=31536000,
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        response.content_encoding = encoding
+    else:
+        response = send_from_directory(dist_dir, filename, max_age=31536000)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_assets(app):
+    """Compila los archivos al iniciar (si ASSET_BUILD_ON_STARTUP) y registra asset_url en Jinja"""
+    global _manifest
+    if app.config.get('ASSET_BUILD_ON_STARTUP', True):
+        try:
+            _manifest = build_assets()
+        except OSError as e:
+            app.logger.error(f"No se pudieron compilar los archivos estáticos: {str(e)}")
+            _manifest = load_manifest()
+    else:
+        _manifest = load_manifest()
+
+    # Sin compilar, asset_url entrega la URL original, sin hash ni caché permanente
+    for name in ASSETS:
+        if name not in _manifest:
+            app.logger.error(f"{name} no está compilado; se sirve sin nombre con hash")
+
+    app.add_url_rule('/static/dist/<path:filename>', 'dist_asset', send_dist_asset)
+    app.jinja_env.globals['asset_url'] = asset_url
+
+
+def vendor_chartjs(static_dir=STATIC_DIR):
+    """Descarga la versión fijada de Chart.js a static/vendor"""
+    from urllib.request import urlopen
+
+    target = os.path.join(static_dir, 'vendor', 'chart.umd.min.js')
+    with urlopen(CHARTJS_URL, timeout=30) as response:
+        _write_atomic(target, response.read())
+    print(f"Chart.js {CHARTJS_VERSION} guardado en {target}")
+
+
+if __name__ == '__main__':
+    import sys
+
+    if '--vendor' in sys.argv[1:]:
+        vendor_chartjs()
+    for name, hashed_name in sorted(build_assets().items()):
+        print(f"{name} -> {DIST_DIR}/{hashed_name}")
@@ -0,0 +1,238 @@
+"""Evidencia de planes y tiempos para los predicados de fecha y los índices.
+
+Crea tablas sintéticas bench_question/bench_response (por defecto 1.000.000 de
+respuestas: 50 usuarios x 20 preguntas x 1000 días), ejecuta las consultas de
+/stats, /api/stats, /api/stats/weekly_responses y el conteo de /admin con el
+predicado anterior (CONVERT(DATE, r.date) = ?) y con el intervalo semiabierto
+(r.date >= ? AND r.date < ?), antes y después de crear los índices de
+add_indexes.py, y reporta los operadores del plan estimado y la mediana de
+tiempo de cada combinación.
+
+Uso:
+    python daily_questions_app/benchmarks/bench_date_predicates.py --rows 1000000 --json plan_evidence.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import xml.etree.ElementTree as ET
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as daily_app
+from add_indexes import INDEXES
+
+SHOWPLAN_NS = '{http://schemas.microsoft.com/sqlserver/2004/07/showplan}'
+
+# Cada consulta tiene la variante anterior ('convert') y la nueva ('range')
+QUERIES = {
+    'stats_hoy': {
+        'convert': '''
+            SELECT q.id, q.text, q.type, r.response, r.date
+            FROM bench_question q
+            LEFT JOIN bench_response r ON q.id = r.question_id AND CONVERT(DATE, r.date) = ?
+            WHERE q.assigned_user_id = ? ORDER BY q.id''',
+        'range': '''
+            SELECT q.id, q.text, q.type, r.response, r.date
+            FROM bench_question q
+            LEFT JOIN bench_response r ON q.id = r.question_id AND r.date >= ? AND r.date < ?
+            WHERE q.assigned_user_id = ? ORDER BY q.id''',
+    },
+    'api_stats_hoy': {
+        'convert': '''
+            SELECT q.text, r.response, r.date
+            FROM bench_response r JOIN bench_question q ON r.question_id = q.id
+            WHERE CONVERT(DATE, r.date) = ? AND q.assigned_user_id = ? ORDER BY q.id''',
+        'range': '''
+            SELECT q.text, r.response, r.date
+            FROM bench_response r JOIN bench_question q ON r.question_id = q.id
+            WHERE r.date >= ? AND r.date < ? AND q.assigned_user_id = ? ORDER BY q.id''',
+    },
+    'semanal': {
+        'convert': '''
+            SELECT q.id, q.text, q.type, r.response, r.date
+            FROM bench_question q
+            LEFT JOIN bench_response r ON q.id = r.question_id
+                AND CONVERT(date, r.date) BETWEEN ? AND ?
+            WHERE q.assigned_user_id = ? ORDER BY q.id, r.date''',
+        'range': '''
+            SELECT q.id, q.text, q.type, r.response, r.date
+            FROM bench_question q
+            LEFT JOIN bench_response r ON q.id = r.question_id AND r.date >= ? AND r.date < ?
+            WHERE q.assigned_user_id = ? ORDER BY q.id, r.date''',
+    },
+    'admin_respuestas_hoy': {
+        'convert': 'SELECT COUNT(*) FROM bench_response WHERE CONVERT(date, date) = ?',
+        'range': 'SELECT COUNT(*) FROM bench_response WHERE date >= ? AND date < ?',
+    },
+}
+
+
+def query_params(name, style, today, user_id):
+    week_start = today - timedelta(days=6)
+    if name == 'semanal':
+        if style == 'convert':
+            return (week_start.strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d'), user_id)
+        return (*daily_app.day_bounds(week_start, today), user_id)
+    if style == 'convert':
+        params = (today.strftime('%Y-%m-%d'),)
+    else:
+        params = daily_app.day_bounds(today)
+    if name == 'admin_respuestas_hoy':
+        return params
+    return (*params, user_id)
+
+
+def create_dataset(cursor, rows, users, questions_per_user, date_type):
+    total_questions = users * questions_per_user
+    cursor.execute('''
+        IF OBJECT_ID('bench_response') IS NOT NULL DROP TABLE bench_response;
+        IF OBJECT_ID('bench_question') IS NOT NULL DROP TABLE bench_question;
+    ''')
+    cursor.execute('''
+        CREATE TABLE bench_question (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            text NVARCHAR(500) NOT NULL,
+            type NVARCHAR(50) NOT NULL,
+            options NVARCHAR(500) NULL,
+            active BIT DEFAULT 1,
+            created_at DATETIME DEFAULT GETDATE(),
+            assigned_user_id INT,
+            descripcion NVARCHAR(255) NULL,
+            is_required BIT NOT NULL DEFAULT 0,
+            categoria NVARCHAR(100) NOT NULL DEFAULT 'General'
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TABLE bench_response (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            question_id INT NOT NULL,
+            response NVARCHAR(MAX) NOT NULL,
+            date {date_type} NOT NULL
+        )
+    ''')
+    # Las preguntas se numeran 1..N; la pregunta i pertenece al usuario (i - 1) / questions_per_user + 1
+    cursor.execute('''
+        WITH n AS (
+            SELECT TOP (?) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) - 1 AS n
+            FROM sys.all_objects a CROSS JOIN sys.all_objects b
+        )
+        INSERT INTO bench_question (text, type, assigned_user_id)
+        SELECT CONCAT('Pregunta ', n), 'text', n / ? + 1 FROM n ORDER BY n
+    ''', (total_questions, questions_per_user))
+    cursor.execute('''
+        WITH n AS (
+            SELECT TOP (?) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) - 1 AS n
+            FROM sys.all_objects a CROSS JOIN sys.all_objects b CROSS JOIN sys.all_objects c
+        )
+        INSERT INTO bench_response (question_id, response, date)
+        SELECT n % ? + 1, CONCAT('Respuesta ', n), DATEADD(day, -(n / ?), CAST(GETDATE() AS DATE))
+        FROM n
+    ''', (rows, total_questions, total_questions))
+    cursor.execute('UPDATE STATISTICS bench_response WITH FULLSCAN')
+    cursor.execute('UPDATE STATISTICS bench_question WITH FULLSCAN')
+
+
+def create_indexes(cursor):
+    for name, table, definition in INDEXES:
+        definition = definition.replace(f' ON {table} ', f' ON bench_{table} ')
+        cursor.execute(definition)
+
+
+def plan_summary(cursor, sql, params):
+    cursor.execute('SET SHOWPLAN_XML ON')
+    try:
+        cursor.execute(sql, params)
+        plan_xml = cursor.fetchone()[0]
+    finally:
+        cursor.execute('SET SHOWPLAN_XML OFF')
+
+    root = ET.fromstring(plan_xml)
+    operators = []
+    for relop in root.iter(f'{SHOWPLAN_NS}RelOp'):
+        obj = relop.find(f'./*/{SHOWPLAN_NS}Object')
+        target = ''
+        if obj is not None:
+            target = f" {obj.get('Table', '')}.{obj.get('Index', '')}".rstrip('.')
+        operators.append(f"{relop.get('PhysicalOp')}{target}")
+    stmt = root.find(f'.//{SHOWPLAN_NS}StmtSimple')
+    cost = float(stmt.get('StatementSubTreeCost')) if stmt is not None else None
+    return {'operators': operators, 'estimated_cost': cost}
+
+
+def time_query(cursor, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def run_phase(cursor, phase, today, user_id, repeat):
+    results = []
+    for name, variants in QUERIES.items():
+        for style, sql in variants.items():
+            params = query_params(name, style, today, user_id)
+            entry = {'phase': phase, 'query': name, 'predicate': style}
+            entry.update(plan_summary(cursor, sql, params))
+            entry['median_ms'] = time_query(cursor, sql, params, repeat)
+            results.append(entry)
+            print(f"[{phase}] {name:<22} {style:<8} {entry['median_ms']:>10.2f} ms  "
+                  f"costo={entry['estimated_cost']}  {', '.join(entry['operators'][:4])}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Planes y tiempos de los predicados de fecha')
+    parser.add_argument('--rows', type=int, default=1000000, help='Respuestas sintéticas a generar')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--questions-per-user', type=int, default=20)
+    parser.add_argument('--date-type', choices=['DATE', 'DATETIME'], default='DATETIME',
+                        help='Tipo de la columna date en la tabla sintética')
+    parser.add_argument('--repeat', type=int, default=10, help='Ejecuciones medidas por consulta')
+    parser.add_argument('--keep', action='store_true', help='No eliminar las tablas sintéticas al terminar')
+    parser.add_argument('--json', dest='json_path', help='Guardar los resultados en un archivo JSON')
+    args = parser.parse_args()
+
+    today = date.today()
+    user_id = max(1, args.users // 2)
+    pooled = daily_app.db_pool.acquire()
+    conn = pooled.conn
+    try:
+        cursor = conn.cursor()
+        print(f"Generando {args.rows} respuestas sintéticas...")
+        start = time.perf_counter()
+        create_dataset(cursor, args.rows, args.users, args.questions_per_user, args.date_type)
+        conn.commit()
+        print(f"Datos generados en {time.perf_counter() - start:.1f} s")
+
+        results = run_phase(cursor, 'sin_indices', today, user_id, args.repeat)
+        create_indexes(cursor)
+        conn.commit()
+        results += run_phase(cursor, 'con_indices', today, user_id, args.repeat)
+
+        if not args.keep:
+            cursor.execute('DROP TABLE bench_response; DROP TABLE bench_question;')
+            conn.commit()
+    finally:
+        conn.rollback()
+        daily_app.db_pool.release(pooled)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'benchmark': 'date_predicates',
+                'rows': args.rows,
+                'date_type': args.date_type,
+                'results': results
+            }, f, indent=2)
+        print(f"Resultados guardados en {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+"""Benchmark de carga por ruta sobre los datos de seed_data.py.
+
+Inicia sesión con un usuario sintético y lanza peticiones contra /, /admin,
+/stats, /api/stats, /api/stats/weekly_responses y /submit_responses, ya sea
+con el cliente de pruebas de Flask dentro del proceso (--mode client) o por
+HTTP contra un servidor en marcha (--mode http). Por ruta reporta p50/p95/p99
+de latencia, peticiones por segundo, errores y las consultas SQL y el tiempo
+de base de datos por petición. Los resultados en JSON incluyen la configuración y el commit
+para comparar ejecuciones; --baseline muestra la diferencia con una anterior.
+En modo client las consultas se cuentan directamente, incluidas las de los
+cuerpos transmitidos; en modo http salen de Server-Timing (el servidor debe
+ejecutarse con SERVER_TIMING=1) y las rutas transmitidas quedan sin dato.
+
+/submit_responses alterna dos juegos de respuestas, de modo que cada envío
+cambia las filas del día y el modo upsert tiene trabajo real.
+
+Uso:
+    python daily_questions_app/benchmarks/seed_data.py --users 10 --questions 20 --days 730
+    python daily_questions_app/benchmarks/bench_routes.py --requests 200 --concurrency 4 --json rutas.json
+    python daily_questions_app/benchmarks/bench_routes.py --mode http --base-url http://127.0.0.1:8000 --baseline rutas.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as daily_app
+from db_instrumentation import collect_queries
+import question_options
+from seed_data import DEFAULT_PREFIX, SEED_PASSWORD, synthetic_answer
+
+ROUTES = ['/', '/admin', '/stats', '/api/stats', '/api/stats/weekly_responses', '/submit_responses']
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'min_ms': round(min(samples), 3),
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def parse_server_timing(header):
+    """Convierte un encabezado Server-Timing en nombre -> {'dur': ms, 'desc': texto}"""
+    metrics = {}
+    for part in (header or '').split(','):
+        fields = [field.strip() for field in part.split(';')]
+        if not fields[0]:
+            continue
+        metric = {}
+        for field in fields[1:]:
+            key, _, value = field.partition('=')
+            value = value.strip('"')
+            metric[key] = float(value) if key == 'dur' else value
+        metrics[fields[0]] = metric
+    return metrics
+
+
+def db_metrics(header):
+    """(consultas, ms de base de datos) de la petición según Server-Timing, o None si no viene"""
+    metrics = parse_server_timing(header)
+    db = metrics.get('db')
+    # En un cuerpo transmitido las consultas llegan después del encabezado
+    if db is None or 'db-stream' in metrics:
+        return None
+    return int(db.get('desc', '0').split()[0]), db.get('dur', 0.0)
+
+
+class ClientSession:
+    """Sesión del cliente de pruebas de Flask (dentro del proceso)"""
+
+    def __init__(self):
+        self.client = daily_app.app.test_client()
+
+    def login(self, username, password):
+        response = self.client.post('/login', data={'username': username, 'password': password})
+        return response.status_code in (200, 302) and 'Location' in response.headers
+
+    def request(self, method, path, payload=None):
+        # Se cuenta hasta el final del cuerpo: las rutas transmitidas consultan después del encabezado
+        with collect_queries() as stats:
+            response = self.client.open(path, method=method, json=payload)
+            response.get_data()
+        metrics = (stats.queries, stats.duration * 1000) if daily_app.db_instrumentation else None
+        return response.status_code, metrics
+
+
+class HttpSession:
+    """Sesión HTTP con cookies (urllib) contra un servidor en marcha"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+
+    def login(self, username, password):
+        body = urlencode({'username': username, 'password': password}).encode('utf-8')
+        try:
+            with self.opener.open(Request(self.base_url + '/login', data=body), timeout=self.timeout) as response:
+                response.read()
+                # Tras un login correcto la redirección termina fuera de /login
+                return '/login' not in response.geturl()
+        except HTTPError:
+            return False
+
+    def request(self, method, path, payload=None):
+        data = None
+        headers = {}
+        if payload is not None:
+            data = json.dumps(payload).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        try:
+            with self.opener.open(Request(self.base_url + path, data=data, headers=headers, method=method),
+                                  timeout=self.timeout) as response:
+                response.read()
+                return response.status, db_metrics(response.headers.get('Server-Timing'))
+        except HTTPError as e:
+            e.read()
+            return e.code, db_metrics(e.headers.get('Server-Timing'))
+
+
+def load_user_questions(username):
+    """Preguntas activas del usuario sintético, para armar los envíos de /submit_responses"""
+    with daily_app.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT q.id, q.type, q.options
+            FROM question q INNER JOIN [user] u ON q.assigned_user_id = u.id
+            WHERE u.username = ? AND q.active = 1
+            ORDER BY q.id
+        ''', (username,))
+        return [(row[0], row[1], question_options.parse_stored(row[2])) for row in cursor.fetchall()]
+
+
+def submit_payloads(questions, variants=2):
+    rng = random.Random(0)
+    today = date.today().strftime('%Y-%m-%d')
+    return [
+        {'date': today, 'responses': {str(qid): synthetic_answer(rng, qtype, options)
+                                      for qid, qtype, options in questions}}
+        for _ in range(variants)
+    ]
+
+
+def run_route(sessions, route, payloads, count, warmup):
+    """Lanza count peticiones repartidas entre las sesiones.
+
+    Devuelve (muestras, estados de error, segundos, métricas de base de datos
+    por petición como pares (consultas, ms)).
+    """
+    method = 'POST' if route == '/submit_responses' else 'GET'
+
+    def payload_for(i):
+        return payloads[i % len(payloads)] if method == 'POST' else None
+
+    # El calentamiento va en serie y fuera de la medición (cachés y conexiones en frío)
+    for i in range(warmup):
+        sessions[0].request(method, route, payload_for(i))
+
+    positions = iter(range(warmup, warmup + count))
+    positions_lock = threading.Lock()
+    samples = []
+    errors = []
+    db_samples = []
+
+    def worker(session):
+        while True:
+            with positions_lock:
+                i = next(positions, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            status, metrics = session.request(method, route, payload_for(i))
+            samples.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors.append(status)
+            if metrics is not None:
+                db_samples.append(metrics)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+        list(executor.map(worker, sessions))
+    seconds = time.perf_counter() - start
+    return samples, errors, seconds, db_samples
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_baseline(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return {entry['route']: entry for entry in json.load(f).get('results', [])}
+
+
+def print_baseline(results, baseline, baseline_path):
+    print(f"\nComparación con {baseline_path}")
+    print(f"{'ruta':<30} {'p50 antes':>10} {'p50 ahora':>10} {'cambio':>8} {'p95 antes':>10} {'p95 ahora':>10}")
+    for entry in results:
+        before = baseline.get(entry['route'])
+        if not before:
+            continue
+        old_p50 = before['latency']['p50_ms']
+        new_p50 = entry['latency']['p50_ms']
+        change = (new_p50 - old_p50) / old_p50 * 100 if old_p50 else float('nan')
+        print(f"{entry['route']:<30} {old_p50:>10.2f} {new_p50:>10.2f} {change:>7.1f}% "
+              f"{before['latency']['p95_ms']:>10.2f} {entry['latency']['p95_ms']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga por ruta')
+    parser.add_argument('--mode', choices=['client', 'http'], default='client',
+                        help='Cliente de pruebas de Flask o HTTP contra un servidor en marcha')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='URL del servidor en modo http')
+    parser.add_argument('--username', help=f'Usuario sintético (por defecto {DEFAULT_PREFIX}0)')
+    parser.add_argument('--password', default=SEED_PASSWORD, help='Contraseña del usuario')
+    parser.add_argument('--routes', default=','.join(ROUTES), help='Rutas separadas por comas')
+    parser.add_argument('--requests', type=int, default=200, help='Peticiones medidas por ruta')
+    parser.add_argument('--warmup', type=int, default=10, help='Peticiones de calentamiento por ruta')
+    parser.add_argument('--concurrency', type=int, default=1, help='Sesiones concurrentes')
+    parser.add_argument('--timeout', type=float, default=30, help='Tiempo máximo por petición HTTP (s)')
+    parser.add_argument('--label', help='Etiqueta de la ejecución, se guarda en el JSON')
+    parser.add_argument('--json', dest='json_path', help='Guardar los resultados en un archivo JSON')
+    parser.add_argument('--baseline', help='JSON de una ejecución anterior para comparar')
+    args = parser.parse_args()
+
+    username = args.username or f"{DEFAULT_PREFIX}0"
+    # Se lee antes de medir: --json puede apuntar al mismo archivo
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    routes = [route.strip() for route in args.routes.split(',') if route.strip()]
+    daily_app.init_db_pool()
+    payloads = submit_payloads(load_user_questions(username))
+    if '/submit_responses' in routes and not payloads[0]['responses']:
+        raise RuntimeError(f"El usuario {username} no tiene preguntas activas; ejecute seed_data.py")
+
+    if args.mode == 'client':
+        sessions = [ClientSession() for _ in range(args.concurrency)]
+    else:
+        sessions = [HttpSession(args.base_url, args.timeout) for _ in range(args.concurrency)]
+    for session in sessions:
+        if not session.login(username, args.password):
+            raise RuntimeError(f"No se pudo iniciar sesión como {username}")
+
+    results = []
+    print(f"{'ruta':<30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'pet/s':>8} {'consultas':>10} {'db ms':>8} {'errores':>8}")
+    for route in routes:
+        samples, errors, seconds, db_samples = run_route(
+            sessions, route, payloads, args.requests, args.warmup
+        )
+        entry = {
+            'route': route,
+            'requests': len(samples),
+            'errors': len(errors),
+            'error_statuses': sorted(set(errors)),
+            'throughput_rps': round(len(samples) / seconds, 2) if seconds else None,
+            'latency': summarize(samples),
+            'queries_per_request': round(statistics.mean(q for q, _ in db_samples), 2) if db_samples else None,
+            'db_p50_ms': round(statistics.median(ms for _, ms in db_samples), 3) if db_samples else None,
+        }
+        results.append(entry)
+        queries = '-' if entry['queries_per_request'] is None else f"{entry['queries_per_request']:.2f}"
+        db_ms = '-' if entry['db_p50_ms'] is None else f"{entry['db_p50_ms']:.2f}"
+        print(f"{route:<30} {entry['latency']['p50_ms']:>9.2f} {entry['latency']['p95_ms']:>9.2f} "
+              f"{entry['latency']['p99_ms']:>9.2f} {entry['throughput_rps'] or 0:>8.1f} "
+              f"{queries:>10} {db_ms:>8} {len(errors):>8}")
+
+    report = {
+        'benchmark': 'routes',
+        'label': args.label,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'mode': args.mode,
+        'base_url': args.base_url if args.mode == 'http' else None,
+        'username': username,
+        'requests': args.requests,
+        'warmup': args.warmup,
+        'concurrency': args.concurrency,
+        'config': {key: daily_app.app.config.get(key) for key in (
+            'DB_BACKEND', 'RESPONSE_WRITE_MODE', 'ADMIN_FANOUT', 'SESSION_BACKEND',
+            'SHARED_STATE_BACKEND', 'FRAGMENT_CACHE_SIZE'
+        )} if args.mode == 'client' else None,
+        'results': results,
+    }
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.json_path}")
+    if baseline is not None:
+        print_baseline(results, baseline, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Benchmark de /submit_responses en función de la cantidad de preguntas.
+
+Crea un usuario temporal con preguntas de prueba, envía respuestas a través
+del cliente de pruebas de Flask contra la base de datos configurada y mide la
+latencia de cada envío. Los envíos alternan dos juegos de respuestas, de modo
+que en modo upsert cada uno cambia las filas del día. Con --compare-rowwise
+también mide la inserción fila por fila (el método anterior) dentro de una
+transacción que se deshace, sobre otra fecha para no chocar con las filas que
+ya escribió el endpoint (índice único por pregunta y día).
+
+Uso:
+    python daily_questions_app/benchmarks/bench_submit_responses.py --counts 10,50,100,250 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+
+import app as daily_app
+
+BENCH_PASSWORD = 'bench-password'
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def create_fixture(question_count):
+    """Crea el usuario y las preguntas de prueba; devuelve (user_id, username, question_ids)"""
+    username = f"bench_submit_{int(time.time())}"
+    with daily_app.get_db_connection() as conn:
+        cursor = conn.cursor()
+        user_id = daily_app.storage.create_user(cursor, username, generate_password_hash(BENCH_PASSWORD))
+        question_ids = [
+            daily_app.storage.create_question(
+                cursor, f"Pregunta de benchmark {i}", 'text', None, user_id, None, 0, 'Benchmark', 1
+            )
+            for i in range(question_count)
+        ]
+    return user_id, username, question_ids
+
+
+def drop_fixture(user_id):
+    with daily_app.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'DELETE FROM response WHERE question_id IN (SELECT id FROM question WHERE assigned_user_id = ?)',
+            (user_id,)
+        )
+        cursor.execute('DELETE FROM user_daily_summary WHERE user_id = ?', (user_id,))
+        cursor.execute('DELETE FROM question WHERE assigned_user_id = ?', (user_id,))
+        cursor.execute('DELETE FROM [user] WHERE id = ?', (user_id,))
+
+
+def bench_endpoint(client, question_ids, count, repeat, warmup):
+    today = date.today().strftime('%Y-%m-%d')
+    payloads = [
+        {'date': today, 'responses': {str(qid): f"respuesta {variant} {qid}" for qid in question_ids[:count]}}
+        for variant in ('a', 'b')
+    ]
+    samples = []
+    for i in range(warmup + repeat):
+        start = time.perf_counter()
+        response = client.post('/submit_responses', json=payloads[i % len(payloads)])
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code != 200:
+            raise RuntimeError(f"Envío fallido ({response.status_code}): {response.get_data(as_text=True)}")
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def bench_rowwise(question_ids, count, repeat):
+    """Inserción fila por fila, como antes del lote único; se deshace al terminar.
+
+    Usa el día anterior: bench_endpoint solo escribe el de hoy y las preguntas
+    son nuevas en cada ejecución, así que ese día no tiene respuestas.
+    """
+    day = date.today() - timedelta(days=1)
+    rows = [(qid, f"respuesta {qid}", day) for qid in question_ids[:count]]
+    samples = []
+    pooled = daily_app.db_pool.acquire()
+    try:
+        cursor = pooled.conn.cursor()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for row in rows:
+                cursor.execute('INSERT INTO response (question_id, response, date) VALUES (?, ?, ?)', row)
+            samples.append((time.perf_counter() - start) * 1000)
+            pooled.conn.rollback()
+    finally:
+        pooled.conn.rollback()
+        daily_app.db_pool.release(pooled)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de /submit_responses')
+    parser.add_argument('--counts', default='10,50,100,250',
+                        help='Cantidades de preguntas separadas por comas')
+    parser.add_argument('--repeat', type=int, default=20, help='Envíos medidos por cantidad')
+    parser.add_argument('--warmup', type=int, default=2, help='Envíos de calentamiento por cantidad')
+    parser.add_argument('--compare-rowwise', action='store_true',
+                        help='Medir también la inserción fila por fila')
+    parser.add_argument('--json', dest='json_path', help='Guardar los resultados en un archivo JSON')
+    args = parser.parse_args()
+
+    counts = sorted(int(c) for c in args.counts.split(',') if c.strip())
+    daily_app.init_db_pool()
+    user_id, username, question_ids = create_fixture(max(counts))
+    results = []
+    try:
+        client = daily_app.app.test_client()
+        login = client.post('/login', data={'username': username, 'password': BENCH_PASSWORD})
+        if login.status_code not in (200, 302):
+            raise RuntimeError(f"No se pudo iniciar sesión ({login.status_code})")
+
+        print(f"{'preguntas':>10} {'mediana ms':>11} {'p95 ms':>9} {'ms/resp':>8} {'fila a fila ms':>15}")
+        for count in counts:
+            samples = bench_endpoint(client, question_ids, count, args.repeat, args.warmup)
+            result = {'questions': count, 'endpoint': summarize(samples)}
+            rowwise = ''
+            if args.compare_rowwise:
+                result['rowwise_insert'] = summarize(bench_rowwise(question_ids, count, args.repeat))
+                rowwise = f"{result['rowwise_insert']['median_ms']:>15.2f}"
+            results.append(result)
+            median = result['endpoint']['median_ms']
+            print(f"{count:>10} {median:>11.2f} {result['endpoint']['p95_ms']:>9.2f} "
+                  f"{median / count:>8.3f} {rowwise}")
+    finally:
+        drop_fixture(user_id)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'submit_responses', 'results': results}, f, indent=2)
+        print(f"Resultados guardados en {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
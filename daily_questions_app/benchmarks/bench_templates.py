@@ -0,0 +1,153 @@
+"""Tiempo de renderizado por plantilla, con y sin las cachés de plantillas.
+
+Renderiza admin.html, stats.html e index.html con datos sintéticos (sin base
+de datos) y mide:
+
+- compilación en frío de cada plantilla, sin caché de bytecode y con ella ya
+  poblada (lo que paga un worker nuevo al iniciar);
+- renderizado sin caché de fragmentos, con la caché vacía (primer
+  renderizado de una versión) y con la caché caliente.
+
+Uso:
+    python daily_questions_app/benchmarks/bench_templates.py --questions 200 --repeat 200 --json render.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template
+from flask_login import login_user
+from jinja2 import Environment, FileSystemBytecodeCache
+
+import app as daily_app
+from template_cache import FragmentCacheExtension
+
+TEMPLATES = ['admin.html', 'stats.html', 'index.html']
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'median_ms': round(statistics.median(samples), 4),
+        'p95_ms': round(percentile(samples, 95), 4),
+        'max_ms': round(max(samples), 4),
+    }
+
+
+def synthetic_context(question_count):
+    now = datetime.now()
+    categories = [f"Categoría {i}" for i in range(8)]
+    questions = [
+        daily_app.Question(
+            id=i, text=f"Pregunta sintética número {i}", type=('radio' if i % 3 == 0 else 'text'),
+            options=('Sí', 'No', 'A veces') if i % 3 == 0 else (), active=i % 5 != 0,
+            created_at=now, assigned_user_id=1, descripcion=f"Descripción de la pregunta {i}",
+            is_required=i % 2, categoria=categories[i % len(categories)], version=1
+        )
+        for i in range(1, question_count + 1)
+    ]
+    catalog = daily_app.QuestionCatalog(questions)
+    page, _ = catalog.page({}, daily_app.ADMIN_PAGE_SIZE)
+    preguntas = [
+        {'id': q.id, 'texto': q.text, 'tipo': q.type, 'respuesta': 'Sí', 'fecha': now.strftime('%Y-%m-%d %H:%M')}
+        for q in questions
+    ]
+    return {
+        'admin.html': dict(
+            stats={'total_preguntas': len(questions), 'preguntas_activas': 0, 'respuestas_hoy': 0},
+            questions=page, next_cursor=None, users=[], categories=catalog.category_names(),
+            catalog_version=1
+        ),
+        'stats.html': dict(
+            preguntas=preguntas,
+            estadisticas={'dias_respondidos': 10, 'total_respuestas': 100, 'total_preguntas': len(questions)},
+            fecha_actual=now.strftime('%Y-%m-%d'), write_version=1
+        ),
+        'index.html': dict(questions=questions, date=now),
+    }
+
+
+def time_render(name, context, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render_template(name, **context)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def time_compile(name, bytecode_cache, repeat):
+    """Carga la plantilla en un entorno nuevo cada vez (sin la caché en memoria de Jinja)"""
+    samples = []
+    for _ in range(repeat):
+        env = Environment(
+            loader=daily_app.app.jinja_env.loader, extensions=[FragmentCacheExtension],
+            bytecode_cache=bytecode_cache, cache_size=0
+        )
+        start = time.perf_counter()
+        env.get_template(name)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tiempo de renderizado por plantilla')
+    parser.add_argument('--questions', type=int, default=200, help='Preguntas sintéticas')
+    parser.add_argument('--repeat', type=int, default=200, help='Renderizados medidos por caso')
+    parser.add_argument('--json', dest='json_path', help='Guardar los resultados en un archivo JSON')
+    args = parser.parse_args()
+
+    contexts = synthetic_context(args.questions)
+    fragment_cache = daily_app.app.jinja_env.fragment_cache
+    results = []
+
+    with tempfile.TemporaryDirectory() as cache_dir, daily_app.app.test_request_context('/admin'):
+        login_user(daily_app.User(1, 'bench', ''))
+        bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+        for name in TEMPLATES:
+            entry = {'template': name}
+            entry['compile_sin_bytecode'] = time_compile(name, None, max(5, args.repeat // 20))
+            time_compile(name, bytecode_cache, 1)  # Poblar la caché de bytecode
+            entry['compile_con_bytecode'] = time_compile(name, bytecode_cache, max(5, args.repeat // 20))
+
+            daily_app.app.jinja_env.fragment_cache = None
+            entry['render_sin_fragmentos'] = time_render(name, contexts[name], args.repeat)
+
+            daily_app.app.jinja_env.fragment_cache = fragment_cache
+            if fragment_cache is not None:
+                fragment_cache.clear()
+                entry['render_fragmentos_primera_vez'] = time_render(name, contexts[name], 1)
+                entry['render_fragmentos_caliente'] = time_render(name, contexts[name], args.repeat)
+            results.append(entry)
+
+            print(f"{name:<12} compilar {entry['compile_sin_bytecode']['median_ms']:>8.3f} ms -> "
+                  f"{entry['compile_con_bytecode']['median_ms']:>8.3f} ms con bytecode | renderizar "
+                  f"{entry['render_sin_fragmentos']['median_ms']:>8.3f} ms -> "
+                  f"{entry.get('render_fragmentos_caliente', {}).get('median_ms', float('nan')):>8.3f} ms con fragmentos")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'benchmark': 'templates',
+                'questions': args.questions,
+                'repeat': args.repeat,
+                'results': results
+            }, f, indent=2)
+        print(f"Resultados guardados en {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""Generador de datos sintéticos para los benchmarks de rutas.
+
+Crea N usuarios (bench_0, bench_1, ...) con M preguntas cada uno, repartidas
+entre los cuatro tipos (text, select, checkbox, radio), y respuestas diarias
+para los últimos D días en la base de datos configurada (DB_BACKEND: SQL
+Server o SQLite). Las respuestas se insertan por lotes y al final se
+reconstruye user_daily_summary de los usuarios creados. Todos los usuarios
+comparten la contraseña SEED_PASSWORD.
+
+Uso:
+    python daily_questions_app/benchmarks/seed_data.py --users 20 --questions 25 --days 730
+    python daily_questions_app/benchmarks/seed_data.py --drop       # borrar los datos generados
+    DB_BACKEND=sqlite python daily_questions_app/benchmarks/seed_data.py   # sin servidor
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+
+import app as daily_app
+import question_options
+
+SEED_PASSWORD = 'bench-password'
+DEFAULT_PREFIX = 'bench_'
+
+CATEGORIES = ['Salud', 'Trabajo', 'Ánimo', 'Hábitos', 'Sueño', 'Social']
+OPTIONS = {
+    'select': ['Muy bien', 'Bien', 'Regular', 'Mal', 'Muy mal'],
+    'checkbox': ['Ejercicio', 'Lectura', 'Meditación', 'Agua', 'Fruta', 'Pantallas'],
+    'radio': ['Sí', 'No', 'A veces'],
+}
+WORDS = ('hoy', 'día', 'tranquilo', 'cansado', 'trabajo', 'familia', 'paseo', 'lluvia', 'sol', 'reunión')
+
+
+def synthetic_answer(rng, question_type, options):
+    if question_type == 'checkbox':
+        return ', '.join(rng.sample(options, rng.randint(1, min(3, len(options)))))
+    if options:
+        return rng.choice(options)
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+
+
+def insert_responses(cursor, conn, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        daily_app.storage.bulk_insert_responses(cursor, rows[start:start + batch_size])
+        conn.commit()
+
+
+def seed_user(cursor, conn, rng, username, password_hash, question_count, days, answer_rate, batch_size):
+    """Crea un usuario con sus preguntas y respuestas; devuelve (user_id, preguntas, respuestas)"""
+    storage = daily_app.storage
+    user_id = storage.create_user(cursor, username, password_hash)
+
+    created = []
+    for i in range(question_count):
+        question_type = daily_app.Question.TYPES[i % len(daily_app.Question.TYPES)]
+        options = OPTIONS.get(question_type, [])
+        question_id = storage.create_question(
+            cursor, f"Pregunta sintética {i + 1} ({question_type})", question_type,
+            question_options.to_storage(options), user_id, f"Descripción de la pregunta {i + 1}",
+            1 if rng.random() < 0.3 else 0, rng.choice(CATEGORIES), 1 if rng.random() < 0.9 else 0
+        )
+        created.append((question_id, question_type, options))
+    conn.commit()
+
+    first_day = date.today() - timedelta(days=days - 1)
+
+    # Las respuestas se generan y se insertan día por día para no acumularlas en memoria
+    pending = []
+    response_count = 0
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        for question_id, question_type, options in created:
+            if rng.random() < answer_rate:
+                pending.append((question_id, synthetic_answer(rng, question_type, options), day))
+        if len(pending) >= batch_size:
+            insert_responses(cursor, conn, pending, batch_size)
+            response_count += len(pending)
+            pending = []
+    if pending:
+        insert_responses(cursor, conn, pending, batch_size)
+        response_count += len(pending)
+
+    storage.rebuild_daily_summary(cursor, user_id)
+    conn.commit()
+    return user_id, len(created), response_count
+
+
+def drop_seed(cursor, conn, prefix):
+    """Borra los usuarios con el prefijo dado y todos sus datos; devuelve cuántos usuarios se eliminaron"""
+    # Sentencias válidas en SQL Server y en SQLite; ESCAPE en lugar de los corchetes de T-SQL
+    pattern = prefix.replace('!', '!!').replace('_', '!_').replace('%', '!%') + '%'
+    cursor.execute("SELECT id FROM [user] WHERE username LIKE ? ESCAPE '!'", (pattern,))
+    user_ids = [row[0] for row in cursor.fetchall()]
+    for user_id in user_ids:
+        cursor.execute(
+            'DELETE FROM response WHERE question_id IN (SELECT id FROM question WHERE assigned_user_id = ?)',
+            (user_id,)
+        )
+        cursor.execute('DELETE FROM user_daily_summary WHERE user_id = ?', (user_id,))
+        cursor.execute('DELETE FROM question WHERE assigned_user_id = ?', (user_id,))
+        cursor.execute('DELETE FROM [user] WHERE id = ?', (user_id,))
+        conn.commit()
+    return len(user_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos para los benchmarks')
+    parser.add_argument('--users', type=int, default=10, help='Usuarios a crear')
+    parser.add_argument('--questions', type=int, default=20, help='Preguntas por usuario')
+    parser.add_argument('--days', type=int, default=730, help='Días de respuestas hacia atrás desde hoy')
+    parser.add_argument('--answer-rate', type=float, default=0.8,
+                        help='Probabilidad de que una pregunta tenga respuesta en un día')
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX, help='Prefijo de los nombres de usuario')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Filas por lote de inserción')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla del generador aleatorio')
+    parser.add_argument('--drop', action='store_true', help='Solo borrar los datos generados con el prefijo')
+    parser.add_argument('--reset', action='store_true', help='Borrar los datos generados antes de crear los nuevos')
+    parser.add_argument('--json', dest='json_path', help='Guardar el resumen en un archivo JSON')
+    args = parser.parse_args()
+
+    daily_app.init_db_pool()
+    pooled = daily_app.db_pool.acquire()
+    summary = {'prefix': args.prefix, 'users': []}
+    try:
+        conn = pooled.conn
+        cursor = conn.cursor()
+        if args.drop or args.reset:
+            removed = drop_seed(cursor, conn, args.prefix)
+            print(f"Usuarios sintéticos eliminados: {removed}")
+            if args.drop:
+                return
+
+        rng = random.Random(args.seed)
+        # Un solo hash para todos: generarlo por usuario dominaría el tiempo de carga
+        password_hash = generate_password_hash(SEED_PASSWORD)
+        start = time.perf_counter()
+        total_responses = 0
+        for i in range(args.users):
+            username = f"{args.prefix}{i}"
+            user_id, question_count, response_count = seed_user(
+                cursor, conn, rng, username, password_hash, args.questions,
+                args.days, args.answer_rate, args.batch_size
+            )
+            total_responses += response_count
+            summary['users'].append({'id': user_id, 'username': username,
+                                     'questions': question_count, 'responses': response_count})
+            print(f"{username}: {question_count} preguntas, {response_count} respuestas")
+
+        elapsed = time.perf_counter() - start
+        summary.update({'days': args.days, 'total_responses': total_responses, 'seconds': round(elapsed, 2)})
+        print(f"Respuestas insertadas: {total_responses} en {elapsed:.1f} s "
+              f"({total_responses / max(elapsed, 1e-9):.0f} filas/s)")
+    except Exception:
+        pooled.conn.rollback()
+        raise
+    finally:
+        daily_app.db_pool.release(pooled)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"Resumen guardado en {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
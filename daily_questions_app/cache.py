@@ -0,0 +1,268 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Caché en memoria con expiración por tiempo y desalojo LRU.
+
+    Si se indica stamp_path, el contenido se descarta cuando cambia la fecha de
+    modificación de ese archivo; así otros procesos (por ejemplo make_admin.py)
+    pueden invalidar la caché con touch_stamp().
+    """
+
+    def __init__(self, maxsize=1024, ttl=300, stamp_path=None, stamp_check_interval=1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stamp_path = stamp_path
+        self.stamp_check_interval = stamp_check_interval
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stamp_mtime = self._read_stamp()
+        self._stamp_checked_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _read_stamp(self):
+        if not self.stamp_path:
+            return None
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_stamp(self, now):
+        # Se llama con el lock tomado; el stat se limita a uno por intervalo
+        if not self.stamp_path or now - self._stamp_checked_at < self.stamp_check_interval:
+            return
+        self._stamp_checked_at = now
+        mtime = self._read_stamp()
+        if mtime != self._stamp_mtime:
+            self._stamp_mtime = mtime
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            self._check_stamp(now)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_matching(self, predicate):
+        """Descarta las claves para las que predicate(key) es verdadero; recorre toda la caché"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+def touch_stamp(path):
+    """Actualiza la fecha de modificación del archivo para invalidar cachés en otros procesos"""
+    with open(path, 'a'):
+        pass
+    # Forzar una marca de tiempo distinta aunque la resolución del sistema de archivos sea baja
+    now_ns = time.time_ns()
+    try:
+        current = os.stat(path).st_mtime_ns
+    except OSError:
+        current = 0
+    os.utime(path, ns=(now_ns, max(now_ns, current + 1)))
+
+
+class LocalVersionStore:
+    """Contadores de versión en memoria; válidos solo dentro de un proceso"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._versions.get(key, (0, None))[0]
+
+    def info(self, key):
+        """(versión, momento del último cambio); la primera consulta registra la clave"""
+        with self._lock:
+            return self._versions.setdefault(key, (0, time.time()))
+
+    def incr(self, key):
+        with self._lock:
+            version = self._versions.get(key, (0, None))[0] + 1
+            self._versions[key] = (version, time.time())
+            return version
+
+
+class SQLiteVersionStore:
+    """Contadores de versión en un archivo SQLite (modo WAL) compartido por todos los workers.
+
+    Cada lectura es una consulta por clave primaria en un archivo local, así
+    un cambio hecho en un worker invalida las cachés de los demás de inmediato.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS version '
+            '(key TEXT PRIMARY KEY, version INTEGER NOT NULL, updated_at REAL NOT NULL DEFAULT 0)'
+        )
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(version)')]
+        if 'updated_at' not in columns:
+            conn.execute('ALTER TABLE version ADD COLUMN updated_at REAL NOT NULL DEFAULT 0')
+
+    def _connection(self):
+        # Una conexión por hilo y por proceso: no se reutiliza la heredada de un fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute('SELECT version FROM version WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    def info(self, key):
+        """(versión, momento del último cambio); la primera consulta registra la clave"""
+        conn = self._connection()
+        row = conn.execute('SELECT version, updated_at FROM version WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            # Todos los workers ven el mismo momento inicial para la clave
+            conn.execute(
+                'INSERT OR IGNORE INTO version (key, version, updated_at) VALUES (?, 0, ?)',
+                (key, time.time())
+            )
+            row = conn.execute('SELECT version, updated_at FROM version WHERE key = ?', (key,)).fetchone()
+        return row[0], row[1]
+
+    def incr(self, key):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT INTO version (key, version, updated_at) VALUES (?, 1, ?) '
+                'ON CONFLICT(key) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at',
+                (key, time.time())
+            )
+            version = conn.execute('SELECT version FROM version WHERE key = ?', (key,)).fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return version
+
+
+class VersionedCache:
+    """Caché con un contador de versión por clave.
+
+    bump() invalida la entrada y avanza la versión; un valor cargado mientras
+    otra petición escribía no se guarda si la versión cambió durante la carga,
+    así la caché nunca vuelve a una versión anterior. Con un SQLiteVersionStore
+    las versiones se comparten entre procesos y cada worker descarta su copia
+    local en cuanto otro registra un cambio.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300, store=None, namespace=''):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.store = store or LocalVersionStore()
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.bumps = 0
+
+    def _store_key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def version(self, key):
+        return self.store.get(self._store_key(key))
+
+    def bump(self, key):
+        version = self.store.incr(self._store_key(key))
+        with self._lock:
+            self.bumps += 1
+        self._entries.invalidate(key)
+        return version
+
+    def peek(self, key):
+        """Valor en caché si corresponde a la versión actual, o None; nunca lo carga"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == self.version(key):
+            return entry[1]
+        return None
+
+    def get_or_load(self, key, loader):
+        entry = self._entries.get(key)
+        version = self.version(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = loader()
+        # Si otra escritura avanzó la versión durante la carga, el valor no se guarda
+        if self.version(key) == version:
+            self._entries.set(key, (version, value))
+        return value
+
+    def stats(self):
+        stats = self._entries.stats()
+        stats['bumps'] = self.bumps
+        return stats
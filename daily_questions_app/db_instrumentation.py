@@ -0,0 +1,445 @@
+"""Medición de las consultas de cada petición: cursor instrumentado, Server-Timing y registro de consultas lentas.
+
+Cada conexión física del pool se envuelve una sola vez en
+InstrumentedConnection. Sus cursores miden cada execute/executemany y cuentan
+las filas leídas, y lo acumulan en las estadísticas de la petición en curso
+(QueryStats), que viven en una ContextVar. Las consultas que el panel de
+administración ejecuta en otros hilos se atribuyen a la petición con bound().
+
+Al terminar la petición las estadísticas se envían en el encabezado
+Server-Timing, solo en modo debug o con SERVER_TIMING (lo recibe cualquier
+cliente, incluso sin sesión):
+
+    Server-Timing: db;dur=4.210;desc="3 consultas, 12 filas", db-acquire;dur=0.050, app;dur=12.300
+
+Las sentencias que tardan más de SLOW_QUERY_MS se escriben como una línea
+JSON en el registro de consultas lentas, con la forma normalizada de la
+sentencia (sin literales) y solo el tipo de cada parámetro.
+
+En modo de desarrollo o de pruebas (QUERY_DEBUG, app.debug o app.testing)
+también se guardan las sentencias de cada petición, y las formas que se
+repiten N_PLUS_ONE_THRESHOLD veces o más se registran como posibles N+1.
+assert_max_queries(n) fija el presupuesto de consultas de un bloque o función
+en las pruebas:
+
+    with assert_max_queries(3, max_repeats=1):
+        client.get('/admin')
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+
+from flask import g, request
+
+slow_query_logger = logging.getLogger('daily_questions.slow_query')
+query_budget_logger = logging.getLogger('daily_questions.query_budget')
+
+_current_stats = ContextVar('query_stats', default=None)
+
+# Lo activa init_db_instrumentation; sin conexiones instrumentadas no hay nada que contar
+_enabled = False
+
+
+class QueryStats:
+    """Consultas, tiempo de base de datos, filas leídas y espera del pool de una petición.
+
+    Con track_statements se cuenta además cada sentencia por su texto. Lo
+    registrado también se suma a parent, así assert_max_queries ve las
+    consultas de las peticiones hechas dentro del bloque.
+    """
+
+    def __init__(self, endpoint=None, parent=None, track_statements=False):
+        self.endpoint = endpoint
+        self.parent = parent
+        self.queries = 0
+        self.duration = 0.0
+        self.rows = 0
+        self.acquires = 0
+        self.acquire_time = 0.0
+        self.statements = Counter() if track_statements else None
+        # El cuerpo se genera después de enviar Server-Timing (stream_query)
+        self.streamed = False
+        # Las consultas del panel se registran desde varios hilos a la vez
+        self._lock = threading.Lock()
+
+    def _chain(self):
+        stats = self
+        while stats is not None:
+            yield stats
+            stats = stats.parent
+
+    def add_query(self, sql, duration):
+        for stats in self._chain():
+            with stats._lock:
+                stats.queries += 1
+                stats.duration += duration
+                if stats.statements is not None:
+                    stats.statements[sql] += 1
+
+    def add_rows(self, count):
+        for stats in self._chain():
+            with stats._lock:
+                stats.rows += count
+
+    def add_acquire(self, duration):
+        for stats in self._chain():
+            with stats._lock:
+                stats.acquires += 1
+                stats.acquire_time += duration
+
+    def shapes(self):
+        """Cantidad de ejecuciones por forma de sentencia (fingerprint), de mayor a menor"""
+        with self._lock:
+            statements = list(self.statements.items()) if self.statements else []
+        shapes = Counter()
+        for sql, count in statements:
+            shapes[fingerprint(sql)] += count
+        return shapes.most_common()
+
+    def repeated_shapes(self, threshold):
+        """Formas ejecutadas threshold veces o más: candidatas a N+1"""
+        return [(shape, count) for shape, count in self.shapes() if count >= threshold]
+
+    def server_timing(self, total=None):
+        metrics = [
+            f'db;dur={self.duration * 1000:.3f};desc="{self.queries} consultas, {self.rows} filas"',
+            f'db-acquire;dur={self.acquire_time * 1000:.3f}',
+        ]
+        if total is not None:
+            metrics.append(f'app;dur={total * 1000:.3f}')
+        if self.streamed:
+            # Las consultas del cuerpo transmitido no alcanzan a entrar en el encabezado
+            metrics.append('db-stream;desc="consultas del cuerpo no incluidas"')
+        return ', '.join(metrics)
+
+
+def current_stats():
+    """Estadísticas de la petición en curso, o None fuera de una petición"""
+    return _current_stats.get()
+
+
+def bound(stats, func):
+    """Devuelve func para ejecutarse en otro hilo registrando sus consultas en stats"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_stats.set(stats)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_stats.reset(token)
+    return wrapper
+
+
+def bound_iter(stats, iterator):
+    """Como bound() para un iterador: cada paso y el cierre registran sus consultas en stats.
+
+    Sirve para los cuerpos transmitidos, que el servidor itera después de
+    terminada la petición y fuera de su contexto.
+    """
+    step = bound(stats, next)
+    try:
+        while True:
+            try:
+                item = step(iterator)
+            except StopIteration:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            bound(stats, close)()
+
+
+@contextmanager
+def collect_queries():
+    """Devuelve un QueryStats con las consultas del bloque, incluidas las de las peticiones hechas dentro"""
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def record_acquire(duration):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add_acquire(duration)
+
+
+_COMMENT_RE = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING_RE = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES_LIST_RE = re.compile(r'\(\?(?:, \.\.\.)?\)(?:\s*,\s*\(\?(?:, \.\.\.)?\))+')
+_SPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """Forma normalizada de la sentencia: sin comentarios ni literales y con las listas colapsadas.
+
+    Dos ejecuciones de la misma consulta con distintos valores o distinta
+    cantidad de elementos en un IN (...) / VALUES (...) tienen la misma forma.
+    """
+    sql = _COMMENT_RE.sub(' ', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _SPACE_RE.sub(' ', sql).strip()
+    sql = _PLACEHOLDER_LIST_RE.sub('(?, ...)', sql)
+    return _VALUES_LIST_RE.sub('(?, ...)', sql)
+
+
+def redact_params(params):
+    """Reemplaza cada parámetro por su tipo (y longitud en los textos); los valores no se registran"""
+    if params is None:
+        return None
+    if not isinstance(params, (list, tuple)):
+        params = [params]
+    redacted = []
+    for value in params:
+        if value is None:
+            redacted.append(None)
+        elif isinstance(value, (str, bytes)):
+            redacted.append(f'{type(value).__name__}({len(value)})')
+        else:
+            redacted.append(type(value).__name__)
+    return redacted
+
+
+class InstrumentedCursor:
+    """Cursor que mide las sentencias y cuenta las filas leídas; el resto se delega al cursor real"""
+
+    __slots__ = ('_cursor', '_instrumentation')
+
+    def __init__(self, cursor, instrumentation):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_instrumentation', instrumentation)
+
+    def execute(self, sql, *params):
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(sql, *params)
+        finally:
+            self._instrumentation.record(sql, params[0] if len(params) == 1 else params, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_of_params)
+        finally:
+            self._instrumentation.record(sql, None, time.perf_counter() - start, many=True)
+        return self
+
+    def _count_rows(self, count):
+        stats = _current_stats.get()
+        if stats is not None and count:
+            stats.add_rows(count)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count_rows(1)
+        return row
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count_rows(len(rows))
+        return rows
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany() if size is None else self._cursor.fetchmany(size)
+        self._count_rows(len(rows))
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._cursor.__exit__(exc_type, exc_val, exc_tb)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+
+class InstrumentedConnection:
+    """Conexión que entrega cursores instrumentados; atributos como timeout se aplican a la real"""
+
+    __slots__ = ('_conn', '_instrumentation')
+
+    def __init__(self, conn, instrumentation):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_instrumentation', instrumentation)
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def cursor(self):
+        return InstrumentedCursor(self._conn.cursor(), self._instrumentation)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+
+class DBInstrumentation:
+    """Envuelve las conexiones del pool y registra cada sentencia en la petición en curso"""
+
+    def __init__(self, slow_query_ms=200):
+        self.slow_query_seconds = slow_query_ms / 1000.0 if slow_query_ms else None
+        # Funciones listener(sql, duración) llamadas tras cada sentencia (por ejemplo las métricas)
+        self.listeners = []
+
+    def wrap(self, conn):
+        return InstrumentedConnection(conn, self)
+
+    def record(self, sql, params, duration, many=False):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.add_query(sql, duration)
+        for listener in self.listeners:
+            listener(sql, duration)
+        if self.slow_query_seconds is not None and duration >= self.slow_query_seconds:
+            self.log_slow_query(sql, params, duration, stats, many)
+
+    def log_slow_query(self, sql, params, duration, stats, many=False):
+        entry = {
+            'event': 'slow_query',
+            'duration_ms': round(duration * 1000, 3),
+            'endpoint': stats.endpoint if stats is not None else None,
+            'fingerprint': fingerprint(sql),
+            'params': 'executemany' if many else redact_params(params),
+        }
+        slow_query_logger.warning(json.dumps(entry, ensure_ascii=False))
+
+
+class assert_max_queries(ContextDecorator):
+    """Falla con AssertionError si el bloque o la función ejecuta más de limit sentencias.
+
+    Cuenta las sentencias de todas las peticiones hechas dentro (por ejemplo
+    con app.test_client()), incluidas las de los hilos del panel. Con
+    max_repeats también falla si una misma forma de sentencia se ejecuta más
+    de max_repeats veces (un N+1). El mensaje lista las sentencias por forma.
+    """
+
+    def __init__(self, limit, max_repeats=None):
+        self.limit = limit
+        self.max_repeats = max_repeats
+        self.stats = None
+        self._token = None
+
+    def __enter__(self):
+        if not _enabled:
+            raise RuntimeError("assert_max_queries requiere DB_INSTRUMENTATION=1")
+        self.stats = QueryStats(parent=_current_stats.get(), track_statements=True)
+        self._token = _current_stats.set(self.stats)
+        return self.stats
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_stats.reset(self._token)
+        if exc_type is not None:
+            return False
+        problems = []
+        if self.stats.queries > self.limit:
+            problems.append(f"se ejecutaron {self.stats.queries} consultas (máximo {self.limit})")
+        if self.max_repeats is not None:
+            repeated = self.stats.repeated_shapes(self.max_repeats + 1)
+            if repeated:
+                problems.append(f"{len(repeated)} forma(s) repetida(s) más de {self.max_repeats} veces (posible N+1)")
+        if problems:
+            detail = '\n'.join(f"  {count} x {shape}" for shape, count in self.stats.shapes())
+            raise AssertionError('; '.join(problems) + '\n' + detail)
+        return False
+
+
+def _configure_logger(logger, log_path):
+    # El registro general está en ERROR; estos registros tienen su propio destino
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = logging.FileHandler(log_path, encoding='utf-8') if log_path else logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        logger.addHandler(handler)
+
+
+def init_db_instrumentation(app):
+    """Registra la medición por petición, el registro de consultas lentas y la detección de N+1.
+
+    Devuelve el DBInstrumentation cuyo wrap() se pasa al pool, o None si
+    DB_INSTRUMENTATION está desactivado. Se llama antes de registrar el commit
+    de la petición; como after_request se ejecuta en orden inverso, Server-Timing
+    se calcula después del commit y su tiempo entra en app, no en db (que solo
+    mide las sentencias del cursor).
+    """
+    if not app.config.get('DB_INSTRUMENTATION', True):
+        return None
+
+    global _enabled
+    _enabled = True
+    instrumentation = DBInstrumentation(app.config.get('SLOW_QUERY_MS', 200))
+    _configure_logger(slow_query_logger, app.config.get('SLOW_QUERY_LOG'))
+    _configure_logger(query_budget_logger, app.config.get('SLOW_QUERY_LOG'))
+
+    def query_debug():
+        # Se evalúa por petición: las pruebas activan app.testing después de importar la aplicación
+        return app.config.get('QUERY_DEBUG') or app.debug or app.testing
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats_started = time.perf_counter()
+        g.query_stats_token = _current_stats.set(
+            QueryStats(request.endpoint, parent=_current_stats.get(), track_statements=query_debug())
+        )
+
+    @app.after_request
+    def add_server_timing(response):
+        stats = _current_stats.get()
+        if stats is not None and (app.config.get('SERVER_TIMING') or app.debug):
+            response.headers['Server-Timing'] = stats.server_timing(
+                time.perf_counter() - g.query_stats_started
+            )
+        return response
+
+    @app.after_request
+    def report_repeated_statements(response):
+        stats = _current_stats.get()
+        if stats is None or stats.statements is None:
+            return response
+        repeated = stats.repeated_shapes(app.config.get('N_PLUS_ONE_THRESHOLD', 3))
+        if repeated:
+            query_budget_logger.warning(json.dumps({
+                'event': 'n_plus_one',
+                'endpoint': stats.endpoint,
+                'queries': stats.queries,
+                'repeated': [{'fingerprint': shape, 'count': count} for shape, count in repeated],
+            }, ensure_ascii=False))
+        return response
+
+    @app.teardown_request
+    def end_query_stats(exc):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            _current_stats.reset(token)
+
+    return instrumentation
@@ -0,0 +1,303 @@
+import logging
+import threading
+import time
+from collections import deque
+
+try:
+    import pyodbc
+except ImportError:  # Solo lo necesita el pool de SQL Server (DB_BACKEND=sqlserver)
+    pyodbc = None
+
+logger = logging.getLogger(__name__)
+
+# Controladores ODBC en orden de preferencia
+DEFAULT_DRIVERS = [
+    "ODBC Driver 18 for SQL Server",
+    "ODBC Driver 17 for SQL Server",
+    "SQL Server"  # Último recurso
+]
+
+# Opciones de sesión aplicadas una sola vez por conexión física (un solo lote)
+SESSION_OPTIONS = (
+    "SET ARITHABORT ON; "
+    "SET ANSI_WARNINGS ON; "
+    "SET ANSI_PADDING ON; "
+    "SET ANSI_NULLS ON; "
+    "SET CONCAT_NULL_YIELDS_NULL ON; "
+    "SET QUOTED_IDENTIFIER ON; "
+    "SET NOCOUNT ON;"
+)
+
+
+class PoolExhaustedError(Exception):
+    """No hay conexiones disponibles en el pool dentro del tiempo de espera"""
+
+
+class PooledConnection:
+    """Conexión física junto con sus metadatos de uso.
+
+    conn es la conexión que usa la aplicación (envuelta si el pool tiene
+    wrap_connection) y raw la conexión del controlador sin envolver.
+    """
+
+    def __init__(self, conn, driver, raw=None):
+        self.conn = conn
+        self.raw = conn if raw is None else raw
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def age(self):
+        return time.monotonic() - self.created_at
+
+    def idle_time(self):
+        return time.monotonic() - self.last_used
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones pyodbc ya inicializadas.
+
+    El controlador que funciona se resuelve una sola vez y las opciones de
+    sesión se aplican al crear cada conexión física, de modo que pedir una
+    conexión al pool no requiere un nuevo handshake con el servidor.
+    wrap_connection, si se indica, envuelve cada conexión física al crearla
+    (por ejemplo para medir sus consultas); las verificaciones del pool usan
+    la conexión sin envolver. on_connect(driver, error), si se indica, se
+    llama tras cada intento de abrir una conexión física (error es None si
+    tuvo éxito).
+    """
+
+    def __init__(self, conn_str_template, drivers=None, min_size=1, max_size=10,
+                 max_lifetime=1800, health_check_idle=30, checkout_timeout=30,
+                 wrap_connection=None, on_connect=None):
+        self.conn_str_template = conn_str_template
+        self.drivers = list(drivers or DEFAULT_DRIVERS)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.health_check_idle = health_check_idle
+        self.checkout_timeout = checkout_timeout
+        self.wrap_connection = wrap_connection
+        self.on_connect = on_connect
+
+        self.driver = None
+        self._idle = deque()
+        self._size = 0  # Conexiones físicas abiertas (libres + en uso)
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'created': 0,
+            'closed': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+        }
+
+    def _connect(self, driver):
+        if pyodbc is None:
+            raise RuntimeError("pyodbc no está instalado; instálelo o use DB_BACKEND=sqlite")
+        conn = pyodbc.connect(self.conn_str_template.format(driver=driver), autocommit=False)
+        cursor = conn.cursor()
+        cursor.execute(SESSION_OPTIONS)
+        cursor.close()
+        conn.commit()
+        return conn
+
+    def _open_connection(self, driver):
+        try:
+            conn = self._connect(driver)
+        except Exception as e:
+            if self.on_connect is not None:
+                self.on_connect(driver, e)
+            raise
+        if self.on_connect is not None:
+            self.on_connect(driver, None)
+        return conn
+
+    def _pooled(self, conn, driver):
+        if self.wrap_connection is None:
+            return PooledConnection(conn, driver)
+        return PooledConnection(self.wrap_connection(conn), driver, raw=conn)
+
+    def resolve_driver(self):
+        """Determina el primer controlador ODBC que logra conectar y lo recuerda"""
+        if self.driver:
+            return self.driver
+
+        last_error = None
+        for driver in self.drivers:
+            try:
+                conn = self._open_connection(driver)
+            except Exception as e:
+                last_error = e
+                logger.error(f"No se pudo conectar con {driver}: {str(e)}")
+                continue
+
+            with self._lock:
+                if self.driver is None:
+                    self.driver = driver
+                    self._size += 1
+                    self._stats['created'] += 1
+                    self._idle.append(self._pooled(conn, driver))
+                    self._available.notify()
+                    logger.info(f"Controlador ODBC seleccionado: {driver}")
+                else:
+                    # Otro hilo resolvió el controlador mientras tanto
+                    conn.close()
+            return self.driver
+
+        error_msg = "No se pudo establecer conexión con ningún controlador ODBC disponible"
+        logger.error(error_msg)
+        if last_error:
+            logger.error(f"Último error: {str(last_error)}")
+        raise Exception(error_msg)
+
+    def _new_connection(self):
+        """Crea una conexión física; el llamador ya reservó el cupo en _size"""
+        try:
+            conn = self._open_connection(self.driver)
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._available.notify()
+            raise
+        with self._lock:
+            self._stats['created'] += 1
+        return self._pooled(conn, self.driver)
+
+    def _close(self, pooled, recycled=False):
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._stats['closed'] += 1
+            if recycled:
+                self._stats['recycled'] += 1
+            self._available.notify()
+
+    def _is_healthy(self, pooled):
+        if self.health_check_idle is None or pooled.idle_time() < self.health_check_idle:
+            return True
+        try:
+            cursor = pooled.raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.error(f"Conexión del pool descartada por fallo de verificación: {str(e)}")
+            with self._lock:
+                self._stats['health_check_failures'] += 1
+            return False
+
+    def prewarm(self, count=None):
+        """Abre conexiones por adelantado hasta alcanzar count (por defecto min_size)"""
+        self.resolve_driver()
+        target = min(self.max_size, self.min_size if count is None else count)
+        while True:
+            with self._lock:
+                if self._size >= target:
+                    break
+                self._size += 1
+            pooled = self._new_connection()
+            with self._lock:
+                self._idle.append(pooled)
+                self._available.notify()
+
+    def acquire(self, timeout=None, block=True):
+        """Obtiene una conexión del pool, creando una nueva si hay cupo.
+
+        Con block=False devuelve None en lugar de esperar si el pool está lleno.
+        """
+        if not self.driver:
+            self.resolve_driver()
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            pooled = None
+            create = False
+            with self._lock:
+                while not self._idle and self._size >= self.max_size:
+                    if not block:
+                        return None
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolExhaustedError(
+                            f"No hay conexiones disponibles (máximo {self.max_size})"
+                        )
+                    self._stats['waits'] += 1
+                    self._available.wait(remaining)
+                if self._idle:
+                    # LIFO: la conexión usada más recientemente sigue "caliente"
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+
+            if create:
+                pooled = self._new_connection()
+            elif pooled.age() >= self.max_lifetime:
+                self._close(pooled, recycled=True)
+                continue
+            elif not self._is_healthy(pooled):
+                self._close(pooled)
+                continue
+
+            with self._lock:
+                self._stats['checkouts'] += 1
+            return pooled
+
+    def release(self, pooled, discard=False):
+        """Devuelve una conexión al pool o la cierra si ya no es reutilizable"""
+        if discard or pooled.age() >= self.max_lifetime:
+            self._close(pooled, recycled=not discard)
+            return
+        pooled.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(pooled)
+            self._available.notify()
+
+    def close_all(self):
+        """Cierra todas las conexiones libres del pool"""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for pooled in idle:
+            self._close(pooled)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data.update({
+                'driver': self.driver,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'max_lifetime': self.max_lifetime,
+            })
+        return data
+
+
+class SQLiteConnectionPool(ConnectionPool):
+    """Pool de conexiones a una base SQLite local (DB_BACKEND=sqlite).
+
+    Abrir una conexión SQLite no requiere red, pero cada una conserva su
+    caché de páginas y de sentencias preparadas; el pool las mantiene entre
+    peticiones con los mismos límites y estadísticas que el de SQL Server.
+    connect es la función que abre y configura una conexión.
+    """
+
+    def __init__(self, connect, **kwargs):
+        super().__init__(None, drivers=['sqlite3'], **kwargs)
+        self._open = connect
+
+    def _connect(self, driver):
+        return self._open()
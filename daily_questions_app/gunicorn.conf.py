@@ -0,0 +1,20 @@
+import multiprocessing
+import os
+
+# gunicorn -c daily_questions_app/gunicorn.conf.py wsgi:app
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+
+# La aplicación se importa una sola vez en el proceso maestro y los workers la heredan
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Las conexiones a SQL Server no se comparten entre procesos: cada worker abre su propio pool
+    from app import init_db_pool
+
+    init_db_pool()
@@ -1,5 +1,8 @@
 import pyodbc
 
+from add_indexes import INDEXES
+from rebuild_daily_summary import CREATE_TABLE_SQL as CREATE_DAILY_SUMMARY_SQL
+
 # Primero conectarse a la base de datos master para crear DailyQuestions si no existe
 master_conn_str = (
     "DRIVER={SQL Server};"
@@ -41,6 +44,8 @@ try:
     
     # Eliminar tablas en orden inverso a las dependencias
     cursor.execute("""
+        IF EXISTS (SELECT * FROM sys.tables WHERE name = 'user_daily_summary')
+            DROP TABLE user_daily_summary;
         IF EXISTS (SELECT * FROM sys.tables WHERE name = 'response')
             DROP TABLE response;
         IF EXISTS (SELECT * FROM sys.tables WHERE name = 'question')
@@ -68,6 +73,11 @@ try:
             active BIT DEFAULT 1,
             created_at DATETIME DEFAULT GETDATE(),
             assigned_user_id INT,
+            descripcion NVARCHAR(500) NULL,
+            is_required BIT NOT NULL DEFAULT 0,
+            categoria NVARCHAR(100) NULL,
+            -- Se incrementa en cada cambio; la caché de opciones y el catálogo dependen de ella
+            version INT NOT NULL DEFAULT 1,
             FOREIGN KEY (assigned_user_id) REFERENCES [user](id)
         )
     """)
@@ -77,11 +87,22 @@ try:
         CREATE TABLE response (
             id INT IDENTITY(1,1) PRIMARY KEY,
             question_id INT NOT NULL,
-            response NVARCHAR(500) NOT NULL,
+            response NVARCHAR(MAX) NOT NULL,
             date DATE NOT NULL,
             FOREIGN KEY (question_id) REFERENCES question (id)
         )
     """)
+
+    # Una respuesta por pregunta y día (el modo 'upsert' de /submit_responses depende de esto)
+    cursor.execute("CREATE UNIQUE INDEX UX_response_question_date ON response (question_id, date)")
+
+    # Resumen diario por usuario que usan /stats y /api/stats
+    cursor.execute(CREATE_DAILY_SUMMARY_SQL)
+
+    # Índices de add_indexes.py; el índice único ya cubre (question_id, date)
+    for name, table, definition in INDEXES:
+        if name != 'IX_response_question_date':
+            cursor.execute(definition)
     
     conn.commit()
     print("Base de datos inicializada exitosamente!")
@@ -1,4 +1,9 @@
+import os
 import pyodbc
+from cache import touch_stamp
+
+# Debe coincidir con USER_CACHE_STAMP en app.py
+USER_CACHE_STAMP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_cache.stamp')
 
 def make_admin(username):
     conn_str = (
@@ -25,6 +30,8 @@ def make_admin(username):
             print(f"Error: No se encontró el usuario '{username}'")
         else:
             conn.commit()
+            # Invalidar la caché de usuarios de la aplicación en ejecución
+            touch_stamp(USER_CACHE_STAMP)
             print(f"¡Usuario '{username}' actualizado a administrador exitosamente!")
         
     except Exception as e:
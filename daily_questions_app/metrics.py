@@ -0,0 +1,292 @@
+"""Métricas de la aplicación en formato de texto de Prometheus (/metrics).
+
+Contadores, indicadores e histogramas mínimos, sin dependencias externas. Para
+que registrar una observación no compita por un lock, cada hilo escribe en su
+propio fragmento (un dict por métrica) y /metrics suma los fragmentos al leer;
+el lock solo se toma la primera vez que un hilo usa una métrica y cuando el
+hilo termina, momento en que su fragmento se suma a uno base y se descarta
+(los servidores que crean un hilo por petición no acumulan fragmentos).
+
+init_metrics(app) mide cada petición (contador por endpoint, método y estado,
+histograma de latencia y peticiones en curso) y devuelve un AppMetrics con
+los puntos de enganche para el pool (aperturas y fallos de conexión por
+controlador) y para el cursor instrumentado (duración de las consultas).
+"""
+import hmac
+import itertools
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from flask import g, request
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Límites de los histogramas en segundos
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Primera palabra de la sentencia que se usa como etiqueta; el resto cuenta como 'other'
+STATEMENT_KINDS = frozenset(('select', 'insert', 'update', 'delete', 'merge', 'with', 'pragma', 'set'))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _ShardOwner:
+    """Objeto que solo referencia el hilo dueño del fragmento; al terminar el hilo se libera"""
+
+    __slots__ = ('__weakref__',)
+
+
+class _Metric:
+    """Métrica con valores por combinación de etiquetas, repartidos en un fragmento por hilo"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._keys = itertools.count()
+        self._shards = {}
+        # Valores de los hilos que ya terminaron
+        self._base = {}
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            owner = _ShardOwner()
+            self._local.owner = owner
+            self._local.shard = shard
+            key = next(self._keys)
+            with self._shards_lock:
+                self._shards[key] = shard
+            # Al terminar el hilo se libera su threading.local y con él owner
+            weakref.finalize(owner, self._retire, key, shard)
+        return shard
+
+    def _retire(self, key, shard):
+        with self._shards_lock:
+            self._merge(self._base, shard)
+            del self._shards[key]
+
+    def _merge(self, target, values):
+        raise NotImplementedError
+
+    def _collect(self):
+        """Suma del fragmento base y los fragmentos de los hilos vivos"""
+        merged = {}
+        with self._shards_lock:
+            self._merge(merged, self._base)
+            shards = list(self._shards.values())
+        # Un fragmento retirado después de copiar la base se cuenta una sola vez, aquí.
+        # dict.copy() es atómico respecto de las escrituras de otros hilos
+        for shard in shards:
+            self._merge(merged, shard.copy())
+        return merged
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, target, values):
+        for labels, value in values.items():
+            target[labels] = target.get(labels, 0) + value
+
+    def _samples(self):
+        for labels, value in sorted(self._collect().items()):
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Gauge(Counter):
+    """Indicador que sube y baja; inc y dec de una misma petición ocurren en el mismo hilo"""
+
+    kind = 'gauge'
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # Un contador por límite, uno para +Inf y la suma al final
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def _merge(self, target, values):
+        for labels, counts in values.items():
+            total = target.get(labels)
+            target[labels] = list(counts) if total is None else [a + b for a, b in zip(total, counts)]
+
+    def _samples(self):
+        for labels, counts in sorted(self._collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}'
+            label_text = _format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{label_text} {_format_value(counts[-1])}'
+            yield f'{self.name}_count{label_text} {cumulative}'
+
+
+class AppMetrics:
+    """Métricas de la aplicación y los puntos de enganche para el pool y el cursor instrumentado"""
+
+    def __init__(self):
+        self.http_requests = Counter(
+            'dq_http_requests_total', 'Peticiones HTTP atendidas', ('endpoint', 'method', 'status'))
+        self.http_duration = Histogram(
+            'dq_http_request_duration_seconds', 'Duración de las peticiones HTTP', ('endpoint',), HTTP_BUCKETS)
+        self.http_in_flight = Gauge(
+            'dq_http_requests_in_flight', 'Peticiones HTTP en curso', ('endpoint',))
+        self.db_query_duration = Histogram(
+            'dq_db_query_duration_seconds', 'Duración de las sentencias SQL', ('statement',), DB_BUCKETS)
+        self.db_connections_opened = Counter(
+            'dq_db_connections_opened_total', 'Conexiones físicas abiertas por controlador', ('driver',))
+        self.db_connection_failures = Counter(
+            'dq_db_connection_failures_total', 'Intentos de conexión fallidos por controlador', ('driver',))
+        self.metrics = [
+            self.http_requests, self.http_duration, self.http_in_flight,
+            self.db_query_duration, self.db_connections_opened, self.db_connection_failures,
+        ]
+        self.pool = None
+
+    def record_connection(self, driver, error=None):
+        """on_connect del pool: se llama tras cada intento de abrir una conexión física"""
+        if error is None:
+            self.db_connections_opened.inc(driver)
+        else:
+            self.db_connection_failures.inc(driver)
+
+    def record_query(self, sql, duration):
+        """Oyente del cursor instrumentado: una observación por sentencia"""
+        words = sql.split(None, 1)
+        kind = words[0].lower() if words else ''
+        self.db_query_duration.observe(duration, kind if kind in STATEMENT_KINDS else 'other')
+
+    def watch_pool(self, pool):
+        """Publica el estado del pool; se lee de pool.stats() solo al generar /metrics"""
+        self.pool = pool
+
+    def _pool_lines(self):
+        stats = self.pool.stats()
+        driver = _escape(stats['driver'] or '')
+        lines = [
+            '# HELP dq_db_pool_connections Conexiones del pool por estado',
+            '# TYPE dq_db_pool_connections gauge',
+            f'dq_db_pool_connections{{driver="{driver}",state="idle"}} {stats["idle"]}',
+            f'dq_db_pool_connections{{driver="{driver}",state="in_use"}} {stats["in_use"]}',
+            '# HELP dq_db_pool_max_connections Máximo de conexiones del pool',
+            '# TYPE dq_db_pool_max_connections gauge',
+            f'dq_db_pool_max_connections {stats["max_size"]}',
+        ]
+        for key, documentation in (('waits', 'Esperas por una conexión libre'),
+                                   ('timeouts', 'Esperas que agotaron el tiempo máximo'),
+                                   ('recycled', 'Conexiones recicladas por antigüedad'),
+                                   ('health_check_failures', 'Conexiones descartadas por la verificación')):
+            lines.extend([
+                f'# HELP dq_db_pool_{key}_total {documentation}',
+                f'# TYPE dq_db_pool_{key}_total counter',
+                f'dq_db_pool_{key}_total {stats[key]}',
+            ])
+        return lines
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        if self.pool is not None:
+            lines.extend(self._pool_lines())
+        return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """Registra la medición de peticiones y la ruta /metrics; devuelve el AppMetrics o None si está desactivado.
+
+    Está desactivado por defecto (METRICS_ENABLED). /metrics exige el
+    encabezado 'Authorization: Bearer <METRICS_TOKEN>'; solo en modo debug se
+    sirve sin token, para no publicar el tráfico por ruta.
+    """
+    if not app.config.get('METRICS_ENABLED', False):
+        return None
+
+    app_metrics = AppMetrics()
+
+    @app.before_request
+    def start_request_metrics():
+        if request.endpoint == 'metrics':
+            return
+        endpoint = request.endpoint or 'none'
+        g.metrics_endpoint = endpoint
+        g.metrics_started = time.perf_counter()
+        app_metrics.http_in_flight.inc(endpoint)
+
+    @app.after_request
+    def record_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        endpoint = g.pop('metrics_endpoint', None)
+        if endpoint is None:
+            return
+        app_metrics.http_in_flight.dec(endpoint)
+        app_metrics.http_duration.observe(time.perf_counter() - g.pop('metrics_started'), endpoint)
+        # Sin after_request (excepción no manejada) la respuesta fue un 500
+        status = 500 if exc is not None else g.pop('metrics_status', 500)
+        app_metrics.http_requests.inc(endpoint, request.method, str(status))
+
+    def metrics():
+        token = app.config.get('METRICS_TOKEN')
+        if not token:
+            if not app.debug:
+                return app.response_class('Defina METRICS_TOKEN para usar /metrics fuera del modo debug\n',
+                                          status=403, mimetype='text/plain')
+        elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return app.response_class('No autorizado\n', status=401, mimetype='text/plain')
+        return app.response_class(app_metrics.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
+    return app_metrics
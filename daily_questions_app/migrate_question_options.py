@@ -0,0 +1,57 @@
+import pyodbc
+
+import question_options
+
+def migrate_question_options():
+    conn_str = (
+        "DRIVER={SQL Server};"
+        "SERVER=DESKTOP-PIDFCJG;"
+        "DATABASE=DailyQuestions;"
+        "Trusted_Connection=yes;"
+    )
+
+    try:
+        conn = pyodbc.connect(conn_str)
+        cursor = conn.cursor()
+
+        print("Verificando si la columna version existe...")
+        cursor.execute('''
+            IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS
+                          WHERE TABLE_NAME = 'question' AND COLUMN_NAME = 'version')
+            BEGIN
+                ALTER TABLE question ADD version INT NOT NULL DEFAULT 1;
+            END
+        ''')
+        conn.commit()
+
+        print("Convirtiendo las opciones al formato JSON...")
+        cursor.execute('SELECT id, options FROM question WHERE options IS NOT NULL')
+        updates = []
+        for question_id, options in cursor.fetchall():
+            canonical = question_options.to_storage(question_options.parse_stored(options))
+            if canonical != options:
+                updates.append((canonical, question_id))
+
+        if updates:
+            # La versión cambia para que la caché de opciones no use el valor anterior
+            cursor.fast_executemany = True
+            cursor.executemany(
+                'UPDATE question SET options = ?, version = version + 1 WHERE id = ?',
+                updates
+            )
+
+        conn.commit()
+        print(f"Preguntas convertidas: {len(updates)}")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        if 'conn' in locals() and conn:
+            conn.rollback()
+    finally:
+        if 'conn' in locals() and conn:
+            conn.close()
+
+if __name__ == "__main__":
+    print("Migrando las opciones de las preguntas a JSON...")
+    migrate_question_options()
+    print("Proceso completado.")
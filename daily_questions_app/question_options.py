@@ -0,0 +1,48 @@
+import ast
+import json
+
+
+def to_storage(options_list):
+    """Forma canónica de la columna options: arreglo JSON, o None si no hay opciones"""
+    if not options_list:
+        return None
+    return json.dumps(list(options_list), ensure_ascii=False)
+
+
+def parse_input(text):
+    """Convierte el texto del formulario (una opción por línea, guion inicial opcional) en una lista"""
+    options_list = []
+    for opt in (text or '').split('\n'):
+        opt = opt.strip()
+        # Eliminar guión inicial si existe
+        if opt.startswith('-'):
+            opt = opt[1:].strip()
+        if opt:  # Solo agregar si no está vacío
+            options_list.append(opt)
+    return options_list
+
+
+def parse_stored(value):
+    """Decodifica el valor guardado en options.
+
+    La forma canónica es un arreglo JSON; las filas anteriores a la migración
+    pueden tener una lista de Python ("['a', 'b']") o valores separados por
+    comas. Nunca se evalúa el texto como código.
+    """
+    if not value or not isinstance(value, str):
+        return []
+    value = value.strip()
+    if value.startswith('[') and value.endswith(']'):
+        try:
+            options_list = json.loads(value)
+        except ValueError:
+            try:
+                options_list = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                options_list = None
+        if isinstance(options_list, (list, tuple)):
+            return [str(opt).strip() for opt in options_list if opt is not None and str(opt).strip()]
+        value = value[1:-1]
+    # Formato anterior: valores separados por comas o por líneas
+    separator = '\n' if '\n' in value else ','
+    return [opt.strip() for opt in value.split(separator) if opt.strip()]
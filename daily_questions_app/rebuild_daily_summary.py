@@ -0,0 +1,90 @@
+import pyodbc
+
+CREATE_TABLE_SQL = '''
+    IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'user_daily_summary')
+    BEGIN
+        CREATE TABLE user_daily_summary (
+            user_id INT NOT NULL,
+            date DATE NOT NULL,
+            answered_count INT NOT NULL DEFAULT 0,
+            required_answered INT NOT NULL DEFAULT 0,
+            required_total INT NOT NULL DEFAULT 0,
+            is_complete BIT NOT NULL DEFAULT 0,
+            updated_at DATETIME NOT NULL DEFAULT GETDATE(),
+            CONSTRAINT PK_user_daily_summary PRIMARY KEY (user_id, date),
+            FOREIGN KEY (user_id) REFERENCES [user](id)
+        )
+    END
+'''
+
+# Reconstruye el resumen a partir de response. El total de preguntas requeridas
+# del histórico no se conoce, se usa el de las preguntas activas actuales.
+REBUILD_SQL = '''
+    INSERT INTO user_daily_summary
+        (user_id, date, answered_count, required_answered, required_total, is_complete, updated_at)
+    SELECT
+        d.user_id, d.date, d.answered_count, d.required_answered, COALESCE(req.total, 0),
+        CASE WHEN d.required_answered >= COALESCE(req.total, 0) THEN 1 ELSE 0 END,
+        GETDATE()
+    FROM (
+        SELECT
+            q.assigned_user_id AS user_id,
+            CAST(r.date AS DATE) AS date,
+            COUNT(r.id) AS answered_count,
+            SUM(CASE WHEN q.is_required = 1 AND q.active = 1 THEN 1 ELSE 0 END) AS required_answered
+        FROM response r
+        INNER JOIN question q ON r.question_id = q.id
+        WHERE q.assigned_user_id IS NOT NULL {user_filter}
+        GROUP BY q.assigned_user_id, CAST(r.date AS DATE)
+    ) d
+    LEFT JOIN (
+        SELECT assigned_user_id, COUNT(*) AS total
+        FROM question
+        WHERE is_required = 1 AND active = 1
+        GROUP BY assigned_user_id
+    ) req ON req.assigned_user_id = d.user_id
+'''
+
+def rebuild_daily_summary(user_id=None):
+    conn_str = (
+        "DRIVER={SQL Server};"
+        "SERVER=DESKTOP-PIDFCJG;"
+        "DATABASE=DailyQuestions;"
+        "Trusted_Connection=yes;"
+    )
+
+    try:
+        conn = pyodbc.connect(conn_str)
+        cursor = conn.cursor()
+
+        print("Creando/verificando la tabla user_daily_summary...")
+        cursor.execute(CREATE_TABLE_SQL)
+
+        if user_id is None:
+            print("Reconstruyendo el resumen diario de todos los usuarios...")
+            cursor.execute('DELETE FROM user_daily_summary')
+            cursor.execute(REBUILD_SQL.format(user_filter=''))
+        else:
+            print(f"Reconstruyendo el resumen diario del usuario {user_id}...")
+            cursor.execute('DELETE FROM user_daily_summary WHERE user_id = ?', (user_id,))
+            cursor.execute(REBUILD_SQL.format(user_filter='AND q.assigned_user_id = ?'), (user_id,))
+        print(f"Días reconstruidos: {max(cursor.rowcount, 0)}")
+
+        conn.commit()
+        print("Resumen diario reconstruido exitosamente!")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        if 'conn' in locals() and conn:
+            conn.rollback()
+    finally:
+        if 'conn' in locals() and conn:
+            conn.close()
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and not sys.argv[1].isdigit()):
+        print("Uso: python rebuild_daily_summary.py [id_de_usuario]")
+        sys.exit(1)
+
+    rebuild_daily_summary(int(sys.argv[1]) if len(sys.argv) == 2 else None)
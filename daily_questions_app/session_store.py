@@ -0,0 +1,175 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+
+class SQLiteSession(SecureCookieSession):
+    """Sesión guardada en el servidor; la cookie solo lleva el identificador"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        super().__init__(initial)
+        self.sid = sid
+        self.new = new
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """Sesiones en una base SQLite local en modo WAL.
+
+    La expiración está indexada y las sesiones vencidas se borran por lotes
+    como máximo una vez cada sweep_interval segundos. Una sesión sin cambios
+    no se reescribe; solo se extiende su expiración cuando ya pasó la mitad
+    de su vida, así las peticiones de lectura no escriben en disco.
+    """
+
+    serializer = TaggedJSONSerializer()
+    session_class = SQLiteSession
+
+    def __init__(self, path, sweep_interval=300, sweep_batch=500):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self._local = threading.local()
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._create_schema()
+
+    def _connection(self):
+        # sqlite3 no comparte conexiones entre hilos: una por hilo, y nueva tras un fork de gunicorn
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_schema(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS session (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_session_expires_at ON session (expires_at)')
+
+    def _lifetime(self, app):
+        return app.permanent_session_lifetime.total_seconds()
+
+    def sweep(self, now=None):
+        """Borra las sesiones vencidas por lotes; devuelve cuántas se eliminaron"""
+        now = now or time.time()
+        conn = self._connection()
+        removed = 0
+        while True:
+            cursor = conn.execute(
+                'DELETE FROM session WHERE id IN '
+                '(SELECT id FROM session WHERE expires_at < ? LIMIT ?)',
+                (now, self.sweep_batch)
+            )
+            removed += cursor.rowcount
+            if cursor.rowcount < self.sweep_batch:
+                return removed
+
+    def _maybe_sweep(self, now):
+        if now - self._last_sweep < self.sweep_interval or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            self.sweep(now)
+        finally:
+            self._sweep_lock.release()
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            row = self._connection().execute(
+                'SELECT data, expires_at FROM session WHERE id = ? AND expires_at >= ?',
+                (sid, time.time())
+            ).fetchone()
+            if row is not None:
+                try:
+                    session = self.session_class(self.serializer.loads(row[0]), sid=sid)
+                    session.expires_at = row[1]
+                    return session
+                except ValueError:
+                    pass
+        return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        now = time.time()
+        self._maybe_sweep(now)
+
+        if not session:
+            # Sesión vaciada (por ejemplo logout): borrar la fila y la cookie
+            if session.modified and not session.new:
+                self._connection().execute('DELETE FROM session WHERE id = ?', (session.sid,))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        lifetime = self._lifetime(app)
+        expires_at = now + lifetime
+        if session.modified or session.new:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO session (id, data, expires_at) VALUES (?, ?, ?)',
+                (session.sid, self.serializer.dumps(dict(session)), expires_at)
+            )
+        elif getattr(session, 'expires_at', 0) - now < lifetime / 2:
+            # Sin cambios: solo se extiende la expiración cuando ya pasó la mitad de su vida
+            self._connection().execute(
+                'UPDATE session SET expires_at = ? WHERE id = ?', (expires_at, session.sid)
+            )
+        else:
+            return
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def init_session(app):
+    """Configura el almacén de sesiones según SESSION_BACKEND.
+
+    - 'sqlite' (por defecto): sesiones en el servidor, en SESSION_SQLITE_PATH.
+    - 'cookie': sesión firmada en la propia cookie; para datos pequeños.
+    - 'filesystem': el almacén anterior de Flask-Session (un archivo por sesión).
+    """
+    backend = app.config.get('SESSION_BACKEND', 'sqlite')
+    if backend == 'sqlite':
+        app.session_interface = SQLiteSessionInterface(
+            app.config['SESSION_SQLITE_PATH'],
+            sweep_interval=app.config.get('SESSION_SWEEP_INTERVAL', 300)
+        )
+    elif backend == 'filesystem':
+        from flask_session import Session
+
+        app.config['SESSION_TYPE'] = 'filesystem'
+        os.makedirs(app.config['SESSION_FILE_DIR'], exist_ok=True)
+        Session(app)
+    elif backend != 'cookie':
+        raise ValueError(f"SESSION_BACKEND no válido: {backend}")
+    # 'cookie' usa la interfaz por defecto de Flask, que solo envía la cookie si la sesión cambió
+    return backend
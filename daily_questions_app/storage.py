@@ -0,0 +1,626 @@
+"""Capa de acceso a datos: todas las sentencias SQL de la aplicación, por motor.
+
+SQLServerStorage conserva las sentencias T-SQL (OUTPUT INSERTED, MERGE, TOP,
+GETDATE) y usa el pool de conexiones pyodbc. SQLiteStorage guarda los datos
+en un archivo local en modo WAL, sin servidor ni viaje de red, para
+instalaciones de un solo nodo y para los benchmarks. Se elige con
+DB_BACKEND.
+
+Los métodos reciben el cursor de la unidad de trabajo en curso, de modo que
+la transacción sigue en manos de get_db_connection y de la petición. Las
+sentencias son constantes: SQLite reutiliza las ya preparadas desde la caché
+de cada conexión en lugar de volver a compilarlas.
+"""
+import logging
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+
+from db_pool import ConnectionPool, SQLiteConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Orden de las columnas que espera Question.from_row
+QUESTION_COLUMNS = 'id, text, type, options, active, created_at, assigned_user_id, descripcion, is_required, categoria, version'
+
+
+class Storage(ABC):
+    """Sentencias comunes a los dos motores; SQLite acepta [user] igual que SQL Server"""
+
+    name = None
+    # Máximo de respuestas que upsert_day sincroniza de una vez (None: sin límite)
+    UPSERT_MAX_ROWS = None
+
+    @abstractmethod
+    def create_pool(self, **options):
+        """Crea el pool de conexiones del motor"""
+
+    # Usuarios
+    def get_user(self, cursor, user_id):
+        cursor.execute('SELECT id, username, password FROM [user] WHERE id = ?', (user_id,))
+        return cursor.fetchone()
+
+    def get_user_by_username(self, cursor, username):
+        cursor.execute('SELECT id, username, password FROM [user] WHERE username = ?', (username,))
+        return cursor.fetchone()
+
+    def username_exists(self, cursor, username):
+        cursor.execute('SELECT id FROM [user] WHERE username = ?', (username,))
+        return cursor.fetchone() is not None
+
+    def list_users(self, cursor):
+        cursor.execute('SELECT id, username FROM [user] ORDER BY username')
+        return cursor.fetchall()
+
+    @abstractmethod
+    def create_user(self, cursor, username, password_hash):
+        """Crea el usuario y devuelve su id"""
+
+    # Preguntas
+    def all_questions(self, cursor):
+        cursor.execute(f'SELECT {QUESTION_COLUMNS} FROM question')
+        return cursor.fetchall()
+
+    def questions_by_user(self, cursor, user_id):
+        cursor.execute(f'SELECT {QUESTION_COLUMNS} FROM question WHERE assigned_user_id = ?', (user_id,))
+        return cursor.fetchall()
+
+    @abstractmethod
+    def create_question(self, cursor, text, type, options, assigned_user_id, descripcion, is_required, categoria, active):
+        """Crea la pregunta y devuelve su id"""
+
+    def question_owner(self, cursor, question_id):
+        """Fila (assigned_user_id,) de la pregunta, o None si no existe"""
+        cursor.execute('SELECT assigned_user_id FROM question WHERE id = ?', (question_id,))
+        return cursor.fetchone()
+
+    def question_status(self, cursor, question_id, user_id):
+        """Fila (active,) de la pregunta si pertenece al usuario, o None"""
+        cursor.execute('SELECT active FROM question WHERE id = ? AND assigned_user_id = ?', (question_id, user_id))
+        return cursor.fetchone()
+
+    def update_question(self, cursor, question_id, text, descripcion, type, categoria, is_required, options=None):
+        """Actualiza los campos editables (no 'active'); las opciones solo si se indican"""
+        cursor.execute(
+            'UPDATE question SET text = ?, descripcion = ?, type = ?, categoria = ?, is_required = ?, version = version + 1' +
+            (', options = ?' if options is not None else '') + ' WHERE id = ?',
+            (text, descripcion, type, categoria, is_required,
+             *([options] if options is not None else []), question_id)
+        )
+
+    def set_question_active(self, cursor, question_id, user_id, active):
+        cursor.execute(
+            'UPDATE question SET active = ?, version = version + 1 WHERE id = ? AND assigned_user_id = ?',
+            (active, question_id, user_id)
+        )
+
+    def delete_question(self, cursor, question_id):
+        cursor.execute('DELETE FROM question WHERE id = ?', (question_id,))
+
+    # Respuestas
+    def insert_response(self, cursor, question_id, response_text, date_value):
+        cursor.execute(
+            'INSERT INTO response (question_id, response, date) VALUES (?, ?, ?)',
+            (question_id, response_text, date_value)
+        )
+
+    def bulk_insert_responses(self, cursor, rows):
+        """Inserta varias respuestas (question_id, response, date) con una sola llamada"""
+        if not rows:
+            return 0
+        cursor.executemany('INSERT INTO response (question_id, response, date) VALUES (?, ?, ?)', rows)
+        return len(rows)
+
+    def delete_day(self, cursor, user_id, day_start, day_end):
+        """Borra las respuestas del usuario en [day_start, day_end)"""
+        cursor.execute(
+            'DELETE FROM response WHERE date >= ? AND date < ? '
+            'AND question_id IN (SELECT id FROM question WHERE assigned_user_id = ?)',
+            (day_start, day_end, user_id)
+        )
+        return max(cursor.rowcount, 0)
+
+    @abstractmethod
+    def upsert_day(self, cursor, user_id, day_start, next_day, date_value, answers):
+        """Sincroniza las respuestas del día con answers {question_id: respuesta}; devuelve los conteos"""
+
+    def count_responses(self, cursor, day_start, day_end):
+        cursor.execute('SELECT COUNT(*) FROM response WHERE date >= ? AND date < ?', (day_start, day_end))
+        row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else 0
+
+    def responses_between(self, cursor, user_id, day_start, day_end):
+        """Filas (question_id, response, date) del usuario en el intervalo"""
+        cursor.execute('''
+            SELECT r.question_id, r.response, r.date
+            FROM response r
+            INNER JOIN question q ON r.question_id = q.id
+            WHERE r.date >= ? AND r.date < ?
+            AND q.assigned_user_id = ?
+        ''', (day_start, day_end, user_id))
+        return cursor.fetchall()
+
+    def responses_with_text(self, cursor, user_id, day_start, day_end):
+        """Filas (pregunta, respuesta, date) del usuario en el intervalo, por id de pregunta"""
+        cursor.execute('''
+            SELECT q.text as pregunta, r.response as respuesta, r.date
+            FROM response r
+            JOIN question q ON r.question_id = q.id
+            WHERE r.date >= ? AND r.date < ?
+            AND q.assigned_user_id = ?
+            ORDER BY q.id
+        ''', (day_start, day_end, user_id))
+        return cursor.fetchall()
+
+    def weekly_responses(self, cursor, user_id, start_date, end_date):
+        """Ejecuta la consulta (question_id, text, type, response_id, response, date) con todas
+        las preguntas del usuario y sus respuestas del intervalo; devuelve el cursor"""
+        cursor.execute('''
+            SELECT q.id, q.text, q.type, r.id, r.response, r.date
+            FROM question q
+            LEFT JOIN response r ON q.id = r.question_id
+                AND r.date >= ? AND r.date < ?
+            WHERE q.assigned_user_id = ?
+            ORDER BY q.id, r.date
+        ''', (start_date, end_date, user_id))
+        return cursor
+
+    def history(self, cursor, user_id, start_date, end_date, question_id=None):
+        """Ejecuta la consulta (question_id, text, type, response_id, response, date) del historial; devuelve el cursor"""
+        sql = '''
+            SELECT r.question_id, q.text, q.type, r.id, r.response, r.date
+            FROM response r
+            JOIN question q ON r.question_id = q.id
+            WHERE q.assigned_user_id = ?
+            AND r.date >= ? AND r.date < ?
+        '''
+        params = [user_id, start_date, end_date]
+        if question_id is not None:
+            sql += ' AND r.question_id = ?'
+            params.append(question_id)
+        sql += ' ORDER BY r.date, r.question_id'
+        cursor.execute(sql, params)
+        return cursor
+
+    def responses_page(self, cursor, user_id, limit, question_id=None, categoria=None, after=None):
+        """Hasta limit filas (id, question_id, text, type, categoria, response, date) de la más
+        reciente a la más antigua; after es la posición (date, id) de la última fila entregada"""
+        sql = '''
+            r.id, r.question_id, q.text, q.type, q.categoria, r.response, r.date
+            FROM response r
+            JOIN question q ON r.question_id = q.id
+            WHERE q.assigned_user_id = ?
+        '''
+        params = [user_id]
+        if question_id is not None:
+            sql += ' AND r.question_id = ?'
+            params.append(question_id)
+        if categoria:
+            sql += ' AND q.categoria = ?'
+            params.append(categoria)
+        if after is not None:
+            # Continuar justo después de la última fila entregada, sin OFFSET
+            last_date, last_id = after
+            sql += ' AND (r.date < ? OR (r.date = ? AND r.id < ?))'
+            params.extend([last_date, last_date, last_id])
+        sql += ' ORDER BY r.date DESC, r.id DESC'
+        cursor.execute(*self.select_limited(sql, params, limit))
+        return cursor.fetchall()
+
+    @abstractmethod
+    def select_limited(self, body, params, limit):
+        """Devuelve (sql, params) de 'SELECT body' limitado a limit filas"""
+
+    # Resumen diario (user_daily_summary)
+    @abstractmethod
+    def record_day(self, cursor, user_id, date_value, answered_count, required_answered, required_total, is_complete):
+        """Guarda o actualiza el resumen del día del usuario"""
+
+    def summary_totals(self, cursor, user_id):
+        """Devuelve (dias_respondidos, total_respuestas, total_preguntas) leyendo solo el resumen"""
+        cursor.execute('''
+            SELECT
+                COUNT(*) as dias_respondidos,
+                COALESCE(SUM(answered_count), 0) as total_respuestas,
+                (SELECT COUNT(*) FROM question WHERE assigned_user_id = ?) as total_preguntas
+            FROM user_daily_summary
+            WHERE user_id = ?
+        ''', (user_id, user_id))
+        row = cursor.fetchone()
+        if not row:
+            return 0, 0, 0
+        return row[0] or 0, row[1] or 0, row[2] or 0
+
+    @abstractmethod
+    def rebuild_daily_summary(self, cursor, user_id):
+        """Reconstruye el resumen diario del usuario a partir de response"""
+
+
+class SQLServerStorage(Storage):
+    """SQL Server a través de pyodbc (DB_BACKEND=sqlserver)"""
+
+    name = 'sqlserver'
+    # 2 parámetros por fila más 4 fijos, por debajo del límite de 2100 de SQL Server
+    UPSERT_MAX_ROWS = 1000
+
+    def __init__(self, conn_str_template):
+        self.conn_str_template = conn_str_template
+
+    def create_pool(self, **options):
+        return ConnectionPool(self.conn_str_template, **options)
+
+    def create_user(self, cursor, username, password_hash):
+        cursor.execute(
+            'INSERT INTO [user] (username, password) OUTPUT INSERTED.id VALUES (?, ?)',
+            (username, password_hash)
+        )
+        return cursor.fetchone()[0]
+
+    def create_question(self, cursor, text, type, options, assigned_user_id, descripcion, is_required, categoria, active):
+        cursor.execute(
+            'INSERT INTO question (text, type, options, assigned_user_id, descripcion, is_required, categoria, active, created_at) OUTPUT INSERTED.id VALUES (?, ?, ?, ?, ?, ?, ?, ?, GETDATE())',
+            (text, type, options, assigned_user_id, descripcion, is_required, categoria, active)
+        )
+        return cursor.fetchone()[0]
+
+    def bulk_insert_responses(self, cursor, rows):
+        # fast_executemany envía todos los parámetros como un arreglo en un único lote
+        cursor.fast_executemany = True
+        try:
+            return super().bulk_insert_responses(cursor, rows)
+        finally:
+            cursor.fast_executemany = False
+
+    def delete_day(self, cursor, user_id, day_start, day_end):
+        cursor.execute('''
+            DELETE r
+            FROM response r
+            INNER JOIN question q ON r.question_id = q.id
+            WHERE r.date >= ? AND r.date < ?
+            AND q.assigned_user_id = ?
+        ''', (day_start, day_end, user_id))
+        return max(cursor.rowcount, 0)
+
+    def upsert_day(self, cursor, user_id, day_start, next_day, date_value, answers):
+        """Una sola sentencia MERGE: inserta las nuevas, actualiza las que cambiaron y
+        elimina las que ya no se enviaron.
+
+        Bajo READ COMMITTED dos envíos simultáneos del mismo día podrían tomar
+        ambos la rama NOT MATCHED e insertar dos veces (error por el índice
+        único). UPDLOCK, HOLDLOCK bloquea el rango leído hasta el commit: el
+        segundo envío espera y ve las filas del primero.
+        """
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        if not answers:
+            counts['deleted'] = Storage.delete_day(self, cursor, user_id, day_start, next_day)
+            return counts
+
+        values_sql = ', '.join(['(?, ?)'] * len(answers))
+        params = [day_start, next_day, user_id]
+        for question_id, response_text in answers.items():
+            params.extend((question_id, response_text))
+        params.append(date_value)
+
+        cursor.execute(f'''
+            WITH target AS (
+                SELECT question_id, response, date
+                FROM response WITH (UPDLOCK, HOLDLOCK)
+                WHERE date >= ? AND date < ?
+                AND question_id IN (SELECT id FROM question WHERE assigned_user_id = ?)
+            )
+            MERGE target AS t
+            USING (VALUES {values_sql}) AS s (question_id, response)
+                ON t.question_id = s.question_id
+            WHEN MATCHED AND CAST(t.response AS VARBINARY(MAX)) <> CAST(s.response AS VARBINARY(MAX)) THEN
+                UPDATE SET t.response = s.response
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT (question_id, response, date) VALUES (s.question_id, s.response, ?)
+            WHEN NOT MATCHED BY SOURCE THEN
+                DELETE
+            OUTPUT $action;
+        ''', params)
+
+        for (action,) in cursor.fetchall():
+            if action == 'INSERT':
+                counts['inserted'] += 1
+            elif action == 'UPDATE':
+                counts['updated'] += 1
+            elif action == 'DELETE':
+                counts['deleted'] += 1
+        counts['unchanged'] = len(answers) - counts['inserted'] - counts['updated']
+        return counts
+
+    def select_limited(self, body, params, limit):
+        return 'SELECT TOP (?) ' + body, [limit] + list(params)
+
+    def record_day(self, cursor, user_id, date_value, answered_count, required_answered, required_total, is_complete):
+        cursor.execute('''
+            MERGE user_daily_summary WITH (HOLDLOCK) AS t
+            USING (SELECT ? AS user_id, ? AS date, ? AS answered_count,
+                          ? AS required_answered, ? AS required_total, ? AS is_complete) AS s
+                ON t.user_id = s.user_id AND t.date = s.date
+            WHEN MATCHED AND s.answered_count = 0 THEN
+                DELETE
+            WHEN MATCHED THEN
+                UPDATE SET answered_count = s.answered_count,
+                           required_answered = s.required_answered,
+                           required_total = s.required_total,
+                           is_complete = s.is_complete,
+                           updated_at = GETDATE()
+            WHEN NOT MATCHED BY TARGET AND s.answered_count > 0 THEN
+                INSERT (user_id, date, answered_count, required_answered, required_total, is_complete, updated_at)
+                VALUES (s.user_id, s.date, s.answered_count, s.required_answered,
+                        s.required_total, s.is_complete, GETDATE());
+        ''', (user_id, date_value, answered_count, required_answered, required_total, is_complete))
+
+    def rebuild_daily_summary(self, cursor, user_id):
+        # Las sentencias viven en el script de mantenimiento, que también crea la tabla
+        from rebuild_daily_summary import CREATE_TABLE_SQL, REBUILD_SQL
+
+        cursor.execute(CREATE_TABLE_SQL)
+        cursor.execute('DELETE FROM user_daily_summary WHERE user_id = ?', (user_id,))
+        cursor.execute(REBUILD_SQL.format(user_filter='AND q.assigned_user_id = ?'), (user_id,))
+
+
+# SQLite guarda las fechas como texto ISO; se convierten al leer las columnas DATE y DATETIME
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode('ascii')[:10]))
+sqlite3.register_converter('DATETIME', lambda value: datetime.fromisoformat(value.decode('ascii')))
+
+
+class SQLiteCursor(sqlite3.Cursor):
+    """Cursor con la interfaz de pyodbc que usa la aplicación (bloque with, fast_executemany)"""
+
+    fast_executemany = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+class SQLiteConnection(sqlite3.Connection):
+    """Conexión que entrega SQLiteCursor y admite conn.timeout como en pyodbc.
+
+    El tiempo máximo se aplica con un progress handler que interrumpe la
+    sentencia en curso cuando vence el plazo, contado desde que se asigna;
+    0 lo desactiva.
+    """
+
+    _timeout = 0
+
+    def cursor(self, factory=SQLiteCursor):
+        return super().cursor(factory)
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, seconds):
+        self._timeout = seconds
+        if not seconds:
+            self.set_progress_handler(None, 0)
+            return
+        deadline = time.monotonic() + seconds
+        self.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+
+
+class SQLiteStorage(Storage):
+    """Base SQLite local en modo WAL (DB_BACKEND=sqlite).
+
+    Cada conexión aplica pragmas para un servidor web: WAL con
+    synchronous=NORMAL (los lectores no bloquean al escritor y un commit no
+    espera al fsync del archivo principal), espera de hasta 5 s si otro
+    proceso está escribiendo, caché de páginas y mapeo en memoria, y
+    claves foráneas activas como en SQL Server. El esquema y los índices
+    equivalentes a add_indexes.py se crean al iniciar si no existen. Los ids
+    usan AUTOINCREMENT, como IDENTITY en SQL Server: un id borrado no se
+    vuelve a asignar (las cachés por id de pregunta dependen de eso).
+    """
+
+    name = 'sqlite'
+
+    SCHEMA = [
+        '''CREATE TABLE IF NOT EXISTS [user] (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            is_admin INTEGER NOT NULL DEFAULT 0
+        )''',
+        '''CREATE TABLE IF NOT EXISTS question (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            type TEXT NOT NULL,
+            options TEXT NULL,
+            active INTEGER NOT NULL DEFAULT 1,
+            created_at DATETIME NOT NULL DEFAULT (datetime('now', 'localtime')),
+            assigned_user_id INTEGER REFERENCES [user] (id),
+            descripcion TEXT NULL,
+            is_required INTEGER NOT NULL DEFAULT 0,
+            categoria TEXT NOT NULL DEFAULT 'General',
+            version INTEGER NOT NULL DEFAULT 1
+        )''',
+        '''CREATE TABLE IF NOT EXISTS response (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question_id INTEGER NOT NULL REFERENCES question (id),
+            response TEXT NOT NULL,
+            date DATE NOT NULL
+        )''',
+        # Sin rowid: las filas se guardan ordenadas por la clave (user_id, date)
+        '''CREATE TABLE IF NOT EXISTS user_daily_summary (
+            user_id INTEGER NOT NULL REFERENCES [user] (id),
+            date DATE NOT NULL,
+            answered_count INTEGER NOT NULL DEFAULT 0,
+            required_answered INTEGER NOT NULL DEFAULT 0,
+            required_total INTEGER NOT NULL DEFAULT 0,
+            is_complete INTEGER NOT NULL DEFAULT 0,
+            updated_at DATETIME NOT NULL DEFAULT (datetime('now', 'localtime')),
+            PRIMARY KEY (user_id, date)
+        ) WITHOUT ROWID''',
+        # Una respuesta por pregunta y día (add_response_unique_constraint.py); cubre question_id + date
+        'CREATE UNIQUE INDEX IF NOT EXISTS UX_response_question_date ON response (question_id, date)',
+        # SQLite no tiene INCLUDE: las columnas incluidas pasan a la clave
+        'CREATE INDEX IF NOT EXISTS IX_response_date ON response (date, question_id)',
+        'CREATE INDEX IF NOT EXISTS IX_question_assigned_user ON question (assigned_user_id, id)',
+    ]
+
+    PRAGMAS = [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA foreign_keys=ON',
+        'PRAGMA busy_timeout=5000',
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+    def __init__(self, path, cache_size_kb=16384, mmap_size=128 * 1024 * 1024, cached_statements=256):
+        self.path = path
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.create_schema()
+
+    def connect(self):
+        # Las conexiones del pool pasan de un hilo a otro, pero nunca las usan dos a la vez
+        conn = sqlite3.connect(
+            self.path, timeout=5, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False,
+            cached_statements=self.cached_statements, factory=SQLiteConnection
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        return conn
+
+    def create_schema(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.connect()
+        try:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            # Los archivos creados antes de usar AUTOINCREMENT reutilizan el id de la última fila borrada
+            legacy = [name for name, sql in conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name IN ('user', 'question', 'response')"
+            ) if 'AUTOINCREMENT' not in sql.upper()]
+            if legacy:
+                logger.warning("Las tablas %s de %s no usan AUTOINCREMENT; recree el archivo "
+                               "para que los ids borrados no se reutilicen", ', '.join(legacy), self.path)
+            # Actualiza las estadísticas del planificador si hace falta
+            conn.execute('PRAGMA optimize')
+        finally:
+            # Con gunicorn --preload esto corre en el proceso maestro: no dejar conexiones abiertas
+            conn.close()
+
+    def create_pool(self, **options):
+        return SQLiteConnectionPool(self.connect, **options)
+
+    def create_user(self, cursor, username, password_hash):
+        cursor.execute('INSERT INTO [user] (username, password) VALUES (?, ?)', (username, password_hash))
+        return cursor.lastrowid
+
+    def create_question(self, cursor, text, type, options, assigned_user_id, descripcion, is_required, categoria, active):
+        cursor.execute(
+            'INSERT INTO question (text, type, options, assigned_user_id, descripcion, is_required, categoria, active, created_at) '
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))",
+            (text, type, options, assigned_user_id, descripcion, is_required, categoria, active)
+        )
+        return cursor.lastrowid
+
+    def upsert_day(self, cursor, user_id, day_start, next_day, date_value, answers):
+        """Compara con las respuestas guardadas del día y escribe solo las diferencias.
+
+        Sin MERGE en SQLite, pero sin viaje de red: leer el día y aplicar
+        tres executemany cuesta menos que una sentencia por respuesta.
+        """
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        cursor.execute(
+            'SELECT id, question_id, response FROM response WHERE date >= ? AND date < ? '
+            'AND question_id IN (SELECT id FROM question WHERE assigned_user_id = ?)',
+            (day_start, next_day, user_id)
+        )
+        existing = {row[1]: (row[0], row[2]) for row in cursor.fetchall()}
+
+        inserts = []
+        updates = []
+        for question_id, response_text in answers.items():
+            current = existing.get(question_id)
+            if current is None:
+                inserts.append((question_id, response_text, date_value))
+            elif current[1] != response_text:
+                updates.append((response_text, current[0]))
+        deletes = [(response_id,) for question_id, (response_id, _) in existing.items() if question_id not in answers]
+
+        if inserts:
+            cursor.executemany('INSERT INTO response (question_id, response, date) VALUES (?, ?, ?)', inserts)
+        if updates:
+            cursor.executemany('UPDATE response SET response = ? WHERE id = ?', updates)
+        if deletes:
+            cursor.executemany('DELETE FROM response WHERE id = ?', deletes)
+
+        counts['inserted'] = len(inserts)
+        counts['updated'] = len(updates)
+        counts['deleted'] = len(deletes)
+        counts['unchanged'] = len(answers) - counts['inserted'] - counts['updated']
+        return counts
+
+    def responses_page(self, cursor, user_id, limit, question_id=None, categoria=None, after=None):
+        if after is not None and isinstance(after[0], datetime):
+            # date se guarda como 'YYYY-MM-DD': comparar con un datetime en texto daría otro orden
+            after = (after[0].date(), after[1])
+        return super().responses_page(cursor, user_id, limit, question_id, categoria, after)
+
+    def select_limited(self, body, params, limit):
+        return 'SELECT ' + body + ' LIMIT ?', list(params) + [limit]
+
+    def record_day(self, cursor, user_id, date_value, answered_count, required_answered, required_total, is_complete):
+        if answered_count == 0:
+            cursor.execute('DELETE FROM user_daily_summary WHERE user_id = ? AND date = ?', (user_id, date_value))
+            return
+        cursor.execute('''
+            INSERT INTO user_daily_summary
+                (user_id, date, answered_count, required_answered, required_total, is_complete, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, datetime('now', 'localtime'))
+            ON CONFLICT (user_id, date) DO UPDATE SET
+                answered_count = excluded.answered_count,
+                required_answered = excluded.required_answered,
+                required_total = excluded.required_total,
+                is_complete = excluded.is_complete,
+                updated_at = excluded.updated_at
+        ''', (user_id, date_value, answered_count, required_answered, required_total, is_complete))
+
+    def rebuild_daily_summary(self, cursor, user_id):
+        # Igual que REBUILD_SQL de rebuild_daily_summary.py; date ya es un día sin hora
+        cursor.execute('DELETE FROM user_daily_summary WHERE user_id = ?', (user_id,))
+        cursor.execute('''
+            INSERT INTO user_daily_summary
+                (user_id, date, answered_count, required_answered, required_total, is_complete, updated_at)
+            SELECT
+                d.user_id, d.date, d.answered_count, d.required_answered, COALESCE(req.total, 0),
+                CASE WHEN d.required_answered >= COALESCE(req.total, 0) THEN 1 ELSE 0 END,
+                datetime('now', 'localtime')
+            FROM (
+                SELECT
+                    q.assigned_user_id AS user_id,
+                    r.date AS date,
+                    COUNT(r.id) AS answered_count,
+                    SUM(CASE WHEN q.is_required = 1 AND q.active = 1 THEN 1 ELSE 0 END) AS required_answered
+                FROM response r
+                INNER JOIN question q ON r.question_id = q.id
+                WHERE q.assigned_user_id = ?
+                GROUP BY q.assigned_user_id, r.date
+            ) d
+            LEFT JOIN (
+                SELECT assigned_user_id, COUNT(*) AS total
+                FROM question
+                WHERE is_required = 1 AND active = 1
+                GROUP BY assigned_user_id
+            ) req ON req.assigned_user_id = d.user_id
+        ''', (user_id,))
@@ -0,0 +1,64 @@
+import os
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from jinja2.runtime import Undefined
+
+from cache import TTLCache
+
+
+class FragmentCacheExtension(Extension):
+    """Etiqueta {% cache clave[, ttl] %}...{% endcache %} para guardar fragmentos ya renderizados.
+
+    La clave es una tupla que debe incluir la versión de los datos que muestra
+    el fragmento (por ejemplo la versión del catálogo del usuario), así un
+    cambio produce una clave nueva sin invalidar nada. Si alguna parte de la
+    clave es None o no está definida, el fragmento se renderiza sin caché;
+    las vistas lo usan cuando cargaron datos de respaldo tras un error. Sin
+    ttl se usa el de la caché (FRAGMENT_CACHE_TTL).
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_cache_support', args), [], [], body).set_lineno(lineno)
+
+    def _cache_support(self, key, ttl, caller):
+        cache = self.environment.fragment_cache
+        parts = key if isinstance(key, (tuple, list)) else (key,)
+        if cache is None or any(part is None or isinstance(part, Undefined) for part in parts):
+            return caller()
+        key = tuple(parts)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.set(key, fragment, ttl)
+        return fragment
+
+
+def init_template_cache(app):
+    """Activa la caché de bytecode de Jinja en disco y la caché de fragmentos en memoria"""
+    cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Las plantillas compiladas sobreviven reinicios y se comparten entre workers
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if app.config.get('FRAGMENT_CACHE_SIZE', 0) > 0:
+        app.jinja_env.fragment_cache = TTLCache(
+            maxsize=app.config['FRAGMENT_CACHE_SIZE'],
+            ttl=app.config.get('FRAGMENT_CACHE_TTL', 600)
+        )
+    return app.jinja_env.fragment_cache
@@ -0,0 +1,73 @@
+"""Configuración común de las pruebas: la aplicación sobre una base SQLite temporal.
+
+La configuración de app.py se lee al importarlo, por eso las variables de
+entorno se fijan antes de la importación. El pool es pequeño y con poco tiempo
+de espera para que una conexión retenida se note enseguida.
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix='daily_questions_tests_')
+os.environ.update({
+    'DB_BACKEND': 'sqlite',
+    'SQLITE_DB_PATH': os.path.join(_TMP_DIR, 'daily_questions.sqlite3'),
+    'SESSION_BACKEND': 'sqlite',
+    'SESSION_SQLITE_PATH': os.path.join(_TMP_DIR, 'sessions.sqlite3'),
+    'SHARED_STATE_BACKEND': 'sqlite',
+    'SHARED_STATE_PATH': os.path.join(_TMP_DIR, 'shared_state.sqlite3'),
+    'JINJA_BYTECODE_CACHE_DIR': os.path.join(_TMP_DIR, 'jinja_cache'),
+    'ASSET_BUILD_ON_STARTUP': '0',
+    'SECRET_KEY': 'clave-de-pruebas',
+    'DB_POOL_MIN_SIZE': '1',
+    'DB_POOL_MAX_SIZE': '3',
+    'DB_POOL_CHECKOUT_TIMEOUT': '2',
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as daily_app  # noqa: E402
+import question_options  # noqa: E402
+
+TEST_PASSWORD = 'test-password'
+
+_usernames = itertools.count()
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    daily_app.app.testing = True
+    daily_app.init_db_pool()
+    return daily_app
+
+
+@pytest.fixture
+def user(app_module):
+    """Usuario nuevo con una pregunta activa de cada tipo"""
+    storage = app_module.storage
+    username = f'test_{next(_usernames)}'
+    options = {'select': ['Bien', 'Regular', 'Mal'], 'checkbox': ['Agua', 'Fruta'], 'radio': ['Sí', 'No']}
+    with app_module.get_db_connection() as conn:
+        cursor = conn.cursor()
+        user_id = storage.create_user(cursor, username, app_module.generate_password_hash(TEST_PASSWORD))
+        question_ids = [
+            storage.create_question(
+                cursor, f'Pregunta {question_type}', question_type,
+                question_options.to_storage(options.get(question_type, [])), user_id,
+                '', 0, 'General', 1
+            )
+            for question_type in app_module.Question.TYPES
+        ]
+    return {'id': user_id, 'username': username, 'question_ids': question_ids}
+
+
+@pytest.fixture
+def client(app_module, user):
+    """Cliente de pruebas con la sesión de user iniciada"""
+    client = app_module.app.test_client()
+    response = client.post('/login', data={'username': user['username'], 'password': TEST_PASSWORD})
+    assert response.status_code == 302
+    return client
@@ -0,0 +1,32 @@
+"""Panel de administración: lecturas en paralelo sin agotar el pool"""
+
+
+def test_admin_renders_without_waiting_when_pool_is_busy(app_module, client):
+    pool = app_module.db_pool
+    client.get('/admin')
+    # Solo queda libre la conexión que usará la propia petición
+    held = [pool.acquire() for _ in range(pool.max_size - 1)]
+    try:
+        before = pool.stats()
+        response = client.get('/admin')
+        after = pool.stats()
+    finally:
+        for pooled in held:
+            pool.release(pooled)
+    assert response.status_code == 200
+    assert after['waits'] == before['waits']
+    assert after['timeouts'] == before['timeouts']
+
+
+def test_admin_survives_failed_user_check(app_module, client, user, monkeypatch):
+    client.get('/admin')
+    # El usuario de la sesión ya está en caché; se fuerza que la verificación vaya a la base
+    monkeypatch.setattr(app_module.user_cache, 'get', lambda key, default=None: None)
+    monkeypatch.setattr(app_module.User, 'get', classmethod(lambda cls, user_id: cls(user['id'], user['username'], '')))
+
+    def failing_get_user(cursor, user_id):
+        raise RuntimeError('tiempo de espera agotado')
+
+    monkeypatch.setattr(app_module.storage, 'get_user', failing_get_user)
+    response = client.get('/admin')
+    assert response.status_code == 200
@@ -0,0 +1,39 @@
+"""Categorías derivadas del catálogo: /api/categories y el filtro de /admin siguen a cada escritura"""
+
+
+def categories(client):
+    response = client.get('/api/categories')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def active_in(client, categoria):
+    response = client.get('/api/admin/questions', query_string={'categoria': categoria, 'active': '1'})
+    assert response.status_code == 200
+    return response.get_json()['counts']['filtradas']
+
+
+def test_edit_toggle_delete_update_categories(client, user):
+    question_id = user['question_ids'][0]
+    assert categories(client)['counts'] == {'General': 4}
+    assert 'Salud' not in client.get('/admin').get_data(as_text=True)
+
+    response = client.put(f'/question/{question_id}', json={'text': 'Pregunta 0', 'type': 'text',
+                                                              'nueva_categoria': 'Salud'})
+    assert response.status_code == 200
+    data = categories(client)
+    assert data['counts'] == {'General': 3, 'Salud': 1}
+    assert data['categories'] == ['Todas', 'General', 'Salud']
+    assert 'Salud' in client.get('/admin').get_data(as_text=True)
+
+    assert active_in(client, 'Salud') == 1
+    # Las preguntas inactivas siguen contando en su categoría, pero el filtro por activas cambia
+    assert client.post(f'/question/{question_id}/toggle').status_code == 200
+    assert categories(client)['counts'] == {'General': 3, 'Salud': 1}
+    assert active_in(client, 'Salud') == 0
+
+    assert client.delete(f'/question/{question_id}').status_code == 200
+    data = categories(client)
+    assert data['counts'] == {'General': 3}
+    assert 'Salud' not in data['categories']
+    assert 'Salud' not in client.get('/admin').get_data(as_text=True)
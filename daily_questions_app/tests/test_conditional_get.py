@@ -0,0 +1,59 @@
+"""ETag de las vistas de estadísticas: 304 mientras no cambien los datos del usuario"""
+from datetime import date
+
+
+def submit(client, user, answer):
+    return client.post('/submit_responses', json={
+        'date': date.today().isoformat(),
+        'responses': {str(question_id): answer for question_id in user['question_ids']},
+    })
+
+
+def etag(client, path='/api/stats'):
+    response = client.get(path)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+def test_failed_or_unchanged_submit_keeps_etag(app_module, client, user, monkeypatch):
+    assert submit(client, user, 'Sí').status_code == 200
+    before = etag(client)
+
+    # Reenviar lo mismo no escribe nada
+    assert submit(client, user, 'Sí').status_code == 200
+    assert etag(client) == before
+
+    def failing_upsert(*args, **kwargs):
+        raise RuntimeError('fallo de escritura')
+
+    monkeypatch.setattr(app_module.Response, 'upsert_day', failing_upsert)
+    assert submit(client, user, 'No').status_code == 500
+    assert etag(client) == before
+
+
+def test_matching_etag_gets_304_until_data_changes(app_module, client, user):
+    for path in ('/stats', '/api/stats', '/api/stats/weekly_responses'):
+        tag = etag(client, path)
+        response = client.get(path, headers={'If-None-Match': tag})
+        assert response.status_code == 304
+        assert response.get_data() == b''
+        assert response.headers['ETag'] == tag
+
+    tag = etag(client)
+    assert submit(client, user, 'Sí').status_code == 200
+    after_submit = etag(client)
+    assert after_submit != tag
+    assert client.get('/api/stats', headers={'If-None-Match': tag}).status_code == 200
+
+
+def test_question_changes_change_etag(app_module, client, user):
+    question_id = user['question_ids'][0]
+    changes = [
+        lambda: client.put(f'/question/{question_id}', json={'text': 'Editada', 'type': 'text', 'categoria': 'General'}),
+        lambda: client.post(f'/question/{question_id}/toggle'),
+        lambda: client.delete(f'/question/{question_id}'),
+    ]
+    for change in changes:
+        tag = etag(client)
+        assert change().status_code == 200
+        assert etag(client) != tag
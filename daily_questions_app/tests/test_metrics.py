@@ -0,0 +1,47 @@
+"""Métricas: fragmentos por hilo y acceso a /metrics"""
+import threading
+
+import metrics
+
+
+def test_thread_shards_are_merged_when_threads_end():
+    counter = metrics.Counter('test_total', 'Prueba', ('route',))
+    histogram = metrics.Histogram('test_seconds', 'Prueba', ('route',))
+
+    def record():
+        counter.inc('a')
+        histogram.observe(0.02, 'a')
+
+    threads = [threading.Thread(target=record) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not counter._shards and not histogram._shards
+    assert counter._collect() == {('a',): 50}
+    assert sum(histogram._collect()[('a',)][:-1]) == 50
+
+
+def test_metrics_endpoint_requires_token_outside_debug():
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.config.update(METRICS_ENABLED=True)
+    metrics.init_metrics(app)
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 403
+
+    app.config['METRICS_TOKEN'] = 'secreto'
+    assert client.get('/metrics').status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer secreto'})
+    assert response.status_code == 200
+    assert 'dq_http_requests_total' in response.get_data(as_text=True)
+
+
+def test_metrics_disabled_by_default():
+    from flask import Flask
+
+    app = Flask(__name__)
+    assert metrics.init_metrics(app) is None
+    assert app.test_client().get('/metrics').status_code == 404
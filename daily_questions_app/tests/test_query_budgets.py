@@ -0,0 +1,38 @@
+"""Presupuesto de consultas de las rutas principales sobre SQLite.
+
+Cada ruta se pide una vez antes de medir para que las cachés (usuario,
+catálogo de preguntas, fragmentos) estén calientes: se mide el caso normal de
+una petición repetida. Si un cambio añade consultas, ajustar el límite aquí
+debe ser una decisión explícita.
+"""
+from datetime import date
+
+import pytest
+
+from db_instrumentation import assert_max_queries
+
+# Ruta: máximo de sentencias en una petición con las cachés calientes
+GET_BUDGETS = {
+    '/': 0,
+    '/admin': 2,
+    '/stats': 2,
+}
+SUBMIT_BUDGET = 3
+
+
+@pytest.mark.parametrize('url, limit', sorted(GET_BUDGETS.items()))
+def test_get_query_budget(client, url, limit):
+    assert client.get(url).status_code == 200
+    with assert_max_queries(limit, max_repeats=1):
+        assert client.get(url).status_code == 200
+
+
+def test_submit_responses_query_budget(client, user):
+    def payload(answer):
+        return {'date': date.today().isoformat(),
+                'responses': {str(question_id): answer for question_id in user['question_ids']}}
+
+    assert client.post('/submit_responses', json=payload('Sí')).status_code == 200
+    # Respuestas distintas para que se escriban las diferencias y no sea un envío sin cambios
+    with assert_max_queries(SUBMIT_BUDGET, max_repeats=1):
+        assert client.post('/submit_responses', json=payload('No')).status_code == 200
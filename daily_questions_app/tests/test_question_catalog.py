@@ -0,0 +1,50 @@
+"""Catálogo de preguntas en caché: cada escritura lo invalida de inmediato"""
+
+
+def catalog(app_module, user):
+    return app_module.get_question_catalog(user['id'])
+
+
+def by_id(app_module, user):
+    return {question.id: question for question in catalog(app_module, user).questions}
+
+
+def test_catalog_is_cached_between_reads(app_module, user):
+    assert catalog(app_module, user) is catalog(app_module, user)
+
+
+def test_edit_toggle_delete_and_add_invalidate_catalog(app_module, client, user):
+    question_id = user['question_ids'][0]
+    version = app_module.catalog_cache.version(user['id'])
+    cached = catalog(app_module, user)
+
+    response = client.put(f'/question/{question_id}', json={'text': 'Editada', 'type': 'text', 'categoria': 'General'})
+    assert response.status_code == 200
+    assert by_id(app_module, user)[question_id].text == 'Editada'
+
+    assert client.post(f'/question/{question_id}/toggle').status_code == 200
+    assert not by_id(app_module, user)[question_id].active
+    assert question_id not in app_module.get_question_catalog(user['id']).required_ids
+
+    assert client.delete(f'/question/{question_id}').status_code == 200
+    assert question_id not in catalog(app_module, user).ids
+
+    response = client.post('/add_question', json={'text': 'Nueva', 'type': 'text', 'active': True},
+                           headers={'X-Requested-With': 'XMLHttpRequest'})
+    assert response.status_code == 200
+    assert 'Nueva' in [question.text for question in catalog(app_module, user).questions]
+
+    assert app_module.catalog_cache.version(user['id']) >= version + 4
+    assert catalog(app_module, user) is not cached
+
+
+def test_submit_validates_against_fresh_catalog(app_module, client, user):
+    question_id = user['question_ids'][0]
+    catalog(app_module, user)
+    assert client.delete(f'/question/{question_id}').status_code == 200
+    # La pregunta borrada ya no se acepta aunque el catálogo anterior estuviera en caché
+    response = client.post('/submit_responses', json={
+        'date': '2024-01-01', 'responses': {str(question_id): 'x', str(user['question_ids'][1]): 'y'},
+    })
+    assert response.status_code == 200
+    assert response.get_json()['counts']['inserted'] == 1
@@ -0,0 +1,27 @@
+"""Borrado de preguntas: los ids no se reutilizan y la caché de opciones no sobrevive a la pregunta"""
+
+
+def add_question(client, text, options):
+    response = client.post('/add_question', json={
+        'text': text, 'type': 'radio', 'options': '\n'.join(options), 'active': True,
+    }, headers={'X-Requested-With': 'XMLHttpRequest'})
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def questions_by_text(app_module, user_id):
+    return {question.text: question for question in app_module.Question.get_by_user(user_id)}
+
+
+def test_deleted_question_options_do_not_leak_into_new_question(app_module, client, user):
+    add_question(client, 'Antigua', ['Sí', 'No'])
+    old = questions_by_text(app_module, user['id'])['Antigua']
+    assert list(old.options) == ['Sí', 'No']
+
+    # Se borra la pregunta de id más alto, el caso en que SQLite sin AUTOINCREMENT reutiliza el id
+    assert client.delete(f'/question/{old.id}').status_code == 200
+    add_question(client, 'Nueva', ['Rojo', 'Azul'])
+
+    new = questions_by_text(app_module, user['id'])['Nueva']
+    assert new.id != old.id
+    assert list(new.options) == ['Rojo', 'Azul']
+    assert not [key for key in app_module.options_cache._data if key[0] == old.id]
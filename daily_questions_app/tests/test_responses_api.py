@@ -0,0 +1,121 @@
+"""APIs de respuestas: paginación por conjunto de claves del historial y formato columnar"""
+import base64
+import json
+from datetime import date, timedelta
+
+import pytest
+
+
+def add_history(app_module, user, days):
+    """Una respuesta por pregunta y día durante days días; devuelve los ids creados"""
+    today = date.today()
+    rows = [
+        (question_id, f'respuesta {offset}', today - timedelta(days=offset))
+        for offset in range(days)
+        for question_id in user['question_ids']
+    ]
+    with app_module.get_db_connection() as conn:
+        cursor = conn.cursor()
+        app_module.Response.bulk_insert(cursor, rows)
+        placeholders = ','.join('?' * len(user['question_ids']))
+        cursor.execute(f'SELECT id FROM response WHERE question_id IN ({placeholders})', user['question_ids'])
+        return {row[0] for row in cursor.fetchall()}
+
+
+def all_pages(client, query=''):
+    items = []
+    cursor = None
+    while True:
+        url = f'/api/responses?limit=4{query}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data['responses']) <= 4
+        items.extend(data['responses'])
+        cursor = data['next_cursor']
+        if cursor is None:
+            return items
+
+
+def test_pages_return_each_response_once_newest_first(app_module, client, user):
+    ids = add_history(app_module, user, days=5)
+    items = all_pages(client)
+
+    returned = [item['id'] for item in items]
+    assert len(returned) == len(set(returned))
+    assert set(returned) == ids
+    keys = [(item['date'], item['id']) for item in items]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_question_filter_applies_to_every_page(app_module, client, user):
+    add_history(app_module, user, days=6)
+    question_id = user['question_ids'][0]
+    items = all_pages(client, f'&question_id={question_id}')
+    assert len(items) == 6
+    assert {item['question_id'] for item in items} == {question_id}
+
+
+def token(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    'no-es-base64!!',
+    token(['2024-01-01', 1]),
+    token({'d': '2024-01-01'}),
+    token({'d': 'ayer', 'i': 1}),
+])
+def test_invalid_cursor_is_rejected(client, cursor):
+    response = client.get(f'/api/responses?cursor={cursor}')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+
+def expand_columnar(data):
+    """(question_id, text, type, response, date) de cada respuesta del formato columnar"""
+    questions, responses = data['questions'], data['responses']
+    return [
+        (questions['id'][qi], questions['text'][qi], questions['type'][qi], value, data['dates'][di])
+        for qi, di, value in zip(responses['question'], responses['date'], responses['value'])
+    ]
+
+
+def test_weekly_columnar_has_seven_dates_and_aligned_fields(app_module, client, user):
+    add_history(app_module, user, days=3)
+    # Una respuesta de fuera de la semana no debe aparecer
+    with app_module.get_db_connection() as conn:
+        app_module.Response.bulk_insert(
+            conn.cursor(), [(user['question_ids'][0], 'antigua', date.today() - timedelta(days=8))]
+        )
+    response = client.get('/api/stats/weekly_responses?format=columnar')
+    assert response.status_code == 200
+    data = response.get_json()
+
+    today = date.today()
+    assert data['format'] == 'columnar'
+    assert data['dates'] == [(today - timedelta(days=6 - i)).isoformat() for i in range(7)]
+    questions, responses = data['questions'], data['responses']
+    assert len(questions['id']) == len(questions['text']) == len(questions['type']) == len(set(questions['id']))
+    assert len(responses['id']) == len(responses['question']) == len(responses['date']) == len(responses['value'])
+    assert all(0 <= qi < len(questions['id']) for qi in responses['question'])
+    assert all(0 <= di < 7 for di in responses['date'])
+
+    # Las mismas respuestas que el formato por filas
+    rows = client.get('/api/stats/weekly_responses').get_json()
+    expected = sorted(
+        (row['question_id'], row['text'], row['type'], row['response'], row['date'])
+        for row in rows if row['date'] is not None
+    )
+    assert sorted(expand_columnar(data)) == expected
+    assert len(expected) == 3 * len(user['question_ids'])
+
+
+@pytest.mark.parametrize('accept, columnar', [
+    ('application/vnd.dailyquestions.columnar+json', True),
+    ('*/*', False),
+    ('application/json', False),
+])
+def test_accept_header_selects_columnar_only_explicitly(client, accept, columnar):
+    data = client.get('/api/history', headers={'Accept': accept}).get_json()
+    assert isinstance(data, dict) == columnar
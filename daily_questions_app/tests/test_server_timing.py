@@ -0,0 +1,12 @@
+"""Server-Timing solo se envía en modo debug o con SERVER_TIMING"""
+
+
+def test_server_timing_is_off_by_default(app_module, client):
+    assert not app_module.app.debug
+    assert 'Server-Timing' not in client.get('/').headers
+
+
+def test_server_timing_can_be_enabled(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'SERVER_TIMING', True)
+    header = client.get('/').headers.get('Server-Timing', '')
+    assert header.startswith('db;dur=')
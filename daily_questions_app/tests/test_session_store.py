@@ -0,0 +1,96 @@
+"""Almacén de sesiones en SQLite: escrituras solo cuando hace falta, expiración y logout"""
+import sqlite3
+import time
+from datetime import timedelta
+
+import pytest
+from flask import Flask, session
+
+from session_store import SQLiteSessionInterface
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteSessionInterface(str(tmp_path / 'sessions.sqlite3'), sweep_interval=3600)
+
+
+@pytest.fixture
+def session_app(store):
+    app = Flask(__name__)
+    app.secret_key = 'clave-de-pruebas'
+    app.permanent_session_lifetime = timedelta(hours=1)
+    app.session_interface = store
+
+    @app.route('/set/<value>')
+    def set_value(value):
+        session['value'] = value
+        return ''
+
+    @app.route('/get')
+    def get_value():
+        return session.get('value', '')
+
+    @app.route('/clear')
+    def clear():
+        session.clear()
+        return ''
+
+    return app
+
+
+def rows(store):
+    with sqlite3.connect(store.path) as conn:
+        return conn.execute('SELECT id, data, expires_at FROM session').fetchall()
+
+
+def test_unmodified_session_is_not_rewritten(session_app, store):
+    client = session_app.test_client()
+    client.get('/set/a')
+    before = rows(store)
+    assert len(before) == 1
+
+    response = client.get('/get')
+    assert response.get_data(as_text=True) == 'a'
+    assert 'Set-Cookie' not in response.headers
+    assert rows(store) == before
+
+
+def test_session_expiry_is_extended_past_half_life(session_app, store):
+    client = session_app.test_client()
+    client.get('/set/a')
+    sid = rows(store)[0][0]
+    with sqlite3.connect(store.path) as conn:
+        conn.execute('UPDATE session SET expires_at = ? WHERE id = ?', (time.time() + 60, sid))
+
+    response = client.get('/get')
+    assert 'Set-Cookie' in response.headers
+    assert rows(store)[0][2] > time.time() + 30 * 60
+
+
+def test_expired_session_is_ignored_and_swept(session_app, store):
+    client = session_app.test_client()
+    client.get('/set/a')
+    with sqlite3.connect(store.path) as conn:
+        conn.execute('UPDATE session SET expires_at = ?', (time.time() - 1,))
+
+    assert client.get('/get').get_data(as_text=True) == ''
+    assert store.sweep() == 1
+    assert rows(store) == []
+
+
+def test_cleared_session_deletes_row_and_cookie(session_app, store):
+    client = session_app.test_client()
+    client.get('/set/a')
+    response = client.get('/clear')
+    assert rows(store) == []
+    assert 'Expires=Thu, 01 Jan 1970' in response.headers['Set-Cookie']
+
+
+def test_logout_deletes_stored_session(app_module, client):
+    store = app_module.app.session_interface
+    sid = next(cookie.value for cookie in client.cookie_jar if cookie.name == 'session')
+    assert sid in [row[0] for row in rows(store)]
+
+    assert client.get('/logout').status_code == 302
+    assert sid not in [row[0] for row in rows(store)]
+    assert client.get('/').status_code == 302
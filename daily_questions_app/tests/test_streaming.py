@@ -0,0 +1,44 @@
+"""Las respuestas transmitidas no retienen conexiones del pool si su cuerpo no se lee"""
+import pytest
+
+from db_instrumentation import assert_max_queries
+
+
+@pytest.mark.parametrize('path', [
+    '/api/history',
+    '/api/history?format=ndjson',
+    '/api/stats/weekly_responses',
+])
+def test_head_requests_do_not_hold_connections(app_module, client, path):
+    pool = app_module.db_pool
+    client.get(path)
+    before = pool.stats()
+    # Más peticiones que conexiones: si cada HEAD retuviera una, el pool se agotaría
+    for _ in range(pool.max_size + 2):
+        response = client.head(path)
+        response.close()
+        assert response.status_code == 200
+    after = pool.stats()
+    assert after['in_use'] == before['in_use']
+    assert after['timeouts'] == before['timeouts']
+    assert client.get(path).status_code == 200
+
+
+def test_streamed_body_is_complete_and_releases_connection(app_module, client):
+    pool = app_module.db_pool
+    before = pool.stats()
+    response = client.get('/api/history')
+    assert response.status_code == 200
+    assert response.get_json() == []
+    assert pool.stats()['in_use'] == before['in_use']
+
+
+def test_streamed_queries_count_towards_the_request(app_module, client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'SERVER_TIMING', True)
+    client.get('/')
+    with assert_max_queries(1) as stats:
+        response = client.get('/api/stats/weekly_responses')
+        response.get_data()
+    assert stats.queries == 1
+    # El encabezado sale antes que el cuerpo y lo indica en lugar de informar 0 consultas
+    assert 'db-stream' in response.headers['Server-Timing']
@@ -0,0 +1,55 @@
+"""/submit_responses en modo upsert: solo se escriben las diferencias con lo guardado"""
+from datetime import date, timedelta
+
+
+def submit(client, day, answers):
+    response = client.post('/submit_responses', json={
+        'date': day.isoformat(),
+        'responses': {str(question_id): value for question_id, value in answers.items()},
+    })
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()
+
+
+def saved(app_module, user, day):
+    """question_id -> (id, respuesta) guardadas para el día"""
+    with app_module.get_db_connection() as conn:
+        cursor = conn.cursor()
+        placeholders = ','.join('?' * len(user['question_ids']))
+        cursor.execute(
+            f'SELECT question_id, id, response FROM response WHERE date = ? AND question_id IN ({placeholders})',
+            [day.isoformat()] + user['question_ids']
+        )
+        return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+
+def test_upsert_inserts_updates_and_deletes_only_what_changed(app_module, client, user):
+    assert app_module.app.config['RESPONSE_WRITE_MODE'] == 'upsert'
+    q0, q1, q2, q3 = user['question_ids']
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    submit(client, yesterday, {q2: 'ayer'})
+
+    first = submit(client, today, {q0: 'a', q1: 'b', q2: 'c'})
+    assert first['counts'] == {'inserted': 3, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    before = saved(app_module, user, today)
+    other_day = saved(app_module, user, yesterday)
+    assert [value for _, value in other_day.values()] == ['ayer']
+
+    second = submit(client, today, {q0: 'a', q1: 'B', q3: 'd'})
+    assert second['counts'] == {'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1}
+
+    after = saved(app_module, user, today)
+    assert {question_id: value for question_id, (_, value) in after.items()} == {q0: 'a', q1: 'B', q3: 'd'}
+    # Las filas que siguen se conservan (mismo id), la modificada se actualiza en su lugar
+    assert after[q0][0] == before[q0][0]
+    assert after[q1][0] == before[q1][0]
+    # Otro día no se toca, aunque q2 se borró de hoy
+    assert saved(app_module, user, yesterday) == other_day
+
+
+def test_resubmitting_the_same_answers_writes_nothing(client, user):
+    answers = {question_id: 'igual' for question_id in user['question_ids']}
+    submit(client, date.today(), answers)
+    again = submit(client, date.today(), answers)
+    assert again['counts'] == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': len(answers)}
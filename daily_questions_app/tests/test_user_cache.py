@@ -0,0 +1,20 @@
+"""Caché de usuarios del user_loader: el registro no la vacía"""
+import os
+
+
+def stamp_mtime(path):
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+
+def test_register_keeps_cached_users(app_module, client, user):
+    assert client.get('/').status_code == 200
+    assert app_module.user_cache.get(user['id']) is not None
+    stamp = stamp_mtime(app_module.USER_CACHE_STAMP)
+
+    response = app_module.app.test_client().post('/register', data={'username': f"nuevo_{user['id']}",
+                                                                     'password': 'otra-clave'})
+    assert response.status_code == 302
+    assert app_module.User.get_by_username(f"nuevo_{user['id']}") is not None
+
+    assert app_module.user_cache.get(user['id']) is not None
+    assert stamp_mtime(app_module.USER_CACHE_STAMP) == stamp
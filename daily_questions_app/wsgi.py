@@ -0,0 +1,26 @@
+"""Punto de entrada WSGI para producción.
+
+Linux (gunicorn, varios workers):
+    gunicorn -c daily_questions_app/gunicorn.conf.py wsgi:app
+
+Windows (waitress, un proceso con varios hilos):
+    python daily_questions_app/wsgi.py
+"""
+import os
+
+from app import app, init_db_pool
+
+# Con varios workers la clave debe ser la misma en todos; no se acepta la aleatoria de desarrollo
+if not os.getenv('SECRET_KEY'):
+    raise RuntimeError("Defina SECRET_KEY (variable de entorno o archivo .env) antes de iniciar en producción")
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    init_db_pool()
+    serve(
+        app,
+        host=os.getenv('HOST', '0.0.0.0'),
+        port=int(os.getenv('PORT', '5000')),
+        threads=int(os.getenv('WAITRESS_THREADS', '8'))
+    )